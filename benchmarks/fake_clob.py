@@ -0,0 +1,289 @@
+"""
+In-memory stand-in of the CLOB HTTP API, for load tests.
+
+Implements the endpoints ClobApi uses: health check, api key creation and derivation, tick size,
+midpoint, last trade price, order book, open orders, order placement, cancel and cancel all.
+Latency, error rate and rate limit are configurable.
+"""
+
+import hashlib
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+OK = "OK"
+TICK_SIZE = "0.01"
+
+# endpoints which never fail nor wait, so that the keeper can always boot
+HEALTH_ENDPOINTS = {
+    "/",
+    "/time",
+    "/auth/api-key",
+    "/auth/api-keys",
+    "/auth/derive-api-key",
+}
+
+
+class FakeClob:
+    """State and request handling of the fake CLOB.
+
+    Attributes:
+        latency: Time (in seconds) every request waits before being handled.
+        jitter: Max random time (in seconds) added to the latency.
+        error_rate: Probability of a request failing with a 500.
+        rate_limit: Max number of requests per second, the requests above it fail with a 429.
+            `None` means no limit.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: float = None,
+        seed: int = None,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        assert latency >= 0 and jitter >= 0
+        assert 0 <= error_rate <= 1
+        assert rate_limit is None or rate_limit > 0
+
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+
+        self.stats = Counter()
+        self.orders = {}
+        self.markets = {}
+        self.token_markets = {}
+
+        self._random = random.Random(seed)
+        self._order_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._tokens = rate_limit
+        self._tokens_time = time.monotonic()
+
+    def add_market(self, condition_id: str, token_ids: tuple, mid: float = 0.5):
+        """Add a binary market, the midpoint of the second token is the complement of the first"""
+        with self._lock:
+            self.markets[condition_id] = {"token_ids": token_ids, "mid": mid}
+            for token_id in token_ids:
+                self.token_markets[str(token_id)] = condition_id
+
+    def set_mid(self, condition_id: str, mid: float):
+        with self._lock:
+            self.markets[condition_id]["mid"] = mid
+
+    def get_mid(self, token_id: str) -> float:
+        market = self.markets[self.token_markets[str(token_id)]]
+        if str(token_id) == str(market["token_ids"][0]):
+            return market["mid"]
+        return round(1 - market["mid"], 6)
+
+    def open_orders(self, market: str = None) -> list[dict]:
+        with self._lock:
+            return [
+                order
+                for order in self.orders.values()
+                if market is None or order["market"] == market
+            ]
+
+    def handle(
+        self, method: str, path: str, query: dict, body, headers: dict
+    ) -> tuple[int, object]:
+        """Handle a request, returns the HTTP status and the JSON payload"""
+        self.stats[f"{method} {path}"] += 1
+
+        if path not in HEALTH_ENDPOINTS:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            if delay > 0:
+                time.sleep(delay)
+            if not self._take_token():
+                self.stats["rate_limited"] += 1
+                return (429, {"error": "Too Many Requests"})
+            if self._random.random() < self.error_rate:
+                self.stats["errors"] += 1
+                return (500, {"error": "Internal Server Error"})
+
+        match (method, path):
+            case ("GET", "/"):
+                return (200, OK)
+            case ("GET", "/time"):
+                return (200, int(time.time()))
+            case ("POST", "/auth/api-key") | ("GET", "/auth/derive-api-key"):
+                return (200, self._api_key(headers.get("POLY_ADDRESS", "")))
+            case ("GET", "/auth/api-keys"):
+                api_key = self._api_key(headers.get("POLY_ADDRESS", ""))["apiKey"]
+                if headers.get("POLY_API_KEY") != api_key:
+                    return (401, {"error": "Unauthorized/Invalid api key"})
+                return (200, {"apiKeys": [api_key]})
+            case ("GET", "/tick-size"):
+                return (200, {"minimum_tick_size": TICK_SIZE})
+            case ("GET", "/neg-risk"):
+                return (200, {"neg_risk": False})
+            case ("GET", "/midpoint"):
+                return self._with_token(query, lambda t: {"mid": str(self.get_mid(t))})
+            case ("GET", "/last-trade-price"):
+                return self._with_token(
+                    query, lambda t: {"price": str(self.get_mid(t)), "side": "BUY"}
+                )
+            case ("GET", "/book"):
+                return self._with_token(query, self._book)
+            case ("GET", "/orders"):
+                return (200, self.open_orders(query.get("market")))
+            case ("GET", "/data/orders"):
+                return (
+                    200,
+                    {
+                        "data": self.open_orders(query.get("market")),
+                        "next_cursor": "LTE=",
+                    },
+                )
+            case ("POST", "/order"):
+                return (200, self._post_order(body))
+            case ("DELETE", "/order"):
+                return self._cancel(body)
+            case ("DELETE", "/cancel-all"):
+                with self._lock:
+                    self.stats["cancelled"] += len(self.orders)
+                    self.orders.clear()
+                return (200, OK)
+        return (404, {"error": f"Unknown endpoint {method} {path}"})
+
+    def _take_token(self) -> bool:
+        """Token bucket of the rate limit, with a burst of a second of requests"""
+        if self.rate_limit is None:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.rate_limit,
+                self._tokens + (now - self._tokens_time) * self.rate_limit,
+            )
+            self._tokens_time = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    @staticmethod
+    def _api_key(address: str) -> dict:
+        seed = hashlib.sha256(address.lower().encode()).hexdigest()
+        return {"apiKey": seed[:32], "secret": seed[32:], "passphrase": seed[:16]}
+
+    def _with_token(self, query: dict, function) -> tuple[int, object]:
+        token_id = query.get("token_id")
+        if token_id not in self.token_markets:
+            return (404, {"error": f"Unknown token {token_id}"})
+        return (200, function(token_id))
+
+    def _book(self, token_id: str) -> dict:
+        mid = self.get_mid(token_id)
+        return {
+            "market": self.token_markets[token_id],
+            "asset_id": token_id,
+            "bids": [{"price": f"{mid - 0.01:.2f}", "size": "100"}],
+            "asks": [{"price": f"{mid + 0.01:.2f}", "size": "100"}],
+            "hash": "",
+        }
+
+    def _post_order(self, body: dict) -> dict:
+        order = body["order"]
+        token_id = str(order["tokenId"])
+        if token_id not in self.token_markets:
+            return {"success": False, "errorMsg": f"Unknown token {token_id}"}
+
+        # makerAmount is the collateral paid by a buy, and the tokens sold by a sell
+        maker_amount = int(order["makerAmount"])
+        taker_amount = int(order["takerAmount"])
+        if order["side"] == "BUY":
+            (size, price) = (taker_amount, maker_amount / taker_amount)
+        else:
+            (size, price) = (maker_amount, taker_amount / maker_amount)
+
+        order_id = f"0x{next(self._order_ids):064x}"
+        with self._lock:
+            self.orders[order_id] = {
+                "id": order_id,
+                "status": "LIVE",
+                "market": self.token_markets[token_id],
+                "asset_id": token_id,
+                "side": order["side"],
+                "price": f"{price:.2f}",
+                "original_size": str(size / 10**6),
+                "size_matched": "0",
+                "owner": body.get("owner"),
+            }
+            self.stats["placed"] += 1
+        return {"success": True, "orderID": order_id, "errorMsg": ""}
+
+    def _cancel(self, body: dict) -> tuple[int, object]:
+        with self._lock:
+            if self.orders.pop(body.get("orderID"), None) is None:
+                return (400, {"error": "Order not found"})
+            self.stats["cancelled"] += 1
+        return (200, OK)
+
+
+class FakeServer:
+    """Serves a fake backend (with a `handle` method like FakeClob's) over HTTP, on a local port"""
+
+    def __init__(self, backend, host: str = "127.0.0.1", port: int = 0):
+        self.backend = backend
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_DELETE(self):
+                self._handle("DELETE")
+
+            def _handle(self, method: str):
+                url = urlparse(self.path)
+                query = {
+                    key: values[0] for (key, values) in parse_qs(url.query).items()
+                }
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length > 0 else None
+
+                (status, payload) = backend.handle(
+                    method, url.path, query, body, dict(self.headers)
+                )
+
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        (host, port) = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
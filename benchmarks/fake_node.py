@@ -0,0 +1,134 @@
+"""
+Minimal stand-in of a Polygon JSON-RPC node, for load tests: answers the calls the keeper makes
+at startup and on every balance refresh, with the approvals already given and fixed balances.
+"""
+
+import time
+
+from eth_utils import keccak
+
+CHAIN_ID = 137
+MAX_UINT = 2**256 - 1
+
+
+def _selector(signature: str) -> str:
+    return keccak(text=signature)[:4].hex()
+
+
+ALLOWANCE = _selector("allowance(address,address)")
+IS_APPROVED_FOR_ALL = _selector("isApprovedForAll(address,address)")
+ERC20_BALANCE_OF = _selector("balanceOf(address)")
+ERC1155_BALANCE_OF = _selector("balanceOf(address,uint256)")
+GET_ETH_BALANCE = _selector("getEthBalance(address)")
+AGGREGATE3 = _selector("aggregate3((address,bool,bytes)[])")
+
+
+def _word(data: bytes, offset: int) -> int:
+    return int.from_bytes(data[offset : offset + 32], byteorder="big")
+
+
+def _uint(value: int) -> bytes:
+    return value.to_bytes(32, byteorder="big")
+
+
+class FakeNode:
+    """JSON-RPC backend for FakeServer.
+
+    Attributes:
+        collateral_balance: Collateral balance (in units of 10^-6) of every address.
+        token_balance: Conditional token balance (in units of 10^-6) of every address and token id.
+        gas_balance: Gas balance (in wei) of every address.
+    """
+
+    def __init__(
+        self,
+        collateral_balance: int = 1000 * 10**6,
+        token_balance: int = 1000 * 10**6,
+        gas_balance: int = 10**18,
+    ):
+        self.collateral_balance = collateral_balance
+        self.token_balance = token_balance
+        self.gas_balance = gas_balance
+
+        self.start_time = time.monotonic()
+
+    def handle(self, method: str, path: str, query: dict, body, headers: dict):
+        if method != "POST" or not isinstance(body, dict):
+            return (404, {"error": "JSON-RPC requests only"})
+        try:
+            result = self._call(body["method"], body.get("params", []))
+            return (200, {"jsonrpc": "2.0", "id": body.get("id"), "result": result})
+        except Exception as e:
+            return (
+                200,
+                {
+                    "jsonrpc": "2.0",
+                    "id": body.get("id"),
+                    "error": {"code": -32601, "message": str(e)},
+                },
+            )
+
+    def _call(self, method: str, params: list):
+        block_number = int(time.monotonic() - self.start_time) // 2 + 1
+        match method:
+            case "eth_chainId":
+                return hex(CHAIN_ID)
+            case "net_version":
+                return str(CHAIN_ID)
+            case "eth_blockNumber":
+                return hex(block_number)
+            case "eth_gasPrice":
+                return hex(30 * 10**9)
+            case "eth_getBalance":
+                return hex(self.gas_balance)
+            case "eth_getBlockByNumber":
+                return {
+                    "number": hex(block_number),
+                    "hash": "0x" + _uint(block_number).hex(),
+                    "parentHash": "0x" + _uint(block_number - 1).hex(),
+                    "timestamp": hex(int(time.time())),
+                    "gasLimit": hex(30_000_000),
+                    "gasUsed": "0x0",
+                    "baseFeePerGas": hex(30 * 10**9),
+                    "transactions": [],
+                }
+            case "eth_call":
+                data = params[0].get("data") or params[0].get("input")
+                return "0x" + self._eth_call(bytes.fromhex(data[2:])).hex()
+        raise Exception(f"Unsupported method {method}")
+
+    def _eth_call(self, data: bytes) -> bytes:
+        selector = data[:4].hex()
+        if selector == ALLOWANCE:
+            return _uint(MAX_UINT)
+        if selector == IS_APPROVED_FOR_ALL:
+            return _uint(1)
+        if selector == ERC20_BALANCE_OF:
+            return _uint(self.collateral_balance)
+        if selector == ERC1155_BALANCE_OF:
+            return _uint(self.token_balance)
+        if selector == GET_ETH_BALANCE:
+            return _uint(self.gas_balance)
+        if selector == AGGREGATE3:
+            return self._aggregate3(data[4:])
+        raise Exception(f"Unsupported call {selector}")
+
+    def _aggregate3(self, args: bytes) -> bytes:
+        """Decode the (address target, bool allowFailure, bytes callData)[] calls, and encode
+        the (bool success, bytes returnData)[] results"""
+        calls = args[_word(args, 0) :]
+        count = _word(calls, 0)
+        elements = calls[32:]
+
+        results = []
+        for i in range(count):
+            call = elements[_word(elements, 32 * i) :]
+            call_data = call[_word(call, 64) :]
+            results.append(self._eth_call(call_data[32 : 32 + _word(call_data, 0)]))
+
+        # each result: success, offset of returnData, its length and its 32 bytes
+        head = b"".join(_uint(32 * count + 128 * i) for i in range(count))
+        tail = b"".join(
+            _uint(1) + _uint(64) + _uint(len(result)) + result for result in results
+        )
+        return _uint(32) + _uint(count) + head + tail
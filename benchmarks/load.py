@@ -0,0 +1,239 @@
+"""
+Load test of the keeper: runs a full App against a fake CLOB and a fake node, moving the
+midpoint to make it requote, and reports the orders per second, the cycle latency and the
+thread usage.
+
+Usage:
+    python -m benchmarks.load [--duration 30] [--latency 0.05] [--error-rate 0.01] [-- keeper args]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from eth_utils import keccak
+
+from benchmarks.fake_clob import FakeClob, FakeServer
+from benchmarks.fake_node import CHAIN_ID, FakeNode
+from poly_market_maker.app import App
+from poly_market_maker.market import Market
+from poly_market_maker.token import Token
+from poly_market_maker.trace_summary import summarize
+from poly_market_maker.tracing import trace_buffer
+
+PRIVATE_KEY = "0x4c0883a69102937d6231471b5dbb6204fe5129617082792ae468d01a3f362318"
+COLLATERAL = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ThreadSampler:
+    """Samples the number of live threads, per thread name without its numbering"""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.samples = []
+        self.peaks = Counter()
+        self._stopped = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._thread_sample, daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def report(self) -> dict:
+        return {
+            "peak": max(self.samples, default=0),
+            "mean": sum(self.samples) / len(self.samples) if self.samples else 0,
+            "peak_by_name": dict(self.peaks.most_common()),
+        }
+
+    def _thread_sample(self):
+        while not self._stopped.wait(self.interval):
+            threads = threading.enumerate()
+            self.samples.append(len(threads))
+            names = Counter(re.sub(r"[-_]\d+", "", thread.name) for thread in threads)
+            for name, count in names.items():
+                self.peaks[name] = max(self.peaks[name], count)
+
+
+def move_price(
+    fake_clob: FakeClob,
+    condition_id: str,
+    interval: float,
+    step: float,
+    stopped: threading.Event,
+    seed: int = None,
+):
+    """Random walk of the midpoint, by up to `step` every `interval` seconds"""
+    rng = random.Random(seed)
+    mid = 0.5
+    while not stopped.wait(interval):
+        mid = min(max(mid + rng.choice([-step, step]), 0.1), 0.9)
+        fake_clob.set_mid(condition_id, round(mid, 2))
+
+
+def run(
+    duration: float = 30.0,
+    latency: float = 0.05,
+    jitter: float = 0.02,
+    error_rate: float = 0.0,
+    rate_limit: float = None,
+    price_interval: float = 2.0,
+    price_step: float = 0.01,
+    keeper_args: list = None,
+    seed: int = None,
+) -> dict:
+    fake_clob = FakeClob(
+        latency=latency,
+        jitter=jitter,
+        error_rate=error_rate,
+        rate_limit=rate_limit,
+        seed=seed,
+    )
+    clob_server = FakeServer(fake_clob)
+    node_server = FakeServer(FakeNode())
+    clob_server.start()
+    node_server.start()
+
+    condition_id = "0x" + keccak(text=f"load test {seed}").hex()
+    market = Market(condition_id, COLLATERAL)
+    fake_clob.add_market(
+        condition_id, (market.token_id(Token.A), market.token_id(Token.B))
+    )
+
+    cache_directory = tempfile.mkdtemp()
+    args = [
+        "--private-key",
+        PRIVATE_KEY,
+        "--rpc-url",
+        node_server.url,
+        "--clob-api-url",
+        clob_server.url,
+        "--chain-id",
+        str(CHAIN_ID),
+        "--api-creds-cache",
+        os.path.join(cache_directory, "api_creds.json"),
+        "--token-id-cache",
+        os.path.join(cache_directory, "token_ids.json"),
+        "--condition-id",
+        condition_id,
+        "--strategy",
+        "amm",
+        "--strategy-config",
+        "config/amm.json",
+        "--gas-strategy",
+        "fixed",
+        "--metrics-server-port",
+        str(free_port()),
+        "--sync-interval",
+        "1",
+        "--refresh-frequency",
+        "1",
+    ] + (keeper_args or [])
+
+    # the logging config of the repo writes to ./logs, created by install.sh
+    os.makedirs("logs", exist_ok=True)
+    app = App(args)
+    logging.getLogger().setLevel(logging.WARNING)
+    trace_buffer.drain()
+
+    stopped = threading.Event()
+    sampler = ThreadSampler()
+    sampler.start()
+    threading.Thread(
+        target=move_price,
+        args=(fake_clob, condition_id, price_interval, price_step, stopped, seed),
+        daemon=True,
+    ).start()
+
+    # the keeper shuts down gracefully on a SIGTERM, after `duration` seconds
+    threading.Timer(duration, os.kill, (os.getpid(), signal.SIGTERM)).start()
+    start_time = time.monotonic()
+    try:
+        app.main()
+    except SystemExit:
+        pass
+    elapsed = time.monotonic() - start_time
+
+    stopped.set()
+    sampler.stop()
+    clob_server.stop()
+    node_server.stop()
+
+    placed = fake_clob.stats["placed"]
+    cancelled = fake_clob.stats["cancelled"]
+    return {
+        "duration": elapsed,
+        "orders_placed": placed,
+        "orders_per_second": placed / elapsed,
+        "orders_cancelled": cancelled,
+        "cancels_per_second": cancelled / elapsed,
+        "open_orders_left": len(fake_clob.open_orders()),
+        "requests": {
+            key: count
+            for (key, count) in fake_clob.stats.items()
+            if key[0].isupper() and " " in key
+        },
+        "errors": fake_clob.stats["errors"],
+        "rate_limited": fake_clob.stats["rate_limited"],
+        "latency": summarize(trace_buffer.drain()),
+        "threads": sampler.report(),
+    }
+
+
+def main(args=None) -> int:
+    args = sys.argv[1:] if args is None else args
+    keeper_args = []
+    if "--" in args:
+        keeper_args = args[args.index("--") + 1 :]
+        args = args[: args.index("--")]
+
+    parser = argparse.ArgumentParser(prog="benchmarks.load", description=__doc__)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--price-interval", type=float, default=2.0)
+    parser.add_argument("--price-step", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", type=str, help="Write the report to this file")
+    args = parser.parse_args(args)
+
+    report = run(
+        duration=args.duration,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        price_interval=args.price_interval,
+        price_step=args.price_step,
+        keeper_args=keeper_args,
+        seed=args.seed,
+    )
+
+    print(json.dumps(report, indent=2))
+    if args.output is not None:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
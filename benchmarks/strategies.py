@@ -0,0 +1,265 @@
+"""
+Micro-benchmarks of the AMM and Bands strategies.
+
+Times AMMManager.get_expected_orders, AMMStrategy.get_orders, Bands.cancellable_orders and
+Bands.new_orders over ladder sizes, band counts and open order counts, writes the results as
+JSON and compares them with a stored baseline.
+
+Usage:
+    python -m benchmarks.strategies [--output results.json] [--baseline benchmarks/baseline.json]
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import timeit
+
+from poly_market_maker.order import Order, Side
+from poly_market_maker.orderbook import OrderBook
+from poly_market_maker.strategies.amm import AMMConfig, AMMManager
+from poly_market_maker.strategies.amm_strategy import AMMStrategy
+from poly_market_maker.strategies.bands import Bands
+from poly_market_maker.token import Token, Collateral
+
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+
+# a benchmark regresses when it is slower than the baseline by more than this ratio
+DEFAULT_TOLERANCE = 0.25
+
+# the ladder size is the number of delta steps within the depth, per side and token
+AMM_DEPTHS = [0.05, 0.1, 0.2, 0.4]
+BAND_COUNTS = [1, 3, 10]
+OPEN_ORDER_COUNTS = [10, 100, 1000, 10000]
+
+PRICE = 0.5
+BALANCES = {Token.A: 1000.0, Token.B: 1000.0, Collateral: 1000.0}
+
+
+def amm_config(depth: float) -> AMMConfig:
+    return AMMConfig(
+        p_min=0.05,
+        p_max=0.95,
+        spread=0.01,
+        delta=0.01,
+        depth=depth,
+        max_collateral=200.0,
+    )
+
+
+def bands_config(count: int) -> list[dict]:
+    return [
+        {
+            "minMargin": 0.01 * i,
+            "avgMargin": 0.01 * i + 0.005,
+            "maxMargin": 0.01 * (i + 1),
+            "minAmount": 10.0,
+            "avgAmount": 20.0,
+            "maxAmount": 30.0,
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def open_orders(count: int, seed: int = 0) -> list[Order]:
+    """Open orders spread over 40 ticks around the price, on both sides of both tokens"""
+    rng = random.Random(seed)
+    return [
+        Order(
+            size=float(rng.randint(5, 30)),
+            price=rng.randint(30, 70) / 100,
+            side=rng.choice([Side.BUY, Side.SELL]),
+            token=rng.choice([Token.A, Token.B]),
+            id=f"order-{i}",
+        )
+        for i in range(count)
+    ]
+
+
+def benchmarks() -> dict:
+    """name: (params, function to time)"""
+    cases = {}
+    target_prices = {Token.A: PRICE, Token.B: 1 - PRICE}
+
+    for depth in AMM_DEPTHS:
+        amm_manager = AMMManager(amm_config(depth))
+        cases[f"amm_expected_orders[depth={depth}]"] = (
+            {"depth": depth},
+            lambda amm_manager=amm_manager: amm_manager.get_expected_orders(
+                target_prices, BALANCES
+            ),
+        )
+
+        for count in OPEN_ORDER_COUNTS:
+            strategy = AMMStrategy(
+                {
+                    "p_min": 0.05,
+                    "p_max": 0.95,
+                    "spread": 0.01,
+                    "delta": 0.01,
+                    "depth": depth,
+                    "max_collateral": 200.0,
+                }
+            )
+            orderbook = OrderBook(
+                orders=open_orders(count),
+                balances=BALANCES,
+                orders_being_placed=False,
+                orders_being_cancelled=False,
+            )
+            cases[f"amm_get_orders[depth={depth},open={count}]"] = (
+                {"depth": depth, "open_orders": count},
+                lambda strategy=strategy, orderbook=orderbook: strategy.get_orders(
+                    orderbook, target_prices
+                ),
+            )
+
+    for band_count in BAND_COUNTS:
+        bands = Bands(bands_config(band_count))
+        for count in OPEN_ORDER_COUNTS:
+            orders = open_orders(count)
+            cases[f"bands_cancellable_orders[bands={band_count},open={count}]"] = (
+                {"bands": band_count, "open_orders": count},
+                lambda bands=bands, orders=orders: bands.cancellable_orders(
+                    orders, PRICE
+                ),
+            )
+            cases[f"bands_new_orders[bands={band_count},open={count}]"] = (
+                {"bands": band_count, "open_orders": count},
+                lambda bands=bands, orders=orders: bands.new_orders(
+                    orders, 1000.0, 1000.0, PRICE, Token.A
+                ),
+            )
+
+    return cases
+
+
+def run(name_filter: str = None, repeat: int = 5, min_time: float = 0.2) -> dict:
+    """
+    Time every benchmark: each is called in loops of about `min_time` seconds,
+    `repeat` times, and the best and median time per call are kept.
+    """
+    results = {}
+    for name, (params, function) in benchmarks().items():
+        if name_filter is not None and name_filter not in name:
+            continue
+
+        timer = timeit.Timer(function)
+        number = 1
+        while timer.timeit(number) < min_time and number < 10**6:
+            number *= 2
+        timings = sorted(
+            timing / number for timing in timer.repeat(repeat=repeat, number=number)
+        )
+        results[name] = {
+            "params": params,
+            "number": number,
+            "repeat": repeat,
+            "min": timings[0],
+            "median": timings[len(timings) // 2],
+        }
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE):
+    """
+    Compare the best times with the baseline ones.
+
+    Returns:
+        The list of (name, baseline time, time, ratio, regressed) of the benchmarks in both.
+    """
+    comparison = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["min"] / baseline[name]["min"]
+        comparison.append(
+            (name, baseline[name]["min"], result["min"], ratio, ratio > 1 + tolerance)
+        )
+    return comparison
+
+
+def format_results(results: dict) -> str:
+    lines = [f"{'benchmark':<52}{'min (us)':>12}{'median (us)':>14}"]
+    for name, result in results.items():
+        lines.append(
+            f"{name:<52}{result['min'] * 1e6:>12.1f}{result['median'] * 1e6:>14.1f}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(comparison: list) -> str:
+    lines = [f"{'benchmark':<52}{'baseline (us)':>14}{'now (us)':>12}{'ratio':>8}"]
+    for name, baseline_time, result_time, ratio, regressed in comparison:
+        lines.append(
+            f"{name:<52}{baseline_time * 1e6:>14.1f}{result_time * 1e6:>12.1f}{ratio:>8.2f}"
+            + ("  REGRESSION" if regressed else "")
+        )
+    return "\n".join(lines)
+
+
+def main(args=None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmarks.strategies", description=__doc__)
+    parser.add_argument("--output", type=str, help="Write the results to this file")
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        default=DEFAULT_BASELINE,
+        help=f"Baseline results to compare with (default: {DEFAULT_BASELINE})",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=f"Slowdown ratio above which a benchmark regresses (default: {DEFAULT_TOLERANCE})",
+    )
+    parser.add_argument("--filter", type=str, help="Only run the matching benchmarks")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    args = parser.parse_args(args)
+
+    # read before the results are written, the output may replace the baseline
+    try:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)["results"]
+    except FileNotFoundError:
+        baseline = None
+
+    results = run(args.filter, repeat=args.repeat, min_time=args.min_time)
+    print(format_results(results))
+
+    if args.output is not None:
+        with open(args.output, "w") as fh:
+            json.dump(
+                {
+                    "machine": {
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                    },
+                    "timestamp": int(time.time()),
+                    "results": results,
+                },
+                fh,
+                indent=2,
+            )
+
+    if baseline is None:
+        print(f"No baseline at {args.baseline}, skipping the comparison")
+        return 0
+
+    comparison = compare(results, baseline, args.tolerance)
+    print()
+    print(format_comparison(comparison))
+    regressions = [name for (name, *_, regressed) in comparison if regressed]
+    if len(regressions) > 0:
+        print(
+            f"{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
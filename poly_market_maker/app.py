@@ -1,31 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
 import logging
 from prometheus_client import start_http_server
+import signal
 import time
 
 from poly_market_maker.args import get_args
-from poly_market_maker.price_feed import PriceFeedClob
+from poly_market_maker.price_feed import (
+    PriceAggregation,
+    PriceFeedAggregate,
+    PriceFeedClob,
+    PriceFeedSource,
+)
 from poly_market_maker.gas import GasStation, GasStrategy
 from poly_market_maker.utils import setup_logging, setup_web3
 from poly_market_maker.order import Order, Side
+from poly_market_maker.ct_helpers import TokenIdCache
 from poly_market_maker.market import Market
 from poly_market_maker.token import Token, Collateral
 from poly_market_maker.clob_api import ClobApi
 from poly_market_maker.lifecycle import Lifecycle
 from poly_market_maker.orderbook import OrderBookManager
 from poly_market_maker.contracts import Contracts
-from poly_market_maker.metrics import keeper_balance_amount
+from poly_market_maker.transactions import TransactionPipeline
+from poly_market_maker.chain_watcher import ChainWatcher
+from poly_market_maker.metrics import keeper_balance_amount, time_to_first_quote
 from poly_market_maker.strategy import StrategyManager
+from poly_market_maker.kill_switch import KillSwitch
+from poly_market_maker.heartbeat import Heartbeat
+from poly_market_maker.tracing import TraceExporter
 
 
 class App:
     """Market maker keeper on Polymarket CLOB"""
 
     def __init__(self, args: list):
+        self.start_time = time.monotonic()
         setup_logging()
         self.logger = logging.getLogger(__name__)
 
         args = get_args(args)
         self.sync_interval = args.sync_interval
+        self.adaptive_sync = args.adaptive_sync
 
         # self.min_tick = args.min_tick
         # self.min_size = args.min_size
@@ -34,32 +49,86 @@ class App:
         self.metrics_server_port = args.metrics_server_port
         start_http_server(self.metrics_server_port)
 
+        self.trace_exporter = None
+        if args.trace_file is not None:
+            self.trace_exporter = TraceExporter(
+                args.trace_file, interval=args.trace_export_interval
+            )
+            self.trace_exporter.start()
+
         self.web3 = setup_web3(args.rpc_url, args.private_key)
         self.address = self.web3.eth.account.from_key(args.private_key).address
 
-        self.clob_api = ClobApi(
-            host=args.clob_api_url,
-            chain_id=self.web3.eth.chain_id,
-            private_key=args.private_key,
-        )
-
         self.gas_station = GasStation(
             strat=GasStrategy(args.gas_strategy),
             w3=self.web3,
             url=args.gas_station_url,
             fixed=args.fixed_gas_price,
+            refresh_interval=args.gas_refresh_interval,
+            ttl=args.gas_ttl,
+            max_age=args.gas_max_age,
         )
-        self.contracts = Contracts(self.web3, self.gas_station)
 
-        self.market = Market(
-            args.condition_id,
+        # bootstrap: the independent startup steps run concurrently
+        self._bootstrap_executor = ThreadPoolExecutor(max_workers=3)
+        gas_station_started = self._bootstrap_executor.submit(self.gas_station.start)
+        chain_id = (
+            args.chain_id if args.chain_id is not None else self.web3.eth.chain_id
+        )
+        self.clob_api = ClobApi(
+            host=args.clob_api_url,
+            chain_id=chain_id,
+            private_key=args.private_key,
+            creds_path=args.api_creds_cache,
+        )
+        self.transactions = TransactionPipeline(
+            self.web3, args.private_key, self.gas_station
+        )
+        self.transactions.chain_id = chain_id
+        self.transactions.start()
+        self.contracts = Contracts(
+            self.web3, self.gas_station, transactions=self.transactions
+        )
+        self.contracts.build_handles(
             self.clob_api.get_collateral_address(),
+            self.clob_api.get_conditional_address(),
         )
 
-        self.price_feed = PriceFeedClob(self.market, self.clob_api)
+        # the approvals are checked while the order book is fetched, see startup
+        self._approved = self._bootstrap_executor.submit(self.approve)
+
+        # deriving the token ids costs a few elliptic curve operations, cache them
+        self.market = Market.from_condition_ids(
+            [args.condition_id],
+            self.clob_api.get_collateral_address(),
+            cache=TokenIdCache(args.token_id_cache) if args.token_id_cache else None,
+        )[0]
+
+        # encode the balance queries once, every refresh reuses them
+        self.balance_tokens = [
+            (self.clob_api.get_collateral_address(), None),
+            (self.clob_api.get_conditional_address(), self.market.token_id(Token.A)),
+            (self.clob_api.get_conditional_address(), self.market.token_id(Token.B)),
+        ]
+        self.contracts.balance_calls(self.address, self.balance_tokens)
+
+        price_sources = [
+            PriceFeedSource(source.strip()) for source in args.price_sources.split(",")
+        ]
+        if price_sources == [PriceFeedSource.CLOB]:
+            self.price_feed = PriceFeedClob(self.market, self.clob_api)
+        else:
+            self.price_feed = PriceFeedAggregate(
+                self.market,
+                self.clob_api,
+                price_sources,
+                aggregation=PriceAggregation(args.price_aggregation),
+                timeout=args.price_timeout,
+                ttl=args.price_cache_ttl,
+            )
 
         self.order_book_manager = OrderBookManager(
-            args.refresh_frequency, max_workers=1
+            args.refresh_frequency, max_workers=args.max_workers
         )
         self.order_book_manager.get_orders_with(self.get_orders)
         self.order_book_manager.get_balances_with(self.get_balances)
@@ -70,13 +139,64 @@ class App:
         self.order_book_manager.cancel_all_orders_with(
             lambda _: self.clob_api.cancel_all_orders()
         )
+
+        self.chain_watcher = None
+        if args.watch_transfers:
+            # refresh the balances only when a transfer of the keeper shows up onchain
+            self.chain_watcher = ChainWatcher(
+                self.web3,
+                self.address,
+                [self.clob_api.get_collateral_address()],
+                [self.clob_api.get_conditional_address()],
+                lambda _: self.order_book_manager.invalidate_balances(),
+                ws_url=args.ws_url,
+                poll_interval=args.chain_poll_interval,
+            )
+            self.order_book_manager.refresh_balances_on_demand()
+            self.chain_watcher.start()
+
         self.order_book_manager.start()
+        self.startup_timeout = args.startup_timeout
+        self.shutdown_timeout = args.shutdown_timeout
+
+        self.kill_switch = KillSwitch(
+            self.price_feed, self.order_book_manager, args.max_price_age
+        )
+
+        # cancels all orders if the sync loop stops making progress
+        heartbeat_timeout = (
+            args.heartbeat_timeout
+            if args.heartbeat_timeout is not None
+            else 5 * self.sync_interval
+        )
+        self.heartbeat = None
+        if heartbeat_timeout > 0:
+            self.heartbeat = Heartbeat(
+                self.order_book_manager,
+                heartbeat_timeout,
+                interval=args.heartbeat_interval,
+            )
 
         self.strategy_manager = StrategyManager(
             args.strategy,
             args.strategy_config,
             self.price_feed,
             self.order_book_manager,
+            cycle_budget=args.cycle_budget,
+            stale_price_threshold=args.stale_price_threshold,
+            batch_size=args.placement_batch_size,
+            kill_switch=self.kill_switch,
+            watch_config=args.watch_strategy_config,
+        )
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(
+                signal.SIGHUP, lambda sig, frame: self.strategy_manager.request_reload()
+            )
+        self.quoting = False
+
+        gas_station_started.result()
+        self.logger.info(
+            f"Bootstrap done in {time.monotonic() - self.start_time:.2f} seconds"
         )
 
     """
@@ -86,8 +206,11 @@ class App:
     def main(self):
         self.logger.debug(self.sync_interval)
         with Lifecycle() as lifecycle:
+            lifecycle.wait_for(self.order_book_manager.is_ready, self.startup_timeout)
             lifecycle.on_startup(self.startup)
-            lifecycle.every(self.sync_interval, self.synchronize)  # Sync every 5s
+            lifecycle.every(
+                self.sync_interval, self.synchronize, adaptive=self.adaptive_sync
+            )
             lifecycle.on_shutdown(self.shutdown)
 
     """
@@ -96,8 +219,9 @@ class App:
 
     def startup(self):
         self.logger.info("Running startup callback...")
-        self.approve()
-        time.sleep(5)  # 5 second initial delay so that bg threads fetch the orderbook
+        self._approved.result()
+        if self.heartbeat is not None:
+            self.heartbeat.start()
         self.logger.info("Startup complete!")
 
     def synchronize(self):
@@ -105,15 +229,33 @@ class App:
         Synchronize the orderbook by cancelling orders out of bands and placing new orders if necessary
         """
         self.logger.debug("Synchronizing orderbook...")
-        self.strategy_manager.synchronize()
+        try:
+            self.strategy_manager.synchronize()
+        finally:
+            if self.heartbeat is not None:
+                self.heartbeat.beat()
         self.logger.debug("Synchronized orderbook!")
 
+        if (
+            not self.quoting
+            and len(self.order_book_manager.get_order_book().orders) > 0
+        ):
+            self.quoting = True
+            time_to_first_quote.set(time.monotonic() - self.start_time)
+            self.logger.info(
+                f"First quotes placed {time.monotonic() - self.start_time:.2f} seconds after start"
+            )
+
     def shutdown(self):
         """
         Shut down the keeper
         """
         self.logger.info("Keeper shutting down...")
-        self.order_book_manager.cancel_all_orders()
+        if self.heartbeat is not None:
+            self.heartbeat.stop()
+        self.order_book_manager.cancel_all_orders(timeout=self.shutdown_timeout)
+        if self.trace_exporter is not None:
+            self.trace_exporter.stop()
         self.logger.info("Keeper is shut down!")
 
     """
@@ -126,20 +268,10 @@ class App:
         """
         self.logger.debug(f"Getting balances for address: {self.address}")
 
-        collateral_balance = self.contracts.token_balance_of(
-            self.clob_api.get_collateral_address(), self.address
-        )
-        token_A_balance = self.contracts.token_balance_of(
-            self.clob_api.get_conditional_address(),
-            self.address,
-            self.market.token_id(Token.A),
-        )
-        token_B_balance = self.contracts.token_balance_of(
-            self.clob_api.get_conditional_address(),
-            self.address,
-            self.market.token_id(Token.B),
-        )
-        gas_balance = self.contracts.gas_balance(self.address)
+        (
+            (collateral_balance, token_A_balance, token_B_balance),
+            gas_balance,
+        ) = self.contracts.balances_of(self.address, self.balance_tokens)
 
         keeper_balance_amount.labels(
             accountaddress=self.address,
@@ -188,13 +320,7 @@ class App:
             side=new_order.side.value,
             token_id=self.market.token_id(new_order.token),
         )
-        return Order(
-            price=new_order.price,
-            size=new_order.size,
-            side=new_order.side,
-            id=order_id,
-            token=new_order.token,
-        )
+        return new_order.with_id(order_id)
 
     def approve(self):
         """
@@ -204,5 +330,18 @@ class App:
         conditional = self.clob_api.get_conditional_address()
         exchange = self.clob_api.get_exchange()
 
-        self.contracts.max_approve_erc20(collateral, self.address, exchange)
-        self.contracts.max_approve_erc1155(conditional, self.address, exchange)
+        # the two approvals are independent, check (and send) them concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            approvals = [
+                executor.submit(
+                    self.contracts.max_approve_erc20, collateral, self.address, exchange
+                ),
+                executor.submit(
+                    self.contracts.max_approve_erc1155,
+                    conditional,
+                    self.address,
+                    exchange,
+                ),
+            ]
+        for approval in approvals:
+            approval.result()
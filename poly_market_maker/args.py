@@ -1,5 +1,6 @@
 import argparse
 
+from poly_market_maker.ct_helpers import DEFAULT_TOKEN_ID_CACHE_PATH
 from poly_market_maker.strategy import Strategy
 
 
@@ -12,6 +13,40 @@ def get_args(args) -> dict:
 
     parser.add_argument("--clob-api-url", type=str, required=True, help="CLOB API url")
 
+    parser.add_argument(
+        "--chain-id",
+        type=int,
+        help="Chain id of the RPC, to skip fetching it on startup",
+    )
+
+    parser.add_argument(
+        "--api-creds-cache",
+        type=str,
+        default=None,
+        help="File caching the derived CLOB API credentials (in plaintext), to skip deriving them on startup. Disabled by default",
+    )
+
+    parser.add_argument(
+        "--token-id-cache",
+        type=str,
+        default=DEFAULT_TOKEN_ID_CACHE_PATH,
+        help=f"File caching the derived token ids of the markets, empty to disable (default: {DEFAULT_TOKEN_ID_CACHE_PATH})",
+    )
+
+    parser.add_argument(
+        "--startup-timeout",
+        type=int,
+        default=30,
+        help="Max time (in seconds) to wait for the first order book fetch before quoting (default: 30)",
+    )
+
+    parser.add_argument(
+        "--shutdown-timeout",
+        type=float,
+        default=10.0,
+        help="Max time (in seconds) spent cancelling all the orders on shutdown (default: 10)",
+    )
+
     parser.add_argument(
         "--sync-interval",
         type=int,
@@ -20,6 +55,12 @@ def get_args(args) -> dict:
         help="The number of seconds in between synchronizations",
     )
 
+    parser.add_argument(
+        "--adaptive-sync",
+        action="store_true",
+        help="Stretch the sync interval (up to 4x) while the synchronizations keep overrunning it",
+    )
+
     parser.add_argument(
         "--min-size",
         type=float,
@@ -43,11 +84,108 @@ def get_args(args) -> dict:
         help="Order book refresh frequency (in seconds, default: 5)",
     )
 
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=5,
+        help="Maximum number of concurrent order placements and cancellations (default: 5)",
+    )
+
+    parser.add_argument(
+        "--cycle-budget",
+        type=float,
+        default=10.0,
+        help="Time (in seconds) a synchronization cycle has to place its orders (default: 10)",
+    )
+
+    parser.add_argument(
+        "--stale-price-threshold",
+        type=float,
+        default=0.02,
+        help="Price move after which the remaining placements of a cycle are abandoned (default: 0.02)",
+    )
+
+    parser.add_argument(
+        "--placement-batch-size",
+        type=int,
+        default=10,
+        help="Number of placements waiting on the cancels between two staleness checks, each fetching the price (default: 10)",
+    )
+
+    parser.add_argument(
+        "--heartbeat-timeout",
+        type=float,
+        default=None,
+        help="Time (in seconds) without a completed synchronization after which all orders are cancelled (default: 5 times the sync interval, 0 disables it)",
+    )
+
+    parser.add_argument(
+        "--heartbeat-interval",
+        type=float,
+        default=1.0,
+        help="Interval (in seconds) between two heartbeat checks (default: 1)",
+    )
+
+    parser.add_argument(
+        "--max-price-age",
+        type=float,
+        default=60.0,
+        help="Age (in seconds) after which the price feed is stale and all orders are cancelled (default: 60)",
+    )
+
+    parser.add_argument(
+        "--price-sources",
+        type=str,
+        default="clob",
+        help="Comma separated price sources: clob, clob_complement, book, last_trade (default: clob)",
+    )
+
+    parser.add_argument(
+        "--price-aggregation",
+        type=str,
+        default="median",
+        choices=["median", "weighted"],
+        help="Rule combining the price sources (default: median)",
+    )
+
+    parser.add_argument(
+        "--price-timeout",
+        type=float,
+        default=2.0,
+        help="Deadline (in seconds) shared by the price sources of a fetch (default: 2)",
+    )
+
+    parser.add_argument(
+        "--price-cache-ttl",
+        type=float,
+        default=30.0,
+        help="Time (in seconds) a source price is reused when the source fails (default: 30)",
+    )
+
+    parser.add_argument(
+        "--watch-transfers",
+        action="store_true",
+        help="Refresh the balances only when a transfer of the keeper tokens is seen onchain, instead of on every order book refresh",
+    )
+
+    parser.add_argument(
+        "--ws-url",
+        type=str,
+        help="Websocket RPC url used to subscribe to new blocks with --watch-transfers (default: poll the RPC url)",
+    )
+
+    parser.add_argument(
+        "--chain-poll-interval",
+        type=float,
+        default=2.0,
+        help="Interval (in seconds) between two new block polls with --watch-transfers (default: 2)",
+    )
+
     parser.add_argument(
         "--gas-strategy",
         type=str,
         default="web3",
-        help="Gas strategy to be used['fixed', 'station', 'web3']",
+        help="Gas strategy to be used['fixed', 'station', 'web3', 'eip1559']",
     )
 
     parser.add_argument("--gas-station-url", type=str, help="Gas station url")
@@ -58,6 +196,27 @@ def get_args(args) -> dict:
         help="Fixed gas price(gwei) to be used",
     )
 
+    parser.add_argument(
+        "--gas-refresh-interval",
+        type=float,
+        default=5.0,
+        help="Interval (in seconds) between two background gas price refreshes (default: 5)",
+    )
+
+    parser.add_argument(
+        "--gas-ttl",
+        type=float,
+        default=30.0,
+        help="Age (in seconds) after which the cached gas price is refreshed on read (default: 30)",
+    )
+
+    parser.add_argument(
+        "--gas-max-age",
+        type=float,
+        default=300.0,
+        help="Age (in seconds) after which the cached gas price is replaced by the fixed gas price (default: 300)",
+    )
+
     parser.add_argument(
         "--metrics-server-port",
         type=int,
@@ -65,6 +224,20 @@ def get_args(args) -> dict:
         help="The port where the process must start the metrics server",
     )
 
+    parser.add_argument(
+        "--trace-file",
+        type=str,
+        default=None,
+        help="JSON lines file the tick-to-trade trace events are appended to, see trace_summary",
+    )
+
+    parser.add_argument(
+        "--trace-export-interval",
+        type=float,
+        default=5.0,
+        help="Interval (in seconds) between two exports of the trace events (default: 5)",
+    )
+
     parser.add_argument(
         "--condition-id",
         type=str,
@@ -86,4 +259,10 @@ def get_args(args) -> dict:
         help="Strategy configuration file path",
     )
 
+    parser.add_argument(
+        "--watch-strategy-config",
+        action="store_true",
+        help="Reload the strategy config between synchronizations when the file changes (SIGHUP always reloads it)",
+    )
+
     return parser.parse_args(args)
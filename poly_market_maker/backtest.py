@@ -0,0 +1,562 @@
+"""
+Replay a midpoint history, and optionally a trade history, through the StrategyManager with
+simulated fills and balances, to evaluate a strategy offline.
+
+The price files are CSVs with a `timestamp` (in seconds) and a `price` column of Token.A, the
+trade files have an additional `size` column.
+
+Usage:
+    python -m poly_market_maker.backtest --strategy amm --strategy-config config/amm.json \
+        --prices prices.csv [--trades trades.csv] [--output series.csv]
+"""
+
+import argparse
+import bisect
+import csv
+import json
+import logging
+import math
+import sys
+import time
+from array import array
+
+from poly_market_maker.constants import PRICE_SCALE
+from poly_market_maker.fixed_point import to_units, from_units, cost_units
+from poly_market_maker.order import Order, Side
+from poly_market_maker.orderbook import OrderBook
+from poly_market_maker.price_feed import PriceFeed
+from poly_market_maker.strategy import StrategyManager
+from poly_market_maker.token import Token, Collateral
+
+SERIES_COLUMNS = [
+    "time",
+    "mid",
+    "collateral",
+    "token_a",
+    "token_b",
+    "inventory",
+    "pnl",
+    "open_orders",
+    "orders_placed",
+    "orders_cancelled",
+    "fills",
+]
+
+
+class Series:
+    """Time series held in parallel arrays.
+
+    Attributes:
+        -times: Timestamps, in seconds.
+        -prices: Prices of Token.A.
+        -sizes: Trade sizes, `None` for a midpoint series.
+    """
+
+    def __init__(self, times: array, prices: array, sizes: array = None):
+        assert len(times) == len(prices)
+        assert sizes is None or len(sizes) == len(times)
+
+        self.times = times
+        self.prices = prices
+        self.sizes = sizes
+
+    def __len__(self):
+        return len(self.times)
+
+    def index_after(self, timestamp: float, lo: int = 0) -> int:
+        """Index of the first point strictly after `timestamp`"""
+        return bisect.bisect_right(self.times, timestamp, lo)
+
+    @classmethod
+    def read_csv(cls, path: str, with_sizes: bool = False):
+        (times, prices) = (array("d"), array("d"))
+        sizes = array("d") if with_sizes else None
+        with open(path, newline="") as fh:
+            reader = csv.reader(fh)
+            header = next(reader)
+            time_column = header.index("timestamp")
+            price_column = header.index("price")
+            size_column = header.index("size") if with_sizes else None
+            for row in reader:
+                if len(row) == 0:
+                    continue
+                times.append(float(row[time_column]))
+                prices.append(float(row[price_column]))
+                if with_sizes:
+                    sizes.append(float(row[size_column]))
+
+        if any(times[i] > times[i + 1] for i in range(len(times) - 1)):
+            raise Exception(f"The timestamps of {path} are not sorted")
+        return cls(times, prices, sizes)
+
+
+class ReplayPriceFeed(PriceFeed):
+    """Serves the midpoint of the replay, set by the backtest before every cycle"""
+
+    def __init__(self):
+        super().__init__()
+        self.price = None
+
+    def set_price(self, price: float):
+        self.price = price
+        self._record_update(Token.A, price)
+
+    def get_price(self, token: Token) -> float:
+        if self.price is None or token == Token.A:
+            return self.price
+        return 1 - self.price
+
+
+def _bid_ticks(order: Order):
+    """
+    The order as a quote on Token.A: buying B is selling A at the complement price.
+    Returns (`True` for a bid, price in ticks).
+    """
+    if order.token == Token.A:
+        return (order.side == Side.BUY, order.price_ticks)
+    return (order.side == Side.SELL, PRICE_SCALE - order.price_ticks)
+
+
+class FillModel:
+    """Decides which resting orders fill during the segment of the replay between two cycles"""
+
+    def fills(
+        self, orders: list[Order], mids: array, trade_prices: array, trade_sizes: array
+    ) -> list[tuple[Order, int]]:
+        """Returns the (order, filled size in units) of the orders which filled"""
+        raise NotImplementedError
+
+
+class CrossingFillModel(FillModel):
+    """An order fills in full when the midpoint goes through its price.
+
+    Attributes:
+        touch: Fill the orders when the midpoint only reaches their price.
+    """
+
+    def __init__(self, touch: bool = False):
+        self.touch = touch
+
+    def fills(self, orders, mids, trade_prices, trade_sizes):
+        if len(mids) == 0 or len(orders) == 0:
+            return []
+
+        low = round(min(mids) * PRICE_SCALE, 6)
+        high = round(max(mids) * PRICE_SCALE, 6)
+        fills = []
+        for order in orders:
+            (is_bid, ticks) = _bid_ticks(order)
+            if is_bid:
+                filled = low <= ticks if self.touch else low < ticks
+            else:
+                filled = high >= ticks if self.touch else high > ticks
+            if filled:
+                fills.append((order, order.size_units))
+        return fills
+
+
+class TradeFillModel(FillModel):
+    """A trade fills the resting orders at its price or better, best price first, up to its size.
+
+    Attributes:
+        participation: Share of the size of every trade the keeper orders can fill, for the
+            orders of other makers queued ahead.
+    """
+
+    def __init__(self, participation: float = 1.0):
+        assert 0 < participation <= 1
+        self.participation = participation
+
+    def fills(self, orders, mids, trade_prices, trade_sizes):
+        if len(trade_prices) == 0 or len(orders) == 0:
+            return []
+
+        bids = []
+        asks = []
+        for order in orders:
+            (is_bid, ticks) = _bid_ticks(order)
+            (bids if is_bid else asks).append((ticks, order))
+        bids.sort(key=lambda quote: -quote[0])
+        asks.sort(key=lambda quote: quote[0])
+
+        # most segments don't trade through any order
+        best_bid = bids[0][0] if bids else -1
+        best_ask = asks[0][0] if asks else PRICE_SCALE + 1
+        if (
+            round(min(trade_prices) * PRICE_SCALE, 6) > best_bid
+            and round(max(trade_prices) * PRICE_SCALE, 6) < best_ask
+        ):
+            return []
+
+        filled = {}
+        (bid_index, ask_index) = (0, 0)
+        for price, size in zip(trade_prices, trade_sizes):
+            ticks = round(price * PRICE_SCALE, 6)
+            available = to_units(size * self.participation)
+            while available > 0:
+                if bid_index < len(bids) and ticks <= bids[bid_index][0]:
+                    (quotes, index) = (bids, bid_index)
+                elif ask_index < len(asks) and ticks >= asks[ask_index][0]:
+                    (quotes, index) = (asks, ask_index)
+                else:
+                    break
+
+                order = quotes[index][1]
+                fill = min(order.size_units - filled.get(order.id, 0), available)
+                filled[order.id] = filled.get(order.id, 0) + fill
+                available -= fill
+                if filled[order.id] == order.size_units:
+                    if quotes is bids:
+                        bid_index += 1
+                    else:
+                        ask_index += 1
+
+        return [
+            (order, filled[order.id]) for order in orders if filled.get(order.id, 0) > 0
+        ]
+
+
+class SimulatedOrderBookManager:
+    """In-memory, synchronous stand-in of the OrderBookManager, with simulated balances.
+
+    Placements which need more collateral or tokens than the balance not locked by the open
+    orders are rejected, as the CLOB does. Orders fill at their own price.
+
+    Attributes:
+        balances: Balances of collateral and tokens, in units.
+        orders: Open orders by id.
+        placed: Number of orders placed.
+        cancelled: Number of orders cancelled.
+        rejected: Number of placements rejected for lack of balance.
+        fills: Number of (partial) fills.
+        volume: Filled size, in units.
+    """
+
+    def __init__(self, balances: dict):
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        assert set(balances) == {Collateral, Token.A, Token.B}
+
+        self.balances = {
+            asset: to_units(balance) for (asset, balance) in balances.items()
+        }
+        self.locked = {asset: 0 for asset in self.balances}
+        self.orders = {}
+        self.placed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.fills = 0
+        self.volume = 0
+
+    @staticmethod
+    def _lock(order: Order) -> tuple:
+        """The (asset, units) an open order locks"""
+        if order.side == Side.BUY:
+            return (Collateral, cost_units(order.size_units, order.price_ticks))
+        return (order.token, order.size_units)
+
+    def get_order_book(self) -> OrderBook:
+        return OrderBook(
+            orders=list(self.orders.values()),
+            balances={
+                asset: from_units(balance) for (asset, balance) in self.balances.items()
+            },
+            orders_being_placed=False,
+            orders_being_cancelled=False,
+        )
+
+    def place_orders(self, orders: list[Order]):
+        for order in orders:
+            (asset, units) = self._lock(order)
+            if self.locked[asset] + units > self.balances[asset]:
+                self.logger.debug(f"Rejecting {order}, not enough {asset}")
+                self.rejected += 1
+                continue
+
+            self.placed += 1
+            order = order.with_id(f"sim-{self.placed}")
+            self.orders[order.id] = order
+            self.locked[asset] += units
+
+    def cancel_orders(self, orders: list[Order]):
+        for order in orders:
+            order = self.orders.pop(order.id, None)
+            if order is not None:
+                (asset, units) = self._lock(order)
+                self.locked[asset] -= units
+                self.cancelled += 1
+
+    def cancel_and_place_orders(
+        self, orders_to_cancel: list[Order], orders_to_place: list[Order]
+    ):
+        self.cancel_orders(orders_to_cancel)
+        self.place_orders(orders_to_place)
+
+    def fill(self, order: Order, size_units: int):
+        """Fill `size_units` of an open order at its price"""
+        (asset, locked_units) = self._lock(order)
+        remaining = Order.from_ticks(
+            order.size_units - size_units,
+            order.price_ticks,
+            order.side,
+            order.token,
+            order.id,
+        )
+        if remaining.size_units > 0:
+            self.orders[order.id] = remaining
+            released = locked_units - self._lock(remaining)[1]
+        else:
+            del self.orders[order.id]
+            released = locked_units
+        self.locked[asset] -= released
+
+        if order.side == Side.BUY:
+            self.balances[Collateral] -= released
+            self.balances[order.token] += size_units
+        else:
+            self.balances[order.token] -= size_units
+            self.balances[Collateral] += size_units * order.price_ticks // PRICE_SCALE
+
+        self.fills += 1
+        self.volume += size_units
+
+
+class Backtest:
+    """Replays a price history through a StrategyManager.
+
+    The strategy runs every `sync_interval` seconds of the replay, at the last midpoint, as the
+    keeper does. Between two cycles the resting orders fill according to the fill model, from
+    the midpoints or the trades of the segment. The fills of a segment are visible to the
+    strategy at the next cycle.
+
+    A cycle is skipped when its inputs are those of the previous cycle, which placed and
+    cancelled nothing: same midpoint tick, no fill in between. The strategies are deterministic,
+    so it would do nothing either. A cycle raising an exception is counted as failed, and the
+    replay goes on.
+
+    Attributes:
+        sync_interval: Time (in seconds) between two cycles.
+        fill_model: Fill model of the resting orders.
+    """
+
+    def __init__(
+        self,
+        strategy: str,
+        config_path: str,
+        balances: dict,
+        sync_interval: float = 30.0,
+        fill_model: FillModel = None,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        assert isinstance(sync_interval, (int, float)) and sync_interval > 0
+        assert fill_model is None or isinstance(fill_model, FillModel)
+
+        self.sync_interval = sync_interval
+        self.fill_model = fill_model if fill_model is not None else CrossingFillModel()
+
+        self.price_feed = ReplayPriceFeed()
+        self.order_book_manager = SimulatedOrderBookManager(balances)
+        self.strategy_manager = StrategyManager(
+            strategy, config_path, self.price_feed, self.order_book_manager
+        )
+
+    def run(self, prices: Series, trades: Series = None) -> dict:
+        """
+        Replay the midpoints, and the trades if given.
+
+        Returns:
+            The summary of the run, with the per cycle time series under `series`.
+        """
+        assert len(prices) > 0
+
+        manager = self.order_book_manager
+        series = {column: array("d") for column in SERIES_COLUMNS}
+        initial_equity = None
+        (cycles, cycles_run, cycles_failed) = (0, 0, 0)
+        last_inputs = None
+        start_time = time.monotonic()
+
+        start = prices.times[0]
+        cycle_index = 0
+        (tick, trade) = (0, 0)
+        while tick < len(prices):
+            cycle_time = start + cycle_index * self.sync_interval
+            segment_end = cycle_time + self.sync_interval
+
+            # the midpoint at the cycle is the last one at or before it
+            tick = prices.index_after(cycle_time, tick)
+            mid = prices.prices[tick - 1]
+            equity = (
+                from_units(manager.balances[Collateral])
+                + from_units(manager.balances[Token.A]) * mid
+                + from_units(manager.balances[Token.B]) * (1 - mid)
+            )
+            if initial_equity is None:
+                initial_equity = equity
+
+            inputs = (round(mid * PRICE_SCALE), manager.fills)
+            if inputs != last_inputs:
+                actions = manager.placed + manager.cancelled
+                self.price_feed.set_price(mid)
+                try:
+                    self.strategy_manager.synchronize()
+                except Exception as e:
+                    # as in the keeper, a failed cycle doesn't stop the next ones
+                    self.logger.error(f"Cycle at {cycle_time} failed: {e}")
+                    cycles_failed += 1
+                cycles_run += 1
+                # a cycle which acted changes the inputs of the next one, rejected
+                # placements don't
+                idle = manager.placed + manager.cancelled == actions
+                last_inputs = inputs if idle else None
+            cycles += 1
+
+            for column, value in zip(
+                SERIES_COLUMNS,
+                (
+                    cycle_time,
+                    mid,
+                    from_units(manager.balances[Collateral]),
+                    from_units(manager.balances[Token.A]),
+                    from_units(manager.balances[Token.B]),
+                    from_units(manager.balances[Token.A] - manager.balances[Token.B]),
+                    equity - initial_equity,
+                    len(manager.orders),
+                    manager.placed,
+                    manager.cancelled,
+                    manager.fills,
+                ),
+            ):
+                series[column].append(value)
+
+            # fills of the segment up to the next cycle
+            tick_end = prices.index_after(segment_end, tick)
+            trade_prices = trade_sizes = array("d")
+            if trades is not None:
+                trade = trades.index_after(cycle_time, trade)
+                trade_end = trades.index_after(segment_end, trade)
+                trade_prices = trades.prices[trade:trade_end]
+                trade_sizes = trades.sizes[trade:trade_end]
+            for order, size_units in self.fill_model.fills(
+                list(manager.orders.values()),
+                prices.prices[tick:tick_end],
+                trade_prices,
+                trade_sizes,
+            ):
+                manager.fill(order, size_units)
+
+            cycle_index += 1
+            # jump over the gaps of the history when nothing can change
+            if tick_end == tick and last_inputs is not None and tick < len(prices):
+                next_cycle = math.floor(
+                    (prices.times[tick] - start) / self.sync_interval
+                )
+                if trades is not None and trade_end < len(trades):
+                    # up to the cycle whose segment holds the next trade
+                    next_cycle = min(
+                        next_cycle,
+                        math.ceil(
+                            (trades.times[trade_end] - start) / self.sync_interval
+                        )
+                        - 1,
+                    )
+                cycle_index = max(cycle_index, next_cycle)
+
+        elapsed = time.monotonic() - start_time
+        return {
+            "ticks": len(prices),
+            "trades": len(trades) if trades is not None else 0,
+            "cycles": cycles,
+            "cycles_run": cycles_run,
+            "cycles_failed": cycles_failed,
+            "orders_placed": manager.placed,
+            "orders_cancelled": manager.cancelled,
+            "orders_rejected": manager.rejected,
+            "fills": manager.fills,
+            "volume": from_units(manager.volume),
+            "pnl": series["pnl"][-1],
+            "max_drawdown": max_drawdown(series["pnl"]),
+            "inventory": series["inventory"][-1],
+            "elapsed": elapsed,
+            "ticks_per_second": len(prices) / elapsed if elapsed > 0 else None,
+            "series": series,
+        }
+
+
+def max_drawdown(pnl: array) -> float:
+    """Largest drop of the PnL from a previous high"""
+    (high, drawdown) = (0.0, 0.0)
+    for value in pnl:
+        high = max(high, value)
+        drawdown = max(drawdown, high - value)
+    return drawdown
+
+
+def write_series(path: str, series: dict):
+    with open(path, "w", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(SERIES_COLUMNS)
+        writer.writerows(zip(*(series[column] for column in SERIES_COLUMNS)))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="backtest", description=__doc__)
+    parser.add_argument("--strategy", type=str, required=True)
+    parser.add_argument("--strategy-config", type=str, required=True)
+    parser.add_argument("--prices", type=str, required=True, help="Midpoint CSV")
+    parser.add_argument("--trades", type=str, help="Trade CSV, fills from the trades")
+    parser.add_argument(
+        "--sync-interval",
+        type=float,
+        default=30.0,
+        help="Seconds of the replay between two cycles (default: 30)",
+    )
+    parser.add_argument("--collateral", type=float, default=1000.0)
+    parser.add_argument("--token-a", type=float, default=0.0)
+    parser.add_argument("--token-b", type=float, default=0.0)
+    parser.add_argument(
+        "--touch",
+        action="store_true",
+        help="Without trades, fill the orders the midpoint reaches, not only those it goes through",
+    )
+    parser.add_argument(
+        "--participation",
+        type=float,
+        default=1.0,
+        help="With trades, share of every trade the keeper orders can fill (default: 1.0)",
+    )
+    parser.add_argument("--output", type=str, help="Write the time series to this CSV")
+    args = parser.parse_args(args)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    prices = Series.read_csv(args.prices)
+    trades = None
+    if args.trades is not None:
+        trades = Series.read_csv(args.trades, with_sizes=True)
+        fill_model = TradeFillModel(args.participation)
+    else:
+        fill_model = CrossingFillModel(args.touch)
+
+    backtest = Backtest(
+        args.strategy,
+        args.strategy_config,
+        {
+            Collateral: args.collateral,
+            Token.A: args.token_a,
+            Token.B: args.token_b,
+        },
+        sync_interval=args.sync_interval,
+        fill_model=fill_model,
+    )
+    result = backtest.run(prices, trades)
+
+    series = result.pop("series")
+    if args.output is not None:
+        write_series(args.output, series)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
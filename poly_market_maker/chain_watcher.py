@@ -0,0 +1,198 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Callable
+
+import websockets
+from web3 import Web3
+
+from poly_market_maker.metrics import chain_requests_counter
+
+# Transfer(address indexed from, address indexed to, uint256 value)
+TRANSFER_TOPIC = (
+    "0x" + bytes(Web3.keccak(text="Transfer(address,address,uint256)")).hex()
+)
+# TransferSingle(address indexed operator, address indexed from, address indexed to, uint256 id, uint256 value)
+TRANSFER_SINGLE_TOPIC = (
+    "0x"
+    + bytes(
+        Web3.keccak(text="TransferSingle(address,address,address,uint256,uint256)")
+    ).hex()
+)
+# TransferBatch(address indexed operator, address indexed from, address indexed to, uint256[] ids, uint256[] values)
+TRANSFER_BATCH_TOPIC = (
+    "0x"
+    + bytes(
+        Web3.keccak(text="TransferBatch(address,address,address,uint256[],uint256[])")
+    ).hex()
+)
+
+
+def _address_topic(address: str) -> str:
+    return "0x" + address[2:].lower().rjust(64, "0")
+
+
+class ChainWatcher:
+    """
+    Watches new blocks for the ERC20 Transfer and ERC1155 TransferSingle/TransferBatch logs
+    involving an address, and reports them to a callback.
+
+    New heads come from an eth_subscribe websocket subscription when a websocket url is
+    configured, or from polling eth_blockNumber otherwise (and whenever the websocket fails).
+    Either way the logs of the new blocks are fetched over w3 with eth_getLogs.
+
+    Attributes:
+        w3: Web3 instance used to fetch the block number and the logs.
+        address: The watched holder address.
+        erc20_addresses: ERC20 token contracts to watch.
+        erc1155_addresses: ERC1155 token contracts to watch.
+        on_transfer: Called with the list of matching logs of every scanned block range.
+        ws_url: Optional websocket RPC url for the newHeads subscription.
+        poll_interval: Interval (in seconds) between two block number polls.
+    """
+
+    def __init__(
+        self,
+        w3: Web3,
+        address: str,
+        erc20_addresses: list[str],
+        erc1155_addresses: list[str],
+        on_transfer: Callable[[list], None],
+        ws_url: str = None,
+        poll_interval: float = 2.0,
+    ):
+        assert isinstance(address, str)
+        assert isinstance(erc20_addresses, list)
+        assert isinstance(erc1155_addresses, list)
+        assert callable(on_transfer)
+
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.w3 = w3
+        self.address = address
+        self.on_transfer = on_transfer
+        self.ws_url = ws_url
+        self.poll_interval = poll_interval
+
+        holder = _address_topic(address)
+        # topics are ANDed by position, so the sender and the recipient need one filter each
+        self.filters = []
+        if len(erc20_addresses) > 0:
+            self.filters += [
+                {"address": erc20_addresses, "topics": [TRANSFER_TOPIC, holder]},
+                {"address": erc20_addresses, "topics": [TRANSFER_TOPIC, None, holder]},
+            ]
+        if len(erc1155_addresses) > 0:
+            erc1155_topics = [TRANSFER_SINGLE_TOPIC, TRANSFER_BATCH_TOPIC]
+            self.filters += [
+                {
+                    "address": erc1155_addresses,
+                    "topics": [erc1155_topics, None, holder],
+                },
+                {
+                    "address": erc1155_addresses,
+                    "topics": [erc1155_topics, None, None, holder],
+                },
+            ]
+
+        self.last_block = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Start watching from the current block in a background thread"""
+        self.last_block = self.w3.eth.block_number
+        threading.Thread(target=self._thread_watch, daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def scan(self, to_block: int = None) -> list:
+        """
+        Fetch the matching logs of the blocks after the last scanned block, up to to_block
+        (default: the latest block), and report them to on_transfer if any.
+        """
+        with self._lock:
+            if to_block is None:
+                to_block = self.w3.eth.block_number
+            if self.last_block is not None and to_block <= self.last_block:
+                return []
+            from_block = (
+                self.last_block + 1 if self.last_block is not None else to_block
+            )
+
+            try:
+                logs = []
+                for log_filter in self.filters:
+                    logs += self.w3.eth.get_logs(
+                        {**log_filter, "fromBlock": from_block, "toBlock": to_block}
+                    )
+                chain_requests_counter.labels(method="get_logs", status="ok").inc()
+            except Exception as e:
+                self.logger.error(f"Error get_logs: {e}")
+                chain_requests_counter.labels(method="get_logs", status="error").inc()
+                raise e
+
+            self.last_block = to_block
+
+        if len(logs) > 0:
+            self.logger.debug(
+                f"{len(logs)} transfer(s) in blocks {from_block} to {to_block}"
+            )
+            self.on_transfer(logs)
+        return logs
+
+    def _thread_watch(self):
+        while not self._stopped.is_set():
+            if self.ws_url is not None:
+                try:
+                    asyncio.run(self._subscribe_new_heads())
+                except Exception as e:
+                    self.logger.error(
+                        f"Websocket subscription failed, polling for new blocks: {e}"
+                    )
+            self._poll_new_heads()
+
+    def _poll_new_heads(self):
+        """Poll for new blocks, for a while only if a websocket url is configured"""
+        deadline = time.monotonic() + 30 * self.poll_interval
+        while not self._stopped.is_set():
+            try:
+                self.scan()
+            except Exception as e:
+                self.logger.error(f"Failed to scan new blocks: {e}")
+            if self.ws_url is not None and time.monotonic() > deadline:
+                return
+            self._stopped.wait(self.poll_interval)
+
+    async def _subscribe_new_heads(self):
+        async with websockets.connect(self.ws_url) as ws:
+            await ws.send(
+                json.dumps(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": 1,
+                        "method": "eth_subscribe",
+                        "params": ["newHeads"],
+                    }
+                )
+            )
+            response = json.loads(await ws.recv())
+            if "error" in response:
+                raise Exception(response["error"])
+            self.logger.info(f"Subscribed to new heads on {self.ws_url}")
+
+            # blocks mined while not subscribed
+            await asyncio.to_thread(self.scan)
+
+            while not self._stopped.is_set():
+                try:
+                    message = json.loads(
+                        await asyncio.wait_for(ws.recv(), timeout=self.poll_interval)
+                    )
+                except asyncio.TimeoutError:
+                    continue
+                head = message.get("params", {}).get("result", {})
+                if "number" in head:
+                    await asyncio.to_thread(self.scan, int(head["number"], 16))
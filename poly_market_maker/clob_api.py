@@ -1,20 +1,39 @@
+import json
 import logging
+import os
 import sys
 import time
+from eth_account import Account
 from py_clob_client.client import ClobClient, ApiCreds, OrderArgs, FilterParams
 from py_clob_client.exceptions import PolyApiException
 
-from poly_market_maker.utils import randomize_default_price
 from poly_market_maker.constants import OK
 from poly_market_maker.metrics import clob_requests_latency
-
-DEFAULT_PRICE = 0.5
+from poly_market_maker.tracing import trace
 
 
 class ClobApi:
-    def __init__(self, host, chain_id, private_key):
+    def __init__(self, host, chain_id, private_key, creds_path: str = None):
         self.logger = logging.getLogger(self.__class__.__name__)
 
+        # with cached api credentials, the L1 client and the key derivation are skipped
+        creds_key = f"{host}|{chain_id}|{Account.from_key(private_key).address}"
+        api_creds = self._load_api_creds(creds_path, creds_key)
+
+        if api_creds is not None:
+            self.client = self._init_client_L2(
+                host=host,
+                chain_id=chain_id,
+                private_key=private_key,
+                creds=api_creds,
+            )
+            if self._api_creds_valid():
+                return
+
+            # the key was revoked or rotated since it was cached
+            self.logger.warning("Cached api key rejected, deriving it again...")
+            self._drop_api_creds(creds_path, creds_key)
+
         self.client = self._init_client_L1(
             host=host,
             chain_id=chain_id,
@@ -29,6 +48,8 @@ class ClobApi:
             api_creds = self.client.create_api_key()
             self.logger.debug(f"Api key created: {api_creds.api_key}.")
 
+        self._save_api_creds(creds_path, creds_key, api_creds)
+
         self.client = self._init_client_L2(
             host=host,
             chain_id=chain_id,
@@ -45,12 +66,12 @@ class ClobApi:
     def get_conditional_address(self):
         return self.client.get_conditional_address()
 
-    def get_exchange(self, neg_risk = False):
+    def get_exchange(self, neg_risk=False):
         return self.client.get_exchange_address(neg_risk)
 
     def get_price(self, token_id: int) -> float:
         """
-        Get the current price on the orderbook
+        Get the current price on the orderbook, `None` if it could not be fetched
         """
         self.logger.debug("Fetching midpoint price from the API...")
         start_time = time.time()
@@ -67,14 +88,55 @@ class ClobApi:
                 (time.time() - start_time)
             )
 
-        return self._rand_price()
+        return None
 
-    def _rand_price(self) -> float:
-        price = randomize_default_price(DEFAULT_PRICE)
-        self.logger.info(
-            f"Could not fetch price from CLOB API, returning random price: {price}"
-        )
-        return price
+    def get_last_trade_price(self, token_id: int) -> float:
+        """
+        Get the price of the last trade, `None` if it could not be fetched
+        """
+        self.logger.debug("Fetching last trade price from the API...")
+        start_time = time.time()
+        try:
+            resp = self.client.get_last_trade_price(token_id)
+            clob_requests_latency.labels(
+                method="get_last_trade_price", status="ok"
+            ).observe((time.time() - start_time))
+            if resp.get("price") is not None:
+                return float(resp.get("price"))
+        except Exception as e:
+            self.logger.error(f"Error fetching last trade price from the CLOB API: {e}")
+            clob_requests_latency.labels(
+                method="get_last_trade_price", status="error"
+            ).observe((time.time() - start_time))
+
+        return None
+
+    def get_order_book(self, token_id: int) -> dict:
+        """
+        Get the bids and asks on the orderbook as lists of (price, size), `None` if it could not be fetched
+        """
+        self.logger.debug("Fetching order book from the API...")
+        start_time = time.time()
+        try:
+            resp = self.client.get_order_book(token_id)
+            clob_requests_latency.labels(method="get_order_book", status="ok").observe(
+                (time.time() - start_time)
+            )
+            return {
+                "bids": [
+                    (float(level.price), float(level.size)) for level in resp.bids or []
+                ],
+                "asks": [
+                    (float(level.price), float(level.size)) for level in resp.asks or []
+                ],
+            }
+        except Exception as e:
+            self.logger.error(f"Error fetching order book from the CLOB API: {e}")
+            clob_requests_latency.labels(
+                method="get_order_book", status="error"
+            ).observe((time.time() - start_time))
+
+        return None
 
     def get_orders(self, condition_id: str):
         """
@@ -116,6 +178,7 @@ class ClobApi:
             order_id = None
             if resp and resp.get("success") and resp.get("orderID"):
                 order_id = resp.get("orderID")
+                trace("order_acked", order_id=order_id)
                 self.logger.info(
                     f"Succesfully placed new order: Order[id={order_id},price={price},size={size},side={side},tokenID={token_id}]!"
                 )
@@ -168,6 +231,76 @@ class ClobApi:
             )
         return False
 
+    def _load_api_creds(self, creds_path: str, creds_key: str) -> ApiCreds:
+        if creds_path is None:
+            return None
+        try:
+            with open(creds_path) as f:
+                creds = json.load(f).get(creds_key)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable api credentials cache: {e}")
+            return None
+
+        if creds is None:
+            return None
+        self.logger.debug(f"Api key loaded from cache: {creds['api_key']}")
+        return ApiCreds(
+            api_key=creds["api_key"],
+            api_secret=creds["api_secret"],
+            api_passphrase=creds["api_passphrase"],
+        )
+
+    def _api_creds_valid(self) -> bool:
+        """Probe the api key with an authenticated request, only an auth error invalidates it"""
+        try:
+            self.client.get_api_keys()
+        except PolyApiException as e:
+            if e.status_code in (401, 403):
+                return False
+            self.logger.warning(f"Unable to check the cached api key: {e}")
+        except Exception as e:
+            self.logger.warning(f"Unable to check the cached api key: {e}")
+        return True
+
+    def _save_api_creds(self, creds_path: str, creds_key: str, api_creds: ApiCreds):
+        if creds_path is None:
+            return
+        self._write_api_creds(
+            creds_path,
+            creds_key,
+            {
+                "api_key": api_creds.api_key,
+                "api_secret": api_creds.api_secret,
+                "api_passphrase": api_creds.api_passphrase,
+            },
+        )
+
+    def _drop_api_creds(self, creds_path: str, creds_key: str):
+        self._write_api_creds(creds_path, creds_key, None)
+
+    def _write_api_creds(self, creds_path: str, creds_key: str, creds: dict):
+        """Set (or remove, when `creds` is `None`) the credentials of a key in the cache"""
+        try:
+            try:
+                with open(creds_path) as f:
+                    all_creds = json.load(f)
+            except FileNotFoundError:
+                all_creds = {}
+            if creds is None:
+                all_creds.pop(creds_key, None)
+            else:
+                all_creds[creds_key] = creds
+
+            os.makedirs(os.path.dirname(creds_path) or ".", exist_ok=True)
+            # readable by the owner only, as it holds the api secret
+            fd = os.open(creds_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(all_creds, f)
+        except Exception as e:
+            self.logger.warning(f"Unable to cache the api credentials: {e}")
+
     def _init_client_L1(
         self,
         host,
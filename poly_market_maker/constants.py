@@ -3,3 +3,7 @@ MIN_TICK = 0.01
 MIN_PRICE = 1.0
 MIN_SIZE = 15.0
 MAX_DECIMALS = 2
+
+# fixed point scales: prices are integer ticks of MIN_TICK, sizes are integer micro-units
+PRICE_SCALE = round(1 / MIN_TICK)
+SIZE_SCALE = 10**6
@@ -1,13 +1,17 @@
 import logging
 import web3
 import web3.constants
+from eth_utils import from_wei
 
 from poly_market_maker.gas import GasStation
+from poly_market_maker.market import Market
+from poly_market_maker.transactions import TransactionPipeline
 from poly_market_maker.metrics import chain_requests_counter
 
 
 erc20_balance_of = """[{"constant": true,"inputs": [{"name": "_owner","type": "address"}],"name": "balanceOf","outputs": [{"name": "balance","type": "uint256"}],"payable": false,"stateMutability": "view","type": "function"}]"""
 erc1155_balance_of = """[{"inputs": [{"internalType": "address","name": "account","type": "address"},{"internalType": "uint256","name": "id","type": "uint256"}],"name": "balanceOf","outputs": [{"internalType": "uint256","name": "","type": "uint256"}],"stateMutability": "view","type": "function"}]"""
+erc1155_balance_of_batch = """[{"inputs": [{"internalType": "address[]","name": "accounts","type": "address[]"},{"internalType": "uint256[]","name": "ids","type": "uint256[]"}],"name": "balanceOfBatch","outputs": [{"internalType": "uint256[]","name": "","type": "uint256[]"}],"stateMutability": "view","type": "function"}]"""
 
 erc20_approve = """[{"constant": false,"inputs": [{"name": "_spender","type": "address" },{ "name": "_value", "type": "uint256" }],"name": "approve","outputs": [{ "name": "", "type": "bool" }],"payable": false,"stateMutability": "nonpayable","type": "function"}]"""
 erc1155_set_approval = """[{"inputs": [{ "internalType": "address", "name": "operator", "type": "address" },{ "internalType": "bool", "name": "approved", "type": "bool" }],"name": "setApprovalForAll","outputs": [],"stateMutability": "nonpayable","type": "function"}]"""
@@ -15,17 +19,158 @@ erc1155_set_approval = """[{"inputs": [{ "internalType": "address", "name": "ope
 erc20_allowance = """[{"constant": true,"inputs": [{"name": "_owner","type": "address"},{"name": "_spender","type": "address"}],"name": "allowance","outputs": [{"name": "","type": "uint256"}],"payable": false,"stateMutability": "view","type": "function"}]"""
 erc1155_is_approved_for_all = """[{"inputs": [{"internalType": "address","name": "account","type": "address"},{"internalType": "address","name": "operator","type": "address"}],"name": "isApprovedForAll","outputs": [{"internalType": "bool","name": "","type": "bool"}],"stateMutability": "view","type": "function"}]"""
 
+multicall3_aggregate3 = """[{"inputs": [{"components": [{"internalType": "address","name": "target","type": "address"},{"internalType": "bool","name": "allowFailure","type": "bool"},{"internalType": "bytes","name": "callData","type": "bytes"}],"internalType": "struct Multicall3.Call3[]","name": "calls","type": "tuple[]"}],"name": "aggregate3","outputs": [{"components": [{"internalType": "bool","name": "success","type": "bool"},{"internalType": "bytes","name": "returnData","type": "bytes"}],"internalType": "struct Multicall3.Result[]","name": "returnData","type": "tuple[]"}],"stateMutability": "payable","type": "function"}]"""
+
+# Multicall3 is deployed at the same address on Polygon and most EVM chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+ERC20_BALANCE_OF_SELECTOR = bytes.fromhex("70a08231")  # balanceOf(address)
+ERC1155_BALANCE_OF_SELECTOR = bytes.fromhex("00fdd58e")  # balanceOf(address,uint256)
+GET_ETH_BALANCE_SELECTOR = bytes.fromhex("4d2301cc")  # getEthBalance(address)
+AGGREGATE3_SELECTOR = bytes.fromhex("82ad56cb")  # aggregate3((address,bool,bytes)[])
+
 DECIMALS = 10**6
 
+# max number of ids per balanceOfBatch call, to stay under the RPC gas and response size limits
+BALANCE_OF_BATCH_CHUNK_SIZE = 200
+
+
+def _encode_address(address: str) -> bytes:
+    return bytes.fromhex(address[2:]).rjust(32, b"\x00")
+
+
+def _encode_uint(value: int) -> bytes:
+    return value.to_bytes(32, byteorder="big")
+
+
+def _decode_uint(data: bytes, offset: int) -> int:
+    return int.from_bytes(data[offset : offset + 32], byteorder="big")
+
+
+def encode_aggregate3(calls: list) -> bytes:
+    """
+    ABI encoding of the aggregate3 call data for a list of (target, allow failure, call data)
+    """
+    elements = []
+    for target, allow_failure, call_data in calls:
+        padding = b"\x00" * (-len(call_data) % 32)
+        elements.append(
+            _encode_address(target)
+            + _encode_uint(int(allow_failure))
+            + _encode_uint(96)
+            + _encode_uint(len(call_data))
+            + call_data
+            + padding
+        )
+
+    offsets = []
+    offset = 32 * len(elements)
+    for element in elements:
+        offsets.append(_encode_uint(offset))
+        offset += len(element)
+
+    return (
+        AGGREGATE3_SELECTOR
+        + _encode_uint(32)
+        + _encode_uint(len(elements))
+        + b"".join(offsets)
+        + b"".join(elements)
+    )
+
+
+def decode_aggregate3(data: bytes) -> list:
+    """
+    ABI decoding of the (bool success, bytes return data)[] returned by aggregate3
+    """
+    results = data[_decode_uint(data, 0) :]
+    count = _decode_uint(results, 0)
+    elements = results[32:]
+
+    decoded = []
+    for i in range(count):
+        element = elements[_decode_uint(elements, 32 * i) :]
+        return_data = element[_decode_uint(element, 32) :]
+        decoded.append(
+            (
+                _decode_uint(element, 0) != 0,
+                bytes(return_data[32 : 32 + _decode_uint(return_data, 0)]),
+            )
+        )
+    return decoded
+
 
 class Contracts:
-    def __init__(self, w3: web3.Web3, gas_station: GasStation):
+    def __init__(
+        self,
+        w3: web3.Web3,
+        gas_station: GasStation,
+        multicall_address: str = MULTICALL3_ADDRESS,
+        transactions: TransactionPipeline = None,
+    ):
         self.w3 = w3
         self.gas_station = gas_station
+        self.transactions = transactions
+        self.multicall_address = multicall_address
         self.logger = logging.getLogger(self.__class__.__name__)
 
+        # contract handles keyed by (address, abi), and encoded multicall call data keyed by (holder, tokens)
+        self._contracts = {}
+        self._balance_calls = {}
+
+    def build_handles(self, collateral_address: str, conditional_address: str):
+        """
+        Create the contract handles of the collateral and conditional tokens, at startup
+        rather than on first use
+        """
+        for abi in [erc20_balance_of, erc20_allowance, erc20_approve]:
+            self.contract(collateral_address, abi)
+        for abi in [
+            erc1155_balance_of,
+            erc1155_balance_of_batch,
+            erc1155_is_approved_for_all,
+            erc1155_set_approval,
+        ]:
+            self.contract(conditional_address, abi)
+
+    def contract(self, address: str, abi: str):
+        """
+        Return the cached contract handle for address and abi, creating it on first use
+        """
+        key = (address, abi)
+        contract = self._contracts.get(key)
+        if contract is None:
+            contract = self.w3.eth.contract(address, abi=abi)
+            self._contracts[key] = contract
+        return contract
+
+    def balance_calls(self, address: str, tokens: list) -> str:
+        """
+        Return the cached eth_call data of the aggregate3 call reading the balances of address
+        for tokens and its gas balance, see balances_of
+        """
+        key = (address, tuple(tokens))
+        data = self._balance_calls.get(key)
+        if data is None:
+            holder = _encode_address(address)
+            calls = [
+                (
+                    token,
+                    False,
+                    ERC20_BALANCE_OF_SELECTOR + holder
+                    if token_id is None
+                    else ERC1155_BALANCE_OF_SELECTOR + holder + _encode_uint(token_id),
+                )
+                for (token, token_id) in tokens
+            ]
+            calls.append(
+                (self.multicall_address, False, GET_ETH_BALANCE_SELECTOR + holder)
+            )
+            data = "0x" + encode_aggregate3(calls).hex()
+            self._balance_calls[key] = data
+        return data
+
     def balance_of_erc20(self, token: str, address: str):
-        erc20 = self.w3.eth.contract(token, abi=erc20_balance_of)
+        erc20 = self.contract(token, erc20_balance_of)
         bal = None
 
         try:
@@ -47,7 +192,7 @@ class Contracts:
         assert isinstance(holder_address, str)
         assert isinstance(token_id, int)
 
-        erc1155 = self.w3.eth.contract(erc1155_address, abi=erc1155_balance_of)
+        erc1155 = self.contract(erc1155_address, erc1155_balance_of)
         bal = None
 
         try:
@@ -62,8 +207,72 @@ class Contracts:
 
         return bal
 
+    def balance_of_erc1155_batch(
+        self,
+        erc1155_address: str,
+        holder_address: str,
+        token_ids: list,
+        chunk_size: int = BALANCE_OF_BATCH_CHUNK_SIZE,
+    ) -> list:
+        """
+        Fetch the balances of holder_address for token_ids with balanceOfBatch,
+        in one call per chunk_size token ids
+        """
+        assert isinstance(erc1155_address, str)
+        assert isinstance(holder_address, str)
+        assert isinstance(token_ids, list)
+        assert chunk_size > 0
+
+        erc1155 = self.contract(erc1155_address, erc1155_balance_of_batch)
+        balances = []
+
+        for start in range(0, len(token_ids), chunk_size):
+            chunk = token_ids[start : start + chunk_size]
+            try:
+                balances.extend(
+                    erc1155.functions.balanceOfBatch(
+                        [holder_address] * len(chunk), chunk
+                    ).call()
+                )
+                chain_requests_counter.labels(
+                    method="ERC1155 balanceOfBatch", status="ok"
+                ).inc()
+            except Exception as e:
+                self.logger.error(f"Error ERC1155 balanceOfBatch: {e}")
+                chain_requests_counter.labels(
+                    method="ERC1155 balanceOfBatch", status="error"
+                ).inc()
+                raise e
+
+        return balances
+
+    def position_balances(
+        self, erc1155_address: str, holder_address: str, markets: list[Market]
+    ) -> dict:
+        """
+        Fetch the conditional token balances of holder_address for every market
+
+        Returns:
+            Dict of condition id to the balance of each token of the market.
+        """
+        keys = [
+            (market.condition_id, token, token_id)
+            for market in markets
+            for (token, token_id) in market.token_ids.items()
+        ]
+        balances = self.balance_of_erc1155_batch(
+            erc1155_address,
+            holder_address,
+            [token_id for (_, _, token_id) in keys],
+        )
+
+        position_balances = {market.condition_id: {} for market in markets}
+        for (condition_id, token, _), bal in zip(keys, balances):
+            position_balances[condition_id][token] = float(bal / DECIMALS)
+        return position_balances
+
     def is_approved_erc20(self, token: str, owner: str, spender: str):
-        erc20 = self.w3.eth.contract(token, abi=erc20_allowance)
+        erc20 = self.contract(token, erc20_allowance)
 
         try:
             allowance = erc20.functions.allowance(owner, spender).call()
@@ -76,7 +285,7 @@ class Contracts:
         return allowance > 0
 
     def is_approved_erc1155(self, token: str, owner: str, spender: str):
-        erc1155 = self.w3.eth.contract(token, abi=erc1155_is_approved_for_all)
+        erc1155 = self.contract(token, erc1155_is_approved_for_all)
 
         try:
             approved = erc1155.functions.isApprovedForAll(owner, spender).call()
@@ -92,22 +301,14 @@ class Contracts:
 
     def max_approve_erc20(self, token: str, owner: str, spender: str):
         if not self.is_approved_erc20(token, owner, spender):
-            erc20 = self.w3.eth.contract(token, abi=erc20_approve)
+            erc20 = self.contract(token, erc20_approve)
             self.logger.info(
                 f"Max approving ERC20 token {token} on spender {spender}..."
             )
 
-            try:
-                txn_hash_bytes = erc20.functions.approve(
-                    spender, int(web3.constants.MAX_INT, base=16)
-                ).transact({"gasPrice": self.gas_station.get_gas_price()})
-                chain_requests_counter.labels(method="approve", status="ok").inc()
-            except Exception as e:
-                self.logger.error(f"Error approve: {e}")
-                chain_requests_counter.labels(method="approve", status="error").inc()
-                raise e
-
-            txn_hash_hex = self.w3.toHex(txn_hash_bytes)
+            txn_hash_hex = self._transact(
+                erc20, "approve", [spender, int(web3.constants.MAX_INT, base=16)]
+            )
             self.logger.info(f"ERC20 approve transaction hash: {txn_hash_hex}")
             return txn_hash_hex
 
@@ -116,26 +317,39 @@ class Contracts:
             self.logger.info(
                 f"Max approving ERC1155 token {token} on spender {spender}..."
             )
-            erc1155 = self.w3.eth.contract(token, abi=erc1155_set_approval)
+            erc1155 = self.contract(token, erc1155_set_approval)
 
-            try:
-                txn_hash_bytes = erc1155.functions.setApprovalForAll(
-                    spender, True
-                ).transact({"gasPrice": self.gas_station.get_gas_price()})
-                chain_requests_counter.labels(
-                    method="setApprovalForAll", status="ok"
-                ).inc()
-            except Exception as e:
-                self.logger.error(f"Error setApprovalForAll: {e}")
-                chain_requests_counter.labels(
-                    method="setApprovalForAll", status="error"
-                ).inc()
-                raise e
-
-            txn_hash_hex = self.w3.toHex(txn_hash_bytes)
+            txn_hash_hex = self._transact(erc1155, "setApprovalForAll", [spender, True])
             self.logger.info(f"ERC1155 approve transaction hash: {txn_hash_hex}")
             return txn_hash_hex
 
+    def _transact(self, contract, method: str, args: list) -> str:
+        """
+        Send the contract call, through the transaction pipeline if configured so that it
+        doesn't wait for the previous transactions, and return the transaction hash
+        """
+        try:
+            if self.transactions is not None:
+                txn_hash_hex = self.transactions.send(
+                    {
+                        "to": contract.address,
+                        "data": contract.encodeABI(fn_name=method, args=args),
+                    }
+                ).tx_hash
+            else:
+                txn_hash_hex = self.w3.toHex(
+                    getattr(contract.functions, method)(*args).transact(
+                        self.gas_station.get_fees()
+                    )
+                )
+            chain_requests_counter.labels(method=method, status="ok").inc()
+        except Exception as e:
+            self.logger.error(f"Error {method}: {e}")
+            chain_requests_counter.labels(method=method, status="error").inc()
+            raise e
+
+        return txn_hash_hex
+
     def token_balance_of(self, token: str, address: str, token_id=None):
         if token_id is None:
             bal = self.balance_of_erc20(token, address)
@@ -143,6 +357,38 @@ class Contracts:
             bal = self.balance_of_erc1155(token, address, token_id)
         return float(bal / DECIMALS)
 
+    def balances_of(self, address: str, tokens: list) -> tuple:
+        """
+        Fetch the token balances and the gas balance of address in a single eth_call to Multicall3,
+        so that every balance is read from the same block
+
+        Args:
+            address: The holder address.
+            tokens: List of (token address, token id) pairs, with a None token id for ERC20 tokens.
+
+        Returns:
+            Tuple of the token balances, in the order of tokens, and the gas balance.
+        """
+        data = self.balance_calls(address, tokens)
+
+        try:
+            results = decode_aggregate3(
+                self.w3.eth.call({"to": self.multicall_address, "data": data})
+            )
+            chain_requests_counter.labels(method="aggregate3", status="ok").inc()
+        except Exception as e:
+            self.logger.error(f"Error aggregate3: {e}")
+            chain_requests_counter.labels(method="aggregate3", status="error").inc()
+            raise e
+
+        balances = [
+            int.from_bytes(return_data, byteorder="big") for (_, return_data) in results
+        ]
+        return (
+            [float(bal / DECIMALS) for bal in balances[:-1]],
+            from_wei(balances[-1], "ether"),
+        )
+
     def gas_balance(self, address):
         bal = None
 
@@ -1,5 +1,88 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
 from web3 import Web3
 
+DEFAULT_TOKEN_ID_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "poly_market_maker", "token_ids.json"
+)
+
+# below this many misses, deriving in process is faster than starting a process pool
+POOL_THRESHOLD = 64
+
+
+class TokenIdCache:
+    """On-disk cache of derived token ids, keyed by (condition id, collateral address, token index)
+
+    Attributes:
+        path: Path of the JSON cache file, loaded on creation and rewritten by `save`.
+    """
+
+    def __init__(self, path: str = DEFAULT_TOKEN_ID_CACHE_PATH):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.path = path
+        self._lock = threading.Lock()
+        self._token_ids = {}
+        self._dirty = False
+
+        try:
+            with open(path) as f:
+                self._token_ids = {
+                    key: int(value) for (key, value) in json.load(f).items()
+                }
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable token id cache {path}: {e}")
+
+    @staticmethod
+    def _key(condition_id: str, collateral_address: str, token_index: int) -> str:
+        return f"{condition_id.lower()}:{collateral_address.lower()}:{token_index}"
+
+    def get(self, condition_id: str, collateral_address: str, token_index: int) -> int:
+        return self._token_ids.get(
+            self._key(condition_id, collateral_address, token_index)
+        )
+
+    def put(
+        self,
+        condition_id: str,
+        collateral_address: str,
+        token_index: int,
+        token_id: int,
+    ):
+        with self._lock:
+            self._token_ids[
+                self._key(condition_id, collateral_address, token_index)
+            ] = token_id
+            self._dirty = True
+
+    def save(self):
+        """Atomically rewrite the cache file, if anything was added since the last save"""
+        with self._lock:
+            if not self._dirty:
+                return
+            token_ids = {key: str(value) for (key, value) in self._token_ids.items()}
+            self._dirty = False
+
+        # the cache is an optimisation, failing to write it must not stop the keeper
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile("w", dir=directory, delete=False) as f:
+                json.dump(token_ids, f)
+            os.replace(f.name, self.path)
+        except OSError as e:
+            self.logger.warning(f"Could not write the token id cache {self.path}: {e}")
+
+
+def _derive_token_id(key: tuple) -> int:
+    return CTHelpers.get_token_id(*key)
+
 
 class CTHelpers:
     P = 21888242871839275222246405745257275088696311157297823662689037894645226208583
@@ -12,6 +95,48 @@ class CTHelpers:
         collection_id = cls.get_collection_id(condition_id, index_set)
         return cls.get_position_id(collateral_address, collection_id)
 
+    @classmethod
+    def get_token_ids(
+        cls,
+        keys: list[tuple],
+        cache: TokenIdCache = None,
+        processes: int = None,
+        pool_threshold: int = POOL_THRESHOLD,
+    ) -> list[int]:
+        """
+        Derive the token ids of many (condition id, collateral address, token index) keys
+
+        Args:
+            keys: The keys to derive.
+            cache: Optional cache, read first and updated (and saved) with the derived ids.
+            processes: Size of the process pool deriving the cache misses (default: cpu count).
+            pool_threshold: Min number of misses to derive them in a process pool.
+        """
+        token_ids = [cache.get(*key) if cache is not None else None for key in keys]
+        misses = [i for (i, token_id) in enumerate(token_ids) if token_id is None]
+        if len(misses) == 0:
+            return token_ids
+
+        miss_keys = [keys[i] for i in misses]
+        if len(misses) >= pool_threshold:
+            processes = processes or os.cpu_count() or 1
+            chunksize = max(1, len(miss_keys) // (4 * processes))
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                derived = list(
+                    executor.map(_derive_token_id, miss_keys, chunksize=chunksize)
+                )
+        else:
+            derived = [_derive_token_id(key) for key in miss_keys]
+
+        for i, token_id in zip(misses, derived):
+            token_ids[i] = token_id
+            if cache is not None:
+                cache.put(*keys[i], token_id)
+        if cache is not None:
+            cache.save()
+
+        return token_ids
+
     @classmethod
     def get_collection_id(cls, condition_id: str, index_set: int) -> str:
         assert isinstance(condition_id, str)
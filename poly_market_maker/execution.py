@@ -0,0 +1,77 @@
+import logging
+from typing import Tuple
+
+from poly_market_maker.constants import PRICE_SCALE
+from poly_market_maker.fixed_point import to_units, cost_units
+from poly_market_maker.order import Order, OrderSet, Side
+from poly_market_maker.orderbook import OrderBook
+from poly_market_maker.token import Token, Collateral
+
+logger = logging.getLogger(__name__)
+
+
+def split_orders_to_place(
+    orderbook: OrderBook, orders_to_cancel: list[Order], orders_to_place: list[Order]
+) -> Tuple[list[Order], list[Order]]:
+    """Split the orders to place into those which can be placed alongside the cancels
+    and those which have to wait for the cancels to complete.
+
+    An order has to wait if it needs collateral or tokens which are only freed by the
+    cancels, or if it would cross one of the orders being cancelled.
+
+    Returns:
+        A tuple of (independent orders, dependent orders).
+    """
+    # until the cancels complete, the exchange still locks the balance of every open order
+    open_orders = OrderSet(orderbook.orders)
+
+    free = {
+        Collateral: to_units(orderbook.balances[Collateral])
+        - open_orders.select(side=Side.BUY).total_cost()
+    }
+    for token in Token:
+        free[token] = (
+            to_units(orderbook.balances[token])
+            - open_orders.select(side=Side.SELL, token=token).total_size()
+        )
+
+    independent = []
+    dependent = []
+    for order in orders_to_place:
+        if order.side == Side.BUY:
+            (asset, required) = (
+                Collateral,
+                cost_units(order.size_units, order.price_ticks),
+            )
+        else:
+            (asset, required) = (order.token, order.size_units)
+
+        if required <= free[asset] and not any(
+            _crosses(order, cancel) for cancel in orders_to_cancel
+        ):
+            free[asset] -= required
+            independent.append(order)
+        else:
+            dependent.append(order)
+
+    logger.debug(
+        f"{len(independent)} order(s) can be placed alongside the cancels, {len(dependent)} have to wait"
+    )
+    return (independent, dependent)
+
+
+def _crosses(order: Order, other: Order) -> bool:
+    """Whether the two orders would match each other"""
+    if order.token == other.token:
+        if order.side == other.side:
+            return False
+        (buy, sell) = (order, other) if order.side == Side.BUY else (other, order)
+        return buy.price_ticks >= sell.price_ticks
+
+    # complementary tokens: two buys (or two sells) match when their prices add up to 1
+    if order.side != other.side:
+        return False
+    total_ticks = order.price_ticks + other.price_ticks
+    if order.side == Side.BUY:
+        return total_ticks >= PRICE_SCALE
+    return total_ticks <= PRICE_SCALE
@@ -0,0 +1,32 @@
+from poly_market_maker.constants import PRICE_SCALE, SIZE_SCALE
+
+
+def to_ticks(price: float) -> int:
+    """Convert a float price to an integer number of ticks"""
+    return round(price * PRICE_SCALE)
+
+
+def from_ticks(ticks: int) -> float:
+    """Convert an integer number of ticks to a float price"""
+    return ticks / PRICE_SCALE
+
+
+def to_units(size: float) -> int:
+    """Convert a float size to integer micro-units"""
+    return round(size * SIZE_SCALE)
+
+
+def from_units(units: int) -> float:
+    """Convert integer micro-units to a float size"""
+    return units / SIZE_SCALE
+
+
+def round_down_units(units: int, decimals: int) -> int:
+    """Round micro-units down to the given number of decimals"""
+    step = SIZE_SCALE // 10**decimals
+    return units - units % step
+
+
+def cost_units(size_units: int, price_ticks: int) -> int:
+    """Collateral micro-units needed to buy size_units at price_ticks, rounded up"""
+    return -(-size_units * price_ticks // PRICE_SCALE)
@@ -1,10 +1,14 @@
 import enum
 import math
+import statistics
+import threading
 import web3
 import requests
 import logging
 import time
 
+from requests.adapters import HTTPAdapter
+
 from poly_market_maker.metrics import gas_station_latency
 
 DEFAULT_FIXED_GAS_PRICE = 100000000000
@@ -14,47 +18,122 @@ class GasStrategy(enum.Enum):
     FIXED = "fixed"
     STATION = "station"
     WEB3 = "web3"
+    EIP1559 = "eip1559"
 
 
 class GasStation:
+    """Gas oracle, refreshed in the background so that sending a transaction never waits on a gas lookup
+
+    Attributes:
+        strat: Gas strategy.
+        refresh_interval: Interval (in seconds) between two background refreshes.
+        ttl: Age (in seconds) after which the cached fees are refreshed on read.
+        max_age: Age (in seconds) after which the cached fees are no longer used, the fixed gas
+            price is used instead until a refresh succeeds.
+        timeout: Timeout (in seconds) of the gas station requests.
+        fee_history_blocks: Number of blocks of the eth_feeHistory window (EIP1559 strategy).
+        priority_fee_percentile: Reward percentile of the eth_feeHistory window used as the
+            priority fee (EIP1559 strategy).
+    """
+
     def __init__(
         self,
         strat=GasStrategy.STATION,
         w3: web3.Web3 = None,
         url: str = None,
         fixed=DEFAULT_FIXED_GAS_PRICE,
+        refresh_interval: float = 5.0,
+        ttl: float = 30.0,
+        max_age: float = 300.0,
+        timeout: float = 2.0,
+        fee_history_blocks: int = 10,
+        priority_fee_percentile: float = 50,
     ):
         self.strat = self._get_gas_strategy(w3, url, strat)
         self.w3 = w3
         self.url = url
         self.fixed = int(fixed) if fixed else DEFAULT_FIXED_GAS_PRICE
+        self.refresh_interval = refresh_interval
+        self.ttl = ttl
+        self.max_age = max_age
+        self.timeout = timeout
+        self.fee_history_blocks = fee_history_blocks
+        self.priority_fee_percentile = priority_fee_percentile
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    def get_gas_price(self) -> int:
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=2, max_retries=1))
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=2, max_retries=1))
+
+        self._fees = None
+        self._fees_time = None
+        self._refreshing = threading.Lock()
+        self._refresh_now = threading.Event()
+        self._started = False
+
+    def start(self):
+        """Fetch the fees once, then keep them refreshed in a background thread"""
+        self.logger.info(f"Using gas price strategy: {self.strat.value.upper()}...")
+        self.refresh()
+        self._started = True
+        threading.Thread(target=self._thread_refresh, daemon=True).start()
+
+    def get_fees(self) -> dict:
         """
-        Get gas price
+        Get the fee parameters of a transaction from the cache: maxFeePerGas and maxPriorityFeePerGas
+        with the EIP1559 strategy, gasPrice otherwise.
+
+        If the cache is empty or older than the ttl, a refresh is triggered in the background and the
+        cached fees are returned without waiting for it. The fixed gas price is returned instead while
+        the cache is empty or older than max_age.
         """
-        self.logger.info(f"Using gas price strategy: {self.strat.value.upper()}...")
-        gas = None
-        start_time = time.time()
+        if self.strat == GasStrategy.FIXED:
+            return {"gasPrice": self.fixed}
+
+        (fees, fees_time) = (self._fees, self._fees_time)
+        age = time.monotonic() - fees_time if fees is not None else None
+        if age is None or age > self.ttl:
+            self._trigger_refresh()
+        if age is None:
+            self.logger.warning(
+                f"No gas price available yet, using the configured fixed gas price: {self.fixed}"
+            )
+            return {"gasPrice": self.fixed}
+        if age > self.max_age:
+            self.logger.warning(
+                f"Gas price is {age:.0f}s old, using the configured fixed gas price: {self.fixed}"
+            )
+            return {"gasPrice": self.fixed}
+        return fees
 
-        try:
-            if self.strat == GasStrategy.FIXED:
-                gas = self.fixed
+    def _trigger_refresh(self):
+        """Wake the background refresh, or before start, run a refresh unless one is running"""
+        if self._started:
+            self._refresh_now.set()
+        elif not self._refreshing.locked():
+            threading.Thread(target=self.refresh, daemon=True).start()
 
-            if self.strat == GasStrategy.WEB3:
-                rpc_gas_price = self.w3.eth.generate_gas_price()
-                gas = rpc_gas_price
+    def get_gas_price(self) -> int:
+        """
+        Get gas price
+        """
+        fees = self.get_fees()
+        return fees.get("gasPrice", fees.get("maxFeePerGas"))
 
-            if self.strat == GasStrategy.STATION:
-                gas_station_gas_price = self._get_gas_station_gas()
-                gas = gas_station_gas_price
+    def refresh(self) -> dict:
+        """Fetch the fees and update the cache, unless a refresh is already running"""
+        if not self._refreshing.acquire(blocking=False):
+            return self._fees
 
+        start_time = time.time()
+        try:
+            fees = self._fetch_fees()
+            self._fees = fees
+            self._fees_time = time.monotonic()
             gas_station_latency.labels(strategy=self.strat.value, status="ok").observe(
                 (time.time() - start_time)
             )
-
-            self.logger.info(f"Gas: {gas}")
+            self.logger.debug(f"Gas: {fees}")
         except Exception as e:
             self.logger.error(
                 f"Error fetching gas from gas station, strategy: {self.strat.value.upper()}: {e}"
@@ -62,8 +141,27 @@ class GasStation:
             gas_station_latency.labels(
                 strategy=self.strat.value, status="error"
             ).observe((time.time() - start_time))
-
-        return gas
+        finally:
+            self._refreshing.release()
+
+        return self._fees
+
+    def _thread_refresh(self):
+        while True:
+            self._refresh_now.wait(self.refresh_interval)
+            self._refresh_now.clear()
+            self.refresh()
+
+    def _fetch_fees(self) -> dict:
+        match self.strat:
+            case GasStrategy.FIXED:
+                return {"gasPrice": self.fixed}
+            case GasStrategy.WEB3:
+                return {"gasPrice": self._get_rpc_gas_price()}
+            case GasStrategy.STATION:
+                return {"gasPrice": self._get_gas_station_gas()}
+            case GasStrategy.EIP1559:
+                return self._get_fee_history_fees()
 
     def _get_gas_strategy(self, w3, url, user_given_strat):
         # if the user provided a strategy, use that directly
@@ -79,26 +177,33 @@ class GasStation:
         return GasStrategy.FIXED
 
     def _get_rpc_gas_price(self):
-        try:
-            gas = self.w3.eth.generate_gas_price()
-            # Round up to avoid transaction underpriced errors
-            return math.ceil(gas / (10**9)) * (10**9)
-        except:
-            self.logger.error(
-                f"Error fetching gas from web3, returning configured fixed gas price: {self.fixed}"
-            )
-            return self.fixed
+        gas = self.w3.eth.generate_gas_price()
+        # Round up to avoid transaction underpriced errors
+        return math.ceil(gas / (10**9)) * (10**9)
 
     def _get_gas_station_gas(self):
-        try:
-            resp = requests.get(self.url)
-            resp_json = resp.json()
+        resp = self.session.get(self.url, timeout=self.timeout)
+        resp_json = resp.json()
 
-            # Always fast
-            gas = resp_json.get("fast")
-            return math.ceil(gas) * (10**9)
-        except:
-            self.logger.error(
-                f"Error fetching gas from gasstation, returning configured fixed gas price: {self.fixed}"
-            )
-            return self.fixed
+        # Always fast
+        gas = resp_json.get("fast")
+        return math.ceil(gas) * (10**9)
+
+    def _get_fee_history_fees(self):
+        """
+        Priority fee: median over the window of the priority_fee_percentile block rewards.
+        Max fee: twice the base fee of the next block plus the priority fee, so the transaction stays
+        includable through several full blocks.
+        """
+        fee_history = self.w3.eth.fee_history(
+            self.fee_history_blocks, "latest", [self.priority_fee_percentile]
+        )
+        rewards = [reward[0] for reward in fee_history["reward"] if len(reward) > 0]
+        priority_fee = int(statistics.median(rewards)) if len(rewards) > 0 else 0
+        # the last base fee is the one of the next block
+        base_fee = fee_history["baseFeePerGas"][-1]
+
+        return {
+            "maxFeePerGas": 2 * base_fee + priority_fee,
+            "maxPriorityFeePerGas": priority_fee,
+        }
@@ -0,0 +1,83 @@
+import threading
+import time
+
+from poly_market_maker.kill_switch import FlatSwitch
+from poly_market_maker.orderbook import OrderBookManager
+
+
+class Heartbeat(FlatSwitch):
+    """Dead man's switch: pulls all the keeper quotes when the sync loop stops making progress.
+
+    The sync loop calls `beat` after every synchronization. A dedicated thread, independent of
+    the sync loop, checks the age of the last beat every `interval` seconds: while it is below
+    `timeout` it renews the exchange-side cancel-on-disconnect (if any), past it it stops renewing
+    and issues a cancel all, so the quotes don't stay on the book while the sync loop hangs.
+
+    Attributes:
+        timeout: Time (in seconds) without a beat after which all orders are cancelled.
+        interval: Interval (in seconds) between two checks.
+        renew: Optional function renewing an exchange-side cancel-on-disconnect, called on
+            every check while the sync loop makes progress.
+    """
+
+    def __init__(
+        self,
+        order_book_manager: OrderBookManager,
+        timeout: float,
+        interval: float = 1.0,
+        renew=None,
+    ):
+        super().__init__(order_book_manager, "heartbeat")
+
+        assert isinstance(timeout, (int, float)) and timeout > 0
+        assert isinstance(interval, (int, float)) and interval > 0
+        assert renew is None or callable(renew)
+
+        self.timeout = timeout
+        self.interval = interval
+        self.renew = renew
+
+        self._last_beat = time.monotonic()
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Start checking the beats in a background thread"""
+        self.beat()
+        self._stopped.clear()
+        threading.Thread(target=self._thread_check, daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def beat(self):
+        """Record the progress of the sync loop"""
+        self._last_beat = time.monotonic()
+        self._reset("Sync loop is making progress again")
+
+    def check(self) -> bool:
+        """
+        Renew the cancel-on-disconnect, or cancel all orders if the sync loop stopped making progress.
+
+        Returns:
+            `True` if the sync loop is alive, `False` otherwise.
+        """
+        age = time.monotonic() - self._last_beat
+        if age > self.timeout:
+            self._trip(
+                f"No progress of the sync loop for {age:.1f} seconds, cancelling all orders!"
+            )
+            return False
+
+        if self.renew is not None:
+            try:
+                self.renew()
+            except Exception as e:
+                self.logger.error(f"Failed to renew the heartbeat: {e}")
+        return True
+
+    def _thread_check(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.logger.error(f"Heartbeat check failed: {e}")
@@ -0,0 +1,92 @@
+import logging
+import time
+
+from poly_market_maker.metrics import time_to_flat
+from poly_market_maker.orderbook import OrderBookManager
+from poly_market_maker.price_feed import PriceFeed
+
+
+class FlatSwitch:
+    """Base of the switches pulling all the keeper quotes on a trigger, the cancel all is
+    retried on every check until it is acknowledged.
+
+    Attributes:
+        trigger: Label of the trigger in the time to flat metric.
+        tripped: Whether the trigger is on.
+        flat: Whether all orders were cancelled since the trip.
+    """
+
+    def __init__(self, order_book_manager: OrderBookManager, trigger: str):
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        assert isinstance(trigger, str)
+
+        self.order_book_manager = order_book_manager
+        self.trigger = trigger
+
+        self.tripped = False
+        self.flat = False
+        self._tripped_at = None
+
+    def _trip(self, message: str):
+        """Cancel all orders, unless they were already cancelled since the trip"""
+        if not self.tripped:
+            self.logger.warning(message)
+            self.tripped = True
+            self.flat = False
+            self._tripped_at = time.monotonic()
+        if not self.flat:
+            self._go_flat()
+
+    def _reset(self, message: str):
+        if self.tripped:
+            self.logger.info(message)
+            self.tripped = False
+
+    def _go_flat(self):
+        if self.order_book_manager.cancel_all_orders_now():
+            self.flat = True
+            seconds = time.monotonic() - self._tripped_at
+            time_to_flat.labels(trigger=self.trigger).observe(seconds)
+            self.logger.info(f"All orders cancelled {seconds:.3f}s after the trip")
+        else:
+            self.logger.error("Cancel all failed, retrying on the next check")
+
+
+class KillSwitch(FlatSwitch):
+    """Pulls all the keeper quotes when the price feed goes stale, and holds
+    quoting until the feed recovers.
+
+    Attributes:
+        max_price_age: Age (in seconds) after which the price feed is considered stale.
+    """
+
+    def __init__(
+        self,
+        price_feed: PriceFeed,
+        order_book_manager: OrderBookManager,
+        max_price_age: float,
+    ):
+        super().__init__(order_book_manager, "stale_price")
+
+        assert isinstance(price_feed, PriceFeed)
+        assert isinstance(max_price_age, (int, float))
+
+        self.price_feed = price_feed
+        self.max_price_age = max_price_age
+
+    def check(self) -> bool:
+        """
+        Check the price feed, cancelling all orders if it went stale.
+
+        Returns:
+            `True` if quoting is allowed, `False` otherwise.
+        """
+        if self.price_feed.is_stale(self.max_price_age):
+            self._trip(
+                "Price feed is stale, cancelling all orders and stopping quoting!"
+            )
+            return False
+
+        self._reset("Price feed recovered, resuming quoting")
+        return True
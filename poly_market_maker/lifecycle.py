@@ -1,64 +1,13 @@
+import asyncio
 import logging
 import signal
 import threading
-import time
 
+from poly_market_maker.metrics import timer_duration, timer_lag, timer_skipped_ticks
 
-class AsyncCallback:
-    """
-    Invokes callback logic in a separate thread
-    Forked and modified from pymaker's AsyncCallback: https://github.com/makerdao/pymaker/blob/master/pymaker/util.py#L100
-    Attributes:
-        callback: The callback function to be invoked in a separate thread.
-    """
-
-    def __init__(self, callback):
-        self.callback = callback
-        self.thread = None
-
-    def trigger(self, on_start=None, on_finish=None) -> bool:
-        """Invokes the callback in a separate thread, unless one is already running.
-
-        If callback isn't currently running, invokes it in a separate thread and returns `True`.
-        If the previous callback invocation still hasn't finished, doesn't do anything
-        and returns `False`.
-
-        Arguments:
-            on_start: Optional method to be called before the actual callback. Can be `None`.
-            on_finish: Optional method to be called after the actual callback. Can be `None`.
-
-        Returns:
-            `True` if callback has been invoked, or if it invocation attempt failed.
-            `False` if the previous callback invocation still hasn't finished.
-        """
-        if self.thread is None or not self.thread.is_alive():
-
-            def thread_target():
-                if on_start is not None:
-                    on_start()
-                self.callback()
-                if on_finish is not None:
-                    on_finish()
-
-            self.thread = threading.Thread(target=thread_target)
-
-            try:
-                self.thread.start()
-            except Exception as e:
-                self.thread = None
-
-                logging.critical(f"Failed to start the async callback thread ({e})")
-            return True
-        else:
-            return False
-
-    def wait(self):
-        """Waits for the currently running callback to finish.
-
-        If the callback isn't running or hasn't even been invoked once, returns instantly.
-        """
-        if self.thread is not None:
-            self.thread.join()
+# with adaptive timers, consecutive overruns before stretching the interval (or on-time ticks before shrinking it)
+ADAPTIVE_TICKS = 3
+ADAPTIVE_FACTOR = 1.5
 
 
 class Lifecycle:
@@ -71,6 +20,9 @@ class Lifecycle:
             lifecycle.every(15, self.do_something_else)
             lifecycle.on_shutdown(self.some_shutdown_function)
     Note: this version will only listen to timers, instead of per block events for simplicity
+
+    The lifecycle runs on a single asyncio event loop: every timer is a task on the loop.
+    Blocking callbacks run on the loop's default thread pool, coroutine functions run on the loop itself.
     """
 
     def __init__(self, delay=0):
@@ -87,17 +39,28 @@ class Lifecycle:
         self.fatal_termination = False
         self._at_least_one_every = False
 
+        self._loop = None
+        self._terminating = None
+        self._running_callbacks = {}
+
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        asyncio.run(self._run())
+        exit(10 if self.fatal_termination else 0)
+
+    async def _run(self):
+        self._loop = asyncio.get_running_loop()
+        self._terminating = asyncio.Event()
+
         # Initialization phase
         self.logger.info("Initializing keeper lifecycle...")
 
         # Initial delay
         if self.delay > 0:
             self.logger.info(f"Waiting for {self.delay} seconds of initial delay...")
-            time.sleep(self.delay)
+            await asyncio.sleep(self.delay)
 
         # Initial checks
         if len(self.wait_for_functions) > 0:
@@ -106,10 +69,10 @@ class Lifecycle:
             for index, (wait_for_function, max_wait) in enumerate(
                 self.wait_for_functions, start=1
             ):
-                start_time = time.time()
+                start_time = self._loop.time()
                 while True:
                     try:
-                        result = wait_for_function()
+                        result = await self._call(wait_for_function)
                     except Exception as e:
                         self.logger.exception(
                             f"Initial check #{index} failed with an exception: '{e}'"
@@ -119,40 +82,45 @@ class Lifecycle:
                     if result:
                         break
 
-                    if time.time() - start_time >= max_wait:
+                    if self._loop.time() - start_time >= max_wait:
                         self.logger.warning(
                             f"Initial check #{index} took more than {max_wait} seconds to pass, skipping"
                         )
                         break
 
-                    time.sleep(0.1)
+                    await asyncio.sleep(0.1)
 
         # Startup phase
         if self.startup_function:
             self.logger.info("Executing keeper startup logic...")
-            self.startup_function()
+            await self._call(self.startup_function)
 
         # Bind `on_block`, bind `every`
         # Enter the main loop
-        self._start_every_timers()
-        self._main_loop()
+        timers = self._start_every_timers()
+        await self._main_loop()
 
         # Enter shutdown process
         self.logger.info("Shutting down the keeper")
+        for timer in timers:
+            timer.cancel()
 
         # If any every (timer) callback is still running, wait for it to terminate
-        if len(self.every_timers) > 0:
+        running = [
+            callback
+            for callback in self._running_callbacks.values()
+            if not callback.done()
+        ]
+        if len(running) > 0:
             self.logger.info("Waiting for outstanding timers to terminate...")
-            for timer in self.every_timers:
-                timer[1].wait()
+            await asyncio.gather(*running, return_exceptions=True)
 
         # Shutdown phase
         if self.shutdown_function:
             self.logger.info("Executing keeper shutdown logic...")
-            self.shutdown_function()
+            await self._call(self.shutdown_function)
             self.logger.info("Shutdown logic finished")
         self.logger.info("Keeper terminated")
-        exit(10 if self.fatal_termination else 0)
 
     def initial_delay(self, initial_delay: int):
         """
@@ -208,17 +176,39 @@ class Lifecycle:
             self.logger.warning(message)
 
         self.terminated_internally = True
-
-    def every(self, frequency_in_seconds: int, callback):
+        self._wake_up()
+
+    def every(
+        self,
+        frequency_in_seconds: int,
+        callback,
+        adaptive: bool = False,
+        max_frequency_in_seconds: int = None,
+    ):
         """Register the specified callback to be called by a timer.
 
+        Ticks are aligned to fixed deadlines on the monotonic clock, so the period doesn't drift.
+        A tick is skipped while the previous callback is still running.
+
         Args:
             frequency_in_seconds: Execution frequency (in seconds).
             callback: Function to be called by the timer.
+            adaptive: Stretch the interval when the callback keeps overrunning it, and shrink it back
+                towards frequency_in_seconds once it doesn't anymore.
+            max_frequency_in_seconds: Max interval of an adaptive timer (default: 4 * frequency_in_seconds).
         """
-        self.every_timers.append((frequency_in_seconds, AsyncCallback(callback)))
+        self.every_timers.append(
+            (
+                frequency_in_seconds,
+                callback,
+                adaptive,
+                max_frequency_in_seconds
+                if max_frequency_in_seconds is not None
+                else 4 * frequency_in_seconds,
+            )
+        )
 
-    def _sigint_sigterm_handler(self, sig, frame):
+    def _sigint_sigterm_handler(self, sig=None, frame=None):
         if self.terminated_externally:
             self.logger.warning(
                 "Graceful keeper termination due to SIGINT/SIGTERM already in progress"
@@ -228,82 +218,132 @@ class Lifecycle:
                 "Keeper received SIGINT/SIGTERM signal, will terminate gracefully"
             )
             self.terminated_externally = True
-
-    def _start_thread_safely(self, t: threading.Thread):
-        delay = 10
-
+            self._wake_up()
+
+    def _wake_up(self):
+        """Wake the main loop up, from any thread"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._terminating.set)
+
+    @staticmethod
+    async def _call(function):
+        if asyncio.iscoroutinefunction(function):
+            return await function()
+        return await asyncio.to_thread(function)
+
+    def _start_every_timers(self) -> list:
+        timers = [
+            asyncio.create_task(self._every_timer(idx, *timer))
+            for idx, timer in enumerate(self.every_timers, start=1)
+        ]
+        if len(timers) > 0:
+            self._at_least_one_every = True
+            self.logger.info(f"Started {len(timers)} timer(s)")
+        return timers
+
+    async def _every_timer(
+        self,
+        idx: int,
+        frequency_in_seconds: int,
+        callback,
+        adaptive: bool = False,
+        max_frequency_in_seconds: int = None,
+    ):
+        name = getattr(callback, "__name__", str(idx))
+        interval = frequency_in_seconds
+        # consecutive callbacks which overran their interval, or didn't
+        overruns = 0
+        on_time = 0
+        skipped = 0
+
+        deadline = self._loop.time() + 1
         while True:
-            try:
-                t.start()
-                break
-            except Exception as e:
-                self.logger.critical(
-                    f"Failed to start a thread ({e}), trying again in {delay} seconds"
-                )
-                time.sleep(delay)
-
-    def _start_every_timers(self):
-        for idx, timer in enumerate(self.every_timers, start=1):
-            self._start_every_timer(idx, timer[0], timer[1])
-
-        if len(self.every_timers) > 0:
-            self.logger.info(f"Started {len(self.every_timers)} timer(s)")
-
-    def _start_every_timer(self, idx: int, frequency_in_seconds: int, callback):
-        def setup_timer(delay):
-            timer = threading.Timer(delay, func)
-            timer.daemon = True
+            await asyncio.sleep(max(0, deadline - self._loop.time()))
+            timer_lag.labels(timer=name).observe(self._loop.time() - deadline)
 
-            self._start_thread_safely(timer)
-
-        def func():
-            try:
-                if (
-                    not self.terminated_internally
-                    and not self.terminated_externally
-                    and not self.fatal_termination
-                ):
-
-                    def on_start():
-                        self.logger.debug(f"Processing the timer #{idx}")
-
-                    def on_finish():
-                        self.logger.debug(f"Finished processing the timer #{idx}")
-
-                    if not callback.trigger(on_start, on_finish):
-                        self.logger.debug(
-                            f"Ignoring timer #{idx} as previous one is already running"
-                        )
+            if (
+                not self.terminated_internally
+                and not self.terminated_externally
+                and not self.fatal_termination
+            ):
+                running = self._running_callbacks.get(idx)
+                if running is None or running.done():
+                    self._running_callbacks[idx] = asyncio.create_task(
+                        self._process_timer(idx, name, callback)
+                    )
+                    if skipped > 0:
+                        (overruns, on_time) = (overruns + 1, 0)
+                    else:
+                        (overruns, on_time) = (0, on_time + 1)
+                    skipped = 0
                 else:
-                    self.logger.debug(
-                        f"Ignoring timer #{idx} as keeper is already terminating"
+                    self.logger.warning(
+                        f"Ignoring timer #{idx} as previous one is already running"
                     )
-            except:
-                setup_timer(frequency_in_seconds)
-                raise
-            setup_timer(frequency_in_seconds)
+                    timer_skipped_ticks.labels(timer=name).inc()
+                    skipped += 1
+            else:
+                self.logger.debug(
+                    f"Ignoring timer #{idx} as keeper is already terminating"
+                )
 
-        setup_timer(1)
-        self._at_least_one_every = True
+            if adaptive:
+                if overruns >= ADAPTIVE_TICKS and interval < max_frequency_in_seconds:
+                    interval = min(interval * ADAPTIVE_FACTOR, max_frequency_in_seconds)
+                    overruns = 0
+                    self.logger.warning(
+                        f"Timer #{idx} keeps overrunning, stretching its interval to {interval:.2f} seconds"
+                    )
+                elif on_time >= ADAPTIVE_TICKS and interval > frequency_in_seconds:
+                    interval = max(interval / ADAPTIVE_FACTOR, frequency_in_seconds)
+                    on_time = 0
+                    self.logger.info(
+                        f"Timer #{idx} is back on time, shrinking its interval to {interval:.2f} seconds"
+                    )
 
-    def _main_loop(self):
+            # next deadline on the fixed grid, skipping the ones already missed
+            deadline += interval
+            now = self._loop.time()
+            if deadline <= now:
+                missed = int((now - deadline) // interval) + 1
+                deadline += missed * interval
+                timer_skipped_ticks.labels(timer=name).inc(missed)
+
+    async def _process_timer(self, idx: int, name: str, callback):
+        self.logger.debug(f"Processing the timer #{idx}")
+        start_time = self._loop.time()
+        try:
+            await self._call(callback)
+        except Exception as e:
+            self.logger.exception(f"Timer #{idx} failed with an exception: '{e}'")
+        timer_duration.labels(timer=name).observe(self._loop.time() - start_time)
+        self.logger.debug(f"Finished processing the timer #{idx}")
+
+    def _install_signal_handlers(self):
         # terminate gracefully on either SIGINT or SIGTERM
-        signal.signal(signal.SIGINT, self._sigint_sigterm_handler)
-        signal.signal(signal.SIGTERM, self._sigint_sigterm_handler)
+        for sig in [signal.SIGINT, signal.SIGTERM]:
+            try:
+                self._loop.add_signal_handler(sig, self._sigint_sigterm_handler)
+            except (NotImplementedError, RuntimeError, ValueError):
+                if threading.current_thread() is threading.main_thread():
+                    signal.signal(sig, self._sigint_sigterm_handler)
 
-        while self._at_least_one_every:
-            time.sleep(1)
+    async def _main_loop(self):
+        self._install_signal_handlers()
 
-            # if the keeper logic asked us to terminate, we do so
-            if self.terminated_internally:
-                self.logger.warning(
-                    "Keeper logic asked for termination, the keeper will terminate"
-                )
-                break
+        if not self._at_least_one_every:
+            return
 
-            # if SIGINT/SIGTERM asked us to terminate, we do so
-            if self.terminated_externally:
-                self.logger.warning(
-                    "The keeper is terminating due do SIGINT/SIGTERM signal received"
-                )
-                break
+        if not self.terminated_internally and not self.terminated_externally:
+            await self._terminating.wait()
+
+        # if the keeper logic asked us to terminate, we do so
+        if self.terminated_internally:
+            self.logger.warning(
+                "Keeper logic asked for termination, the keeper will terminate"
+            )
+        # if SIGINT/SIGTERM asked us to terminate, we do so
+        elif self.terminated_externally:
+            self.logger.warning(
+                "The keeper is terminating due do SIGINT/SIGTERM signal received"
+            )
@@ -1,24 +1,55 @@
 import logging
 
-from poly_market_maker.ct_helpers import CTHelpers
+from poly_market_maker.ct_helpers import CTHelpers, TokenIdCache
 from poly_market_maker.token import Token
 
 
 class Market:
-    def __init__(self, condition_id: str, collateral_address: str):
+    def __init__(
+        self, condition_id: str, collateral_address: str, token_ids: list[int] = None
+    ):
         self.logger = logging.getLogger(self.__class__.__name__)
 
         assert isinstance(condition_id, str)
         assert isinstance(collateral_address, str)
 
+        if token_ids is None:
+            token_ids = [
+                CTHelpers.get_token_id(condition_id, collateral_address, 0),
+                CTHelpers.get_token_id(condition_id, collateral_address, 1),
+            ]
+
         self.condition_id = condition_id
         self.token_ids = {
-            Token.A: CTHelpers.get_token_id(condition_id, collateral_address, 0),
-            Token.B: CTHelpers.get_token_id(condition_id, collateral_address, 1),
+            Token.A: token_ids[0],
+            Token.B: token_ids[1],
         }
 
         self.logger.info(f"Initialized Market: {self}")
 
+    @classmethod
+    def from_condition_ids(
+        cls,
+        condition_ids: list[str],
+        collateral_address: str,
+        cache: TokenIdCache = None,
+        processes: int = None,
+    ) -> list:
+        """Create the markets of many condition ids, deriving their token ids in a batch"""
+        token_ids = CTHelpers.get_token_ids(
+            [
+                (condition_id, collateral_address, token_index)
+                for condition_id in condition_ids
+                for token_index in [0, 1]
+            ],
+            cache=cache,
+            processes=processes,
+        )
+        return [
+            cls(condition_id, collateral_address, token_ids[2 * i : 2 * i + 2])
+            for (i, condition_id) in enumerate(condition_ids)
+        ]
+
     def __repr__(self):
         return f"Market[condition_id={self.condition_id}, token_id_a={self.token_ids[Token.A]}, token_id_b={self.token_ids[Token.B]}]"
 
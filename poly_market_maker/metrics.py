@@ -24,3 +24,49 @@ gas_station_latency = Histogram(
     labelnames=["strategy", "status"],
     namespace="market_maker",
 )
+sync_cycles_counter = Counter(
+    "sync_cycles_counter",
+    "Counts the strategy synchronization cycles",
+    labelnames=["status", "reason"],
+    namespace="market_maker",
+)
+time_to_flat = Histogram(
+    "time_to_flat",
+    "Time from deciding to pull all quotes to the cancel all being acknowledged",
+    labelnames=["trigger"],
+    namespace="market_maker",
+)
+time_to_first_quote = Gauge(
+    "time_to_first_quote",
+    "Time from the keeper start to its first quotes being placed",
+    namespace="market_maker",
+)
+timer_lag = Histogram(
+    "timer_lag",
+    "Delay between the scheduled deadline of a lifecycle timer tick and its actual start",
+    labelnames=["timer"],
+    namespace="market_maker",
+)
+timer_duration = Histogram(
+    "timer_duration",
+    "Duration of the lifecycle timer callbacks",
+    labelnames=["timer"],
+    namespace="market_maker",
+)
+timer_skipped_ticks = Counter(
+    "timer_skipped_ticks",
+    "Counts the lifecycle timer ticks skipped as the previous callback was still running",
+    labelnames=["timer"],
+    namespace="market_maker",
+)
+sync_cycle_duration = Histogram(
+    "sync_cycle_duration",
+    "Duration of the strategy synchronization cycles",
+    namespace="market_maker",
+)
+sync_phase_duration = Histogram(
+    "sync_phase_duration",
+    "Duration of the phases of the strategy synchronization cycles",
+    labelnames=["phase"],
+    namespace="market_maker",
+)
@@ -1,7 +1,17 @@
+from array import array
 from enum import Enum
+from itertools import compress
+from typing import Iterable, Iterator
 from py_clob_client.order_builder.constants import BUY, SELL
 
 from poly_market_maker.market import Token
+from poly_market_maker.fixed_point import (
+    to_ticks,
+    from_ticks,
+    to_units,
+    from_units,
+    cost_units,
+)
 
 
 class Side(Enum):
@@ -18,6 +28,13 @@ class Side(Enum):
 
 
 class Order:
+    """Immutable order, with the price held in integer ticks and the size in integer micro-units.
+
+    `price` and `size` are float views, for use at the CLOB API boundary.
+    """
+
+    __slots__ = ("size_units", "price_ticks", "side", "token", "id", "_hash")
+
     def __init__(self, size: float, price: float, side: Side, token: Token, id=None):
         if isinstance(size, int):
             size = float(size)
@@ -29,11 +46,193 @@ class Order:
         if id is not None:
             assert isinstance(id, str)
 
-        self.size = size
-        self.price = price
-        self.side = side
-        self.token = token
-        self.id = id
+        _set = object.__setattr__
+        _set(self, "size_units", to_units(size))
+        _set(self, "price_ticks", to_ticks(price))
+        _set(self, "side", side)
+        _set(self, "token", token)
+        _set(self, "id", id)
+        _set(self, "_hash", None)
+
+    @classmethod
+    def from_ticks(
+        cls, size_units: int, price_ticks: int, side: Side, token: Token, id=None
+    ):
+        """Create an order directly from integer ticks and micro-units.
+
+        This is the unchecked constructor used by the strategies.
+        """
+        order = object.__new__(cls)
+        _set = object.__setattr__
+        _set(order, "size_units", size_units)
+        _set(order, "price_ticks", price_ticks)
+        _set(order, "side", side)
+        _set(order, "token", token)
+        _set(order, "id", id)
+        _set(order, "_hash", None)
+        return order
+
+    def with_id(self, id: str):
+        """Return a copy of the order with the given id"""
+        return Order.from_ticks(
+            self.size_units, self.price_ticks, self.side, self.token, id
+        )
+
+    @property
+    def size(self) -> float:
+        return from_units(self.size_units)
+
+    @property
+    def price(self) -> float:
+        return from_ticks(self.price_ticks)
+
+    @property
+    def key(self) -> tuple:
+        """The (token, side, price_ticks) the order is quoted at"""
+        return (self.token, self.side, self.price_ticks)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Order is immutable, cannot set {name}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Order is immutable, cannot delete {name}")
+
+    def __eq__(self, other):
+        if isinstance(other, Order):
+            return (
+                self.price_ticks == other.price_ticks
+                and self.size_units == other.size_units
+                and self.side == other.side
+                and self.token == other.token
+                and self.id == other.id
+            )
+        return NotImplemented
+
+    def __hash__(self):
+        h = self._hash
+        if h is None:
+            h = hash(
+                (self.price_ticks, self.size_units, self.side, self.token, self.id)
+            )
+            object.__setattr__(self, "_hash", h)
+        return h
 
     def __repr__(self):
         return f"Order[id={self.id}, price={self.price}, size={self.size}, side={self.side.value}, token={self.token.value}]"
+
+
+SIDE_CODES = {Side.BUY: 0, Side.SELL: 1}
+TOKEN_CODES = {Token.A: 0, Token.B: 1}
+
+
+class OrderSet:
+    """Collection of orders backed by parallel arrays.
+
+    Attributes:
+        -price_ticks: Order prices, in ticks.
+        -size_units: Order sizes, in micro-units.
+        -sides: Order side codes, see `SIDE_CODES`.
+        -tokens: Order token codes, see `TOKEN_CODES`.
+        -ids: Order ids.
+    """
+
+    __slots__ = ("price_ticks", "size_units", "sides", "tokens", "ids", "_orders")
+
+    def __init__(self, orders: Iterable[Order] = ()):
+        self.price_ticks = array("q")
+        self.size_units = array("q")
+        self.sides = array("b")
+        self.tokens = array("b")
+        self.ids = []
+        self._orders = []
+
+        for order in orders:
+            self.append(order)
+
+    def append(self, order: Order):
+        self.price_ticks.append(order.price_ticks)
+        self.size_units.append(order.size_units)
+        self.sides.append(SIDE_CODES[order.side])
+        self.tokens.append(TOKEN_CODES[order.token])
+        self.ids.append(order.id)
+        self._orders.append(order)
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __iter__(self) -> Iterator[Order]:
+        return iter(self._orders)
+
+    def __getitem__(self, index: int) -> Order:
+        return self._orders[index]
+
+    def to_list(self) -> list[Order]:
+        return list(self._orders)
+
+    def mask(self, side: Side = None, token: Token = None) -> list[bool]:
+        """Return a mask selecting the orders with the given side and/or token"""
+        if side is None and token is None:
+            return [True] * len(self)
+        if token is None:
+            side_code = SIDE_CODES[side]
+            return [code == side_code for code in self.sides]
+        if side is None:
+            token_code = TOKEN_CODES[token]
+            return [code == token_code for code in self.tokens]
+
+        side_code = SIDE_CODES[side]
+        token_code = TOKEN_CODES[token]
+        return [
+            s == side_code and t == token_code
+            for (s, t) in zip(self.sides, self.tokens)
+        ]
+
+    def filter(self, mask: list[bool]):
+        """Return a new OrderSet with the orders selected by the mask"""
+        assert len(mask) == len(self)
+
+        order_set = OrderSet()
+        order_set.price_ticks = array("q", compress(self.price_ticks, mask))
+        order_set.size_units = array("q", compress(self.size_units, mask))
+        order_set.sides = array("b", compress(self.sides, mask))
+        order_set.tokens = array("b", compress(self.tokens, mask))
+        order_set.ids = list(compress(self.ids, mask))
+        order_set._orders = list(compress(self._orders, mask))
+        return order_set
+
+    def select(self, side: Side = None, token: Token = None):
+        """Return a new OrderSet with the orders with the given side and/or token"""
+        return self.filter(self.mask(side, token))
+
+    def total_size(self) -> int:
+        """Total size of the orders, in micro-units"""
+        return sum(self.size_units)
+
+    def total_cost(self) -> int:
+        """Total collateral locked by the orders if they are buys, in micro-units"""
+        return sum(
+            cost_units(size_units, price_ticks)
+            for (size_units, price_ticks) in zip(self.size_units, self.price_ticks)
+        )
+
+    def group_by_key(self) -> dict[tuple, list[Order]]:
+        """Group the orders by their (token, side, price_ticks) key"""
+        groups = {}
+        for order in self._orders:
+            groups.setdefault(order.key, []).append(order)
+        return groups
+
+    def size_by_key(self) -> dict[tuple, int]:
+        """Total size in micro-units for each (token, side, price_ticks) key"""
+        tokens = list(TOKEN_CODES)
+        sides = list(SIDE_CODES)
+        sizes = {}
+        for t, s, p, size in zip(
+            self.tokens, self.sides, self.price_ticks, self.size_units
+        ):
+            key = (tokens[t], sides[s], p)
+            sizes[key] = sizes.get(key, 0) + size
+        return sizes
+
+    def __repr__(self):
+        return f"OrderSet[{len(self)} orders]"
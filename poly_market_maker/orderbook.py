@@ -4,7 +4,9 @@ import time
 from collections.abc import Callable
 from concurrent.futures import ThreadPoolExecutor, wait
 
+from poly_market_maker.metrics import time_to_flat
 from poly_market_maker.order import Order, Side
+from poly_market_maker.tracing import bind_cycle, trace
 
 
 class OrderBook:
@@ -63,6 +65,10 @@ class OrderBookManager:
         self._orders_placed = list()
         self._order_ids_cancelling = set()
         self._order_ids_cancelled = set()
+        self._balances_on_demand = False
+        self._balances_stale = True
+        self._refresh_now = threading.Event()
+        self._shutting_down = False
 
     def get_orders_with(self, get_orders_function: Callable[[], list[Order]]):
         """
@@ -114,6 +120,18 @@ class OrderBookManager:
 
         self.cancel_all_orders_function = cancel_all_orders_function
 
+    def refresh_balances_on_demand(self):
+        """
+        Stops fetching the balances on every order book refresh. They are fetched on the first refresh,
+        then only on the refresh following an `invalidate_balances` call.
+        """
+        self._balances_on_demand = True
+
+    def invalidate_balances(self):
+        """Marks the balances as stale, and triggers an order book refresh without waiting for the next one."""
+        self._balances_stale = True
+        self._refresh_now.set()
+
     def on_update(self, on_update_function: Callable):
         assert callable(on_update_function)
 
@@ -123,6 +141,15 @@ class OrderBookManager:
         """Start the background refresh of active keeper orders."""
         threading.Thread(target=self._thread_refresh_order_book, daemon=True).start()
 
+    def is_ready(self) -> bool:
+        """Whether the orders, and the balances if configured, have been fetched at least once."""
+        with self._lock:
+            return (
+                self._state is not None
+                and "orders" in self._state
+                and (self.get_balances_function is None or "balances" in self._state)
+            )
+
     def get_order_book(self) -> OrderBook:
         """
         Returns the current snapshot of the active keeper orders and balances.
@@ -210,6 +237,8 @@ class OrderBookManager:
             self._currently_placing_orders += len(orders)
 
         self._report_order_book_updated()
+        if len(orders) > 0:
+            trace("orders_submitted", count=len(orders))
 
         results = [
             self._executor.submit(
@@ -244,51 +273,111 @@ class OrderBookManager:
         ]
         wait(results)
 
-    def cancel_all_orders(self):
+    def cancel_and_place_orders(
+        self, orders_to_cancel: list[Order], orders_to_place: list[Order]
+    ):
         """
-        Cancels all existing orders
+        Cancels existing orders and places new ones in a single round.
+
+        The cancels and the placements are submitted together, so `orders_to_place` must not
+        rely on the balances freed by the cancels, see `execution.split_orders_to_place`.
+
+        Args:
+            orders_to_cancel: List of orders to cancel.
+            orders_to_place: List of new orders which do not depend on the cancels.
         """
-        while True:
-            orders = self.get_order_book().orders
-            if len(orders) == 0:
-                self.logger.info("No open orders on order book.")
-                break
-            order_ids = [order.id for order in orders]
-            with self._lock:
-                for order_id in order_ids:
-                    self._order_ids_cancelling.add(order_id)
+        assert isinstance(orders_to_cancel, list)
+        assert isinstance(orders_to_place, list)
+        assert callable(self.cancel_order_function)
+        assert callable(self.place_order_function)
 
-            self.logger.info(f"Cancelling {len(order_ids)} open orders...")
+        with self._lock:
+            for order in orders_to_cancel:
+                self._order_ids_cancelling.add(order.id)
+            self._currently_placing_orders += len(orders_to_place)
 
-            # Cancel all orders
-            result = self._executor.submit(
-                self._thread_cancel_all_orders(self.cancel_all_orders_function, orders)
+        self._report_order_book_updated()
+        if len(orders_to_place) > 0:
+            trace("orders_submitted", count=len(orders_to_place))
+
+        results = [
+            self._executor.submit(
+                self._thread_cancel_order(self.cancel_order_function, order)
             )
-            wait([result])
-            self.wait_for_stable_order_book()
-            time.sleep(2)
-
-        # Wait for the background thread to refresh the order book twice, so we are 99.9% sure
-        # that there are no orders left in the backend.
-        #
-        # The reason we wait twice for the order book refresh is that the first refresh might have
-        # started still while the orders were still being cancelled. By waiting twice we are sure that the
-        # second refresh has started after the whole order cancellation process was already finished.
-        self.logger.info(
-            "No open orders. Waiting for the order book to refresh twice just to be sure..."
-        )
-        self.wait_for_order_book_refresh()
-        self.wait_for_order_book_refresh()
+            for order in orders_to_cancel
+        ] + [
+            self._executor.submit(
+                self._thread_place_order(self.place_order_function, order)
+            )
+            for order in orders_to_place
+        ]
+        wait(results)
 
-        orders = self.get_order_book().orders
-        if len(orders) > 0:
-            # TODO: not repeating the cancel_all since it could lead to an infinite recursion
-            # self.logger.info(f"There are still {len(orders)} open orders! Repeating the cancel_all_orders function!")
-            # return self.cancel_all_orders()
-            self.logger.info(f"There are still {len(orders)} open keeper orders!")
-            return
+    def cancel_all_orders(self, timeout: float = 10.0) -> bool:
+        """
+        Cancels all existing orders for good, within `timeout` seconds.
+
+        Placements which haven't started yet are dropped, and a cancel all is issued straight away.
+        The result is confirmed by querying the open orders directly, instead of waiting for
+        background order book refreshes, and the cancel all is repeated while orders remain.
+
+        Returns:
+            `True` if no open order is left.
+        """
+        start_time = time.monotonic()
+        deadline = start_time + timeout
+        self._shutting_down = True
+
+        while True:
+            self.logger.info("Cancelling all open orders...")
+            self.cancel_all_orders_now()
+
+            orders = self._run_get_orders()
+            if (
+                orders is not None
+                and len(orders) == 0
+                and self._currently_placing_orders == 0
+            ):
+                time_to_flat.labels(trigger="shutdown").observe(
+                    time.monotonic() - start_time
+                )
+                self.logger.info(
+                    f"All orders successfully cancelled in {time.monotonic() - start_time:.2f} seconds!"
+                )
+                return True
+
+            if time.monotonic() >= deadline:
+                open_orders = len(orders) if orders is not None else "unknown"
+                self.logger.warning(
+                    f"Giving up on the cancellation after {timeout} seconds, open keeper orders: {open_orders}"
+                )
+                return False
+
+            time.sleep(min(0.5, max(0, deadline - time.monotonic())))
+
+    def cancel_all_orders_now(self) -> bool:
+        """
+        Issues a single cancel all straight away, in the calling thread, without waiting
+        for pending placements or order book refreshes.
+
+        Returns:
+            `True` if the cancel all was acknowledged.
+        """
+        assert callable(self.cancel_all_orders_function)
+
+        # the open orders known so far, read without the balances which may never have been fetched
+        with self._lock:
+            state = self._state if self._state is not None else {}
+            orders = list(state.get("orders") or [])
+            order_ids = {order.id for order in orders}
+            orders += [
+                order for order in self._orders_placed if order.id not in order_ids
+            ]
+            for order in orders:
+                self._order_ids_cancelling.add(order.id)
 
-        self.logger.info("All orders successfully cancelled!")
+        self.logger.info(f"Cancelling all {len(orders)} open orders now...")
+        return self._thread_cancel_all_orders(self.cancel_all_orders_function, orders)()
 
     def wait_for_order_cancellation(self):
         """Wait until no background order cancellation takes place."""
@@ -356,7 +445,14 @@ class OrderBookManager:
                 orders = self._run_get_orders()
 
                 # get balances
-                balances = self._run_get_balances()
+                self._refresh_now.clear()
+                if self._balances_on_demand and not self._balances_stale:
+                    balances = None
+                else:
+                    self._balances_stale = False
+                    balances = self._run_get_balances()
+                    if balances is None:
+                        self._balances_stale = True
 
                 with self._lock:
                     self._order_ids_cancelled = (
@@ -393,7 +489,7 @@ class OrderBookManager:
             except ValueError as e:
                 self.logger.error(f"Failed to fetch the order book or balances ({e})!")
 
-            time.sleep(self.refresh_frequency)
+            self._refresh_now.wait(self.refresh_frequency)
 
     def _thread_place_order(
         self, place_order_function: Callable[[Order], Order], order: Order
@@ -402,6 +498,9 @@ class OrderBookManager:
 
         def func():
             try:
+                if self._shutting_down:
+                    self.logger.info("Not placing the order, shutting down")
+                    return
                 new_order = place_order_function(order)
 
                 if new_order is not None:
@@ -414,7 +513,8 @@ class OrderBookManager:
                     self._currently_placing_orders -= 1
                 self._report_order_book_updated()
 
-        return func
+        # the callbacks run for the cycle which submitted them
+        return bind_cycle(func)
 
     def _thread_cancel_order(
         self, cancel_order_function: Callable[[Order], None], order: Order
@@ -439,7 +539,7 @@ class OrderBookManager:
                         pass
                 self._report_order_book_updated()
 
-        return func
+        return bind_cycle(func)
 
     def _thread_cancel_all_orders(
         self,
@@ -450,8 +550,10 @@ class OrderBookManager:
 
         def func():
             order_ids = [order.id for order in orders]
+            success = False
             try:
                 if cancel_all_orders_function(orders):
+                    success = True
                     with self._lock:
                         for order_id in order_ids:
                             self._order_ids_cancelled.add(order_id)
@@ -466,5 +568,6 @@ class OrderBookManager:
                         except KeyError:
                             pass
                 self._report_order_book_updated()
+            return success
 
-        return func
+        return bind_cycle(func)
@@ -1,24 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor, wait
 from enum import Enum
 import logging
+import statistics
+import threading
+import time
 
 from poly_market_maker.clob_api import ClobApi
 from poly_market_maker.market import Market
 from poly_market_maker.token import Token
+from poly_market_maker.tracing import trace
 
 
 class PriceFeedSource(Enum):
     CLOB = "clob"
+    CLOB_COMPLEMENT = "clob_complement"
+    BOOK = "book"
+    LAST_TRADE = "last_trade"
+
+
+class PriceAggregation(Enum):
+    MEDIAN = "median"
+    WEIGHTED = "weighted"
 
 
 class PriceFeed:
-    """Market mid price resolvers"""
+    """Market mid price resolvers
+
+    Attributes:
+        -last_update_time: Monotonic time of the last successful price fetch.
+        -last_error_time: Monotonic time of the last failed price fetch.
+        -last_prices: Last fetched price of every token.
+    """
 
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.last_update_time = None
+        self.last_error_time = None
+        self.last_prices = {}
 
     def get_price(self) -> float:
         raise NotImplemented()
 
+    def latest_price(self, token: Token) -> float:
+        """
+        The last observed price, without fetching it, `None` if it was never fetched
+        """
+        return self.last_prices.get(token)
+
+    def is_stale(self, max_age: float) -> bool:
+        """
+        Whether the feed failed since its last successful fetch, or that fetch is older than max_age seconds
+        """
+        if self.last_update_time is None:
+            return True
+        if (
+            self.last_error_time is not None
+            and self.last_error_time >= self.last_update_time
+        ):
+            return True
+        return time.monotonic() - self.last_update_time > max_age
+
+    def _record_update(self, token: Token = None, price: float = None):
+        self.last_update_time = time.monotonic()
+        if token is not None:
+            self.last_prices[token] = price
+
+    def _record_error(self):
+        self.last_error_time = time.monotonic()
+
 
 class PriceFeedClob(PriceFeed):
     """Resolves the prices from the clob"""
@@ -38,4 +87,172 @@ class PriceFeedClob(PriceFeed):
         self.logger.debug("Fetching target price using the clob midpoint price...")
         target_price = self.clob_api.get_price(token_id)
         self.logger.debug(f"target_price: {target_price}")
+
+        if target_price is None:
+            self._record_error()
+        else:
+            self._record_update(token, target_price)
+            trace("price", token=token.value, price=target_price)
         return target_price
+
+
+class PriceFeedAggregate(PriceFeed):
+    """Resolves the price by combining several sources, fetched concurrently.
+
+    Every source keeps its last good price for `ttl` seconds, so that a source which
+    is slow or failing is served from the cache instead of blocking the cycle.
+
+    Attributes:
+        sources: Price sources to query. Each resolves the price of Token.A:
+            - CLOB: midpoint of Token.A.
+            - CLOB_COMPLEMENT: 1 - midpoint of Token.B.
+            - BOOK: microprice of the Token.A order book.
+            - LAST_TRADE: last trade price of Token.A.
+        aggregation: Rule used to combine the source prices.
+        weights: Optional weight per source for the weighted rule (default: 1.0).
+        timeout: Shared deadline (in seconds) for all the sources of a fetch.
+        ttl: Time (in seconds) a source price stays usable after it was fetched.
+    """
+
+    def __init__(
+        self,
+        market: Market,
+        clob_api: ClobApi,
+        sources: list[PriceFeedSource],
+        aggregation: PriceAggregation = PriceAggregation.MEDIAN,
+        weights: dict = None,
+        timeout: float = 2.0,
+        ttl: float = 30.0,
+    ):
+        super().__init__()
+
+        assert isinstance(market, Market)
+        assert isinstance(clob_api, ClobApi)
+        assert isinstance(sources, list) and len(sources) > 0
+        assert isinstance(aggregation, PriceAggregation)
+
+        self.market = market
+        self.clob_api = clob_api
+        self.sources = sources
+        self.aggregation = aggregation
+        self.weights = weights if weights is not None else {}
+        self.timeout = timeout
+        self.ttl = ttl
+
+        # a single fetch in flight per source, so a hung source can't take every thread
+        self._executor = ThreadPoolExecutor(max_workers=len(sources))
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._samples = {}
+
+    def get_price(self, token: Token) -> float:
+        price = self._get_price_a()
+        if price is not None:
+            trace("price", token=Token.A.value, price=price)
+        if price is None or token == Token.A:
+            return price
+        return 1 - price
+
+    def latest_price(self, token: Token) -> float:
+        """
+        The price aggregated from the source prices fetched so far, without fetching them.
+        Fetches still in flight from an earlier call are included once they complete.
+        """
+        price = self._aggregate_samples()
+        if price is None or token == Token.A:
+            return price
+        return 1 - price
+
+    def _aggregate_samples(self) -> float:
+        now = time.monotonic()
+        with self._lock:
+            prices = {
+                source: price
+                for (source, (price, fetched_at)) in self._samples.items()
+                if now - fetched_at <= self.ttl
+            }
+        if len(prices) == 0:
+            return None
+        return self._aggregate(prices)
+
+    def _get_price_a(self) -> float:
+        futures = []
+        with self._lock:
+            for source in self.sources:
+                future = self._pending.get(source)
+                if future is None or future.done():
+                    future = self._executor.submit(self._fetch_sample, source)
+                    self._pending[source] = future
+                futures.append(future)
+
+        wait(futures, timeout=self.timeout)
+
+        now = time.monotonic()
+        with self._lock:
+            samples = {
+                source: sample
+                for (source, sample) in self._samples.items()
+                if now - sample[1] <= self.ttl
+            }
+
+        if len(samples) == 0:
+            self.logger.error("No price source is available")
+            self._record_error()
+            return None
+
+        price = self._aggregate(
+            {source: price for (source, (price, _)) in samples.items()}
+        )
+        self.last_update_time = max(fetched_at for (_, fetched_at) in samples.values())
+        self.logger.debug(f"Aggregated price {price} from {len(samples)} source(s)")
+        return price
+
+    def _aggregate(self, prices: dict) -> float:
+        match self.aggregation:
+            case PriceAggregation.MEDIAN:
+                return statistics.median(prices.values())
+            case PriceAggregation.WEIGHTED:
+                weights = {source: self.weights.get(source, 1.0) for source in prices}
+                return sum(prices[source] * weights[source] for source in prices) / sum(
+                    weights.values()
+                )
+
+    def _fetch_sample(self, source: PriceFeedSource):
+        try:
+            price = self._fetch(source)
+        except Exception as e:
+            self.logger.error(f"Error fetching price from source {source.value}: {e}")
+            return
+
+        if price is None or not 0 < price < 1:
+            self.logger.warning(f"Source {source.value} returned no valid price")
+            return
+
+        with self._lock:
+            self._samples[source] = (price, time.monotonic())
+
+    def _fetch(self, source: PriceFeedSource) -> float:
+        token_id = self.market.token_id(Token.A)
+
+        match source:
+            case PriceFeedSource.CLOB:
+                return self.clob_api.get_price(token_id)
+            case PriceFeedSource.CLOB_COMPLEMENT:
+                price = self.clob_api.get_price(self.market.token_id(Token.B))
+                return 1 - price if price is not None else None
+            case PriceFeedSource.BOOK:
+                return self._microprice(self.clob_api.get_order_book(token_id))
+            case PriceFeedSource.LAST_TRADE:
+                return self.clob_api.get_last_trade_price(token_id)
+
+    @staticmethod
+    def _microprice(book: dict) -> float:
+        """Size weighted mid of the best bid and ask"""
+        if book is None or len(book["bids"]) == 0 or len(book["asks"]) == 0:
+            return None
+
+        (bid, bid_size) = max(book["bids"])
+        (ask, ask_size) = min(book["asks"])
+        if bid_size + ask_size <= 0:
+            return (bid + ask) / 2
+        return (bid * ask_size + ask * bid_size) / (bid_size + ask_size)
@@ -3,7 +3,14 @@ from math import sqrt
 
 from poly_market_maker.token import Token, Collateral
 from poly_market_maker.order import Order, Side
-from poly_market_maker.utils import math_round_down
+from poly_market_maker.constants import MAX_DECIMALS
+from poly_market_maker.fixed_point import (
+    to_ticks,
+    from_ticks,
+    to_units,
+    from_units,
+    round_down_units,
+)
 
 
 class AMMConfig:
@@ -48,64 +55,82 @@ class AMM:
         self.depth = config.depth
         self.max_collateral = config.max_collateral
 
+        # the price ladder is computed in integer ticks
+        self.p_min_ticks = to_ticks(config.p_min)
+        self.p_max_ticks = to_ticks(config.p_max)
+        self.delta_ticks = to_ticks(config.delta)
+        self.spread_ticks = to_ticks(config.spread)
+        self.depth_ticks = to_ticks(config.depth)
+
+        if self.delta_ticks <= 0:
+            raise Exception("Delta is smaller than the minimum tick.")
+
     def set_price(self, p_i: float):
+        p_i_ticks = to_ticks(p_i)
+        p_u_ticks = min(p_i_ticks + self.depth_ticks, self.p_max_ticks)
+        p_l_ticks = max(p_i_ticks - self.depth_ticks, self.p_min_ticks)
+
         self.p_i = p_i
-        self.p_u = round(min(p_i + self.depth, self.p_max), 2)
-        self.p_l = round(max(p_i - self.depth, self.p_min), 2)
+        self.p_u = from_ticks(p_u_ticks)
+        self.p_l = from_ticks(p_l_ticks)
+
+        self.buy_ticks = list(
+            range(p_i_ticks - self.spread_ticks, p_l_ticks - 1, -self.delta_ticks)
+        )
+        self.sell_ticks = list(
+            range(p_i_ticks + self.spread_ticks, p_u_ticks + 1, self.delta_ticks)
+        )
 
-        self.buy_prices = []
-        price = round(self.p_i - self.spread, 2)
-        while price >= self.p_l:
-            self.buy_prices.append(price)
-            price = round(price - self.delta, 2)
+    @property
+    def buy_prices(self) -> list[float]:
+        return [from_ticks(ticks) for ticks in self.buy_ticks]
 
-        self.sell_prices = []
-        price = round(self.p_i + self.spread, 2)
-        while price <= self.p_u:
-            self.sell_prices.append(price)
-            price = round(price + self.delta, 2)
+    @property
+    def sell_prices(self) -> list[float]:
+        return [from_ticks(ticks) for ticks in self.sell_ticks]
 
     def get_sell_orders(self, x):
-        sizes = [
-            # round down to avoid too large orders
-            math_round_down(size, 2)
-            for size in self.diff([self.sell_size(x, p_t) for p_t in self.sell_prices])
-        ]
+        sizes = self._to_size_units(
+            self.diff([self.sell_size(x, p_t) for p_t in self.sell_prices])
+        )
 
         orders = [
-            Order(
-                price=price,
+            Order.from_ticks(
+                price_ticks=price_ticks,
                 side=Side.SELL,
                 token=self.token,
-                size=size,
+                size_units=size_units,
             )
-            for (price, size) in zip(self.sell_prices, sizes)
+            for (price_ticks, size_units) in zip(self.sell_ticks, sizes)
         ]
 
         return orders
 
     def get_buy_orders(self, y):
-        sizes = [
-            # round down to avoid too large orders
-            math_round_down(size, 2)
-            for size in self.diff([self.buy_size(y, p_t) for p_t in self.buy_prices])
-        ]
+        sizes = self._to_size_units(
+            self.diff([self.buy_size(y, p_t) for p_t in self.buy_prices])
+        )
 
         orders = [
-            Order(
-                price=price,
+            Order.from_ticks(
+                price_ticks=price_ticks,
                 side=Side.BUY,
                 token=self.token,
-                size=size,
+                size_units=size_units,
             )
-            for (price, size) in zip(self.buy_prices, sizes)
+            for (price_ticks, size_units) in zip(self.buy_ticks, sizes)
         ]
 
         return orders
 
+    @staticmethod
+    def _to_size_units(sizes: list[float]) -> list[int]:
+        # round down to avoid too large orders
+        return [round_down_units(to_units(size), MAX_DECIMALS) for size in sizes]
+
     def phi(self):
         return (1 / (sqrt(self.p_i) - sqrt(self.p_l))) * (
-            1 / sqrt(self.buy_prices[0]) - 1 / sqrt(self.p_i)
+            1 / sqrt(from_ticks(self.buy_ticks[0])) - 1 / sqrt(self.p_i)
         )
 
     def sell_size(self, x, p_t):
@@ -186,6 +211,10 @@ class AMMManager:
         collateral_allocation_b = collateral_balance - collateral_allocation_a
 
         return (
-            math_round_down(collateral_allocation_a, 2),
-            math_round_down(collateral_allocation_b, 2),
+            from_units(
+                round_down_units(to_units(collateral_allocation_a), MAX_DECIMALS)
+            ),
+            from_units(
+                round_down_units(to_units(collateral_allocation_b), MAX_DECIMALS)
+            ),
         )
@@ -2,8 +2,15 @@ import itertools
 import logging
 
 from poly_market_maker.token import Token
-from poly_market_maker.constants import MIN_TICK, MIN_SIZE, MAX_DECIMALS
+from poly_market_maker.constants import MIN_TICK, MIN_SIZE, MAX_DECIMALS, PRICE_SCALE
 from poly_market_maker.order import Order, Side
+from poly_market_maker.fixed_point import (
+    to_ticks,
+    to_units,
+    from_units,
+    round_down_units,
+    cost_units,
+)
 
 
 class Band:
@@ -51,11 +58,14 @@ class Band:
     ) -> list[Order]:
         """Return orders which need to be cancelled to bring the total order amount in the band below maximum."""
         self.logger.debug("Running excessive orders.")
+        target_ticks = to_ticks(target_price)
         # Get all orders which are currently present in the band.
         orders_in_band = [
-            order for order in orders if self.includes(order, target_price)
+            order for order in orders if self.includes(order, target_ticks)
         ]
-        orders_total_size = sum(order.size for order in orders_in_band)
+        orders_total_size = from_units(
+            sum(order.size_units for order in orders_in_band)
+        )
 
         # The sorting in which we remove orders depends on which band we are in.
         # * In the first band we start cancelling with orders closest to the target price.
@@ -63,10 +73,10 @@ class Band:
         # * In remaining cases we remove orders starting from the smallest one.
 
         def price_sorting(order):
-            return abs(order.price - target_price)
+            return abs(order.price_ticks - target_ticks)
 
         def size_sorting(order):
-            return order.size
+            return order.size_units
 
         if is_first_band:
             sorting = price_sorting
@@ -80,12 +90,13 @@ class Band:
 
         orders_in_band = sorted(orders_in_band, key=sorting, reverse=reverse)
         orders_for_cancellation = []
-        band_amount = sum(order.size for order in orders_in_band)
+        band_amount = sum(order.size_units for order in orders_in_band)
+        max_amount = to_units(self.max_amount)
 
-        while band_amount > self.max_amount:
+        while band_amount > max_amount:
             order = orders_in_band.pop()
             orders_for_cancellation.append(order)
-            band_amount -= order.size
+            band_amount -= order.size_units
 
         if len(orders_for_cancellation) > 0:
             self.logger.info(
@@ -96,32 +107,31 @@ class Band:
 
         return orders_for_cancellation
 
-    def includes(self, order: Order, target_price: float) -> bool:
+    def includes(self, order: Order, target_ticks: int) -> bool:
         if order.side == Side.BUY:
-            price = order.price
+            price_ticks = order.price_ticks
         else:
-            # round to 6 decimals to avoid floating point issues
-            price = round(1 - order.price, MAX_DECIMALS)
+            price_ticks = PRICE_SCALE - order.price_ticks
 
-        return (price > self.min_price(target_price)) and (
-            price <= self.max_price(target_price)
+        return (price_ticks > self.min_price(target_ticks)) and (
+            price_ticks <= self.max_price(target_ticks)
         )
 
     @staticmethod
-    def _apply_margin(price: float, margin: float) -> float:
-        return round(price - margin, MAX_DECIMALS)
+    def _apply_margin(price_ticks: int, margin: float) -> int:
+        return price_ticks - to_ticks(margin)
 
-    def min_price(self, target_price: float) -> float:
-        return self._apply_margin(target_price, self.max_margin)
+    def min_price(self, target_ticks: int) -> int:
+        return self._apply_margin(target_ticks, self.max_margin)
 
-    def buy_price(self, target_price: float) -> float:
-        return self._apply_margin(target_price, self.avg_margin)
+    def buy_price(self, target_ticks: int) -> int:
+        return self._apply_margin(target_ticks, self.avg_margin)
 
-    def sell_price(self, target_price: float) -> float:
-        return self._apply_margin(1 - target_price, -self.avg_margin)
+    def sell_price(self, target_ticks: int) -> int:
+        return self._apply_margin(PRICE_SCALE - target_ticks, -self.avg_margin)
 
-    def max_price(self, target_price: float) -> float:
-        return self._apply_margin(target_price, self.min_margin)
+    def max_price(self, target_ticks: int) -> int:
+        return self._apply_margin(target_ticks, self.min_margin)
 
     def __repr__(self):
         return f"Band[spread<{self.min_margin}, {self.max_margin}>, amount<{self.min_amount}, {self.max_amount}>]"
@@ -153,12 +163,13 @@ class Bands:
         if target_price <= 0.0:
             return []
 
+        target_ticks = to_ticks(target_price)
         virtual_bands = []
         # increase avg_price if necessary
         # any bands with max_price <= 0 will not be used
         for band in self.bands:
-            if band.max_price(target_price) > 0:
-                if band.buy_price(target_price) <= 0:
+            if band.max_price(target_ticks) > 0:
+                if band.buy_price(target_ticks) <= 0:
                     band.avg_margin = target_price - MIN_TICK
                 virtual_bands.append(band)
         return virtual_bands
@@ -188,8 +199,9 @@ class Bands:
         assert isinstance(bands, list)
         assert isinstance(target_price, float)
 
+        target_ticks = to_ticks(target_price)
         for order in orders:
-            if not any(band.includes(order, target_price) for band in bands):
+            if not any(band.includes(order, target_ticks) for band in bands):
                 self.logger.info(
                     f"Order #{order.id} doesn't belong to any band, scheduling it for cancellation"
                 )
@@ -234,20 +246,27 @@ class Bands:
         assert isinstance(target_price, float)
 
         sell_token = buy_token.complement()
+        target_ticks = to_ticks(target_price)
+        collateral_units = to_units(collateral_balance)
+        token_units = to_units(token_balance)
         new_orders = []
         for band in self._calculate_virtual_bands(target_price):
             band_amount = sum(
-                order.size for order in orders if band.includes(order, target_price)
+                order.size_units
+                for order in orders
+                if band.includes(order, target_ticks)
             )
 
-            self.logger.debug(f"{band} has existing amount {band_amount},")
+            self.logger.debug(f"{band} has existing amount {from_units(band_amount)},")
+
+            if band_amount < to_units(band.min_amount):
+                avg_amount = to_units(band.avg_amount)
 
-            if band_amount < band.min_amount:
                 # sell
-                sell_price = band.sell_price(target_price)
+                sell_price = band.sell_price(target_ticks)
 
-                sell_size = round(
-                    min(band.avg_amount - band_amount, token_balance),
+                sell_size = round_down_units(
+                    min(avg_amount - band_amount, token_units),
                     MAX_DECIMALS,
                 )
                 sell_order = self._new_order(
@@ -256,16 +275,16 @@ class Bands:
 
                 if sell_order is not None:
                     band_amount += sell_size
-                    token_balance -= sell_size
+                    token_units -= sell_size
                     new_orders.append(sell_order)
 
-                if band_amount < band.avg_amount:
+                if band_amount < avg_amount:
                     # buy
-                    buy_price = band.buy_price(target_price)
-                    buy_size = round(
+                    buy_price = band.buy_price(target_ticks)
+                    buy_size = round_down_units(
                         min(
-                            band.avg_amount - band_amount,
-                            collateral_balance / buy_price,
+                            avg_amount - band_amount,
+                            collateral_units * PRICE_SCALE // buy_price,
                         ),
                         MAX_DECIMALS,
                     )
@@ -275,28 +294,37 @@ class Bands:
 
                     if buy_order is not None:
                         band_amount += buy_size
-                        collateral_balance -= buy_size * buy_price
+                        collateral_units -= cost_units(buy_size, buy_price)
                         new_orders.append(buy_order)
 
         return new_orders
 
-    def _new_order(self, price: float, size: float, side: Side, token: Token) -> Order:
+    def _new_order(
+        self, price_ticks: int, size_units: int, side: Side, token: Token
+    ) -> Order:
         """
         Return sell orders which need to be placed to bring total amounts within all sell bands above minimums
         """
 
-        if not self._new_order_is_valid(price, size):
+        if not self._new_order_is_valid(price_ticks, size_units):
             return None
 
+        order = Order.from_ticks(
+            price_ticks=price_ticks, size_units=size_units, side=side, token=token
+        )
         self.logger.debug(
-            f"Creating new {side} order with price {price} and size: {size}"
+            f"Creating new {side} order with price {order.price} and size: {order.size}"
         )
 
-        return Order(price=price, size=size, side=side, token=token)
+        return order
 
     @staticmethod
-    def _new_order_is_valid(price, size):
-        return (price > float(0)) and (price < float(1.0)) and (size >= MIN_SIZE)
+    def _new_order_is_valid(price_ticks: int, size_units: int):
+        return (
+            (price_ticks > 0)
+            and (price_ticks < PRICE_SCALE)
+            and (size_units >= to_units(MIN_SIZE))
+        )
 
     @staticmethod
     def _bands_overlap(bands: list[Band]):
@@ -1,9 +1,16 @@
 from poly_market_maker.token import Token, Collateral
-from poly_market_maker.order import Order, Side
+from poly_market_maker.order import Order, OrderSet, Side
 from poly_market_maker.orderbook import OrderBook
+from poly_market_maker.constants import MIN_SIZE
+from poly_market_maker.fixed_point import to_units, from_units
 
 from poly_market_maker.strategies.bands import Bands
 from poly_market_maker.strategies.base_strategy import BaseStrategy
+from poly_market_maker.strategies.reconciliation import (
+    Reconciler,
+    Tolerance,
+    CancelExcess,
+)
 
 
 class BandsStrategy(BaseStrategy):
@@ -20,6 +27,9 @@ class BandsStrategy(BaseStrategy):
             self.logger.exception(
                 f"Config is invalid ({e}). Treating the config as if it has no bands."
             )
+        self.reconciler = Reconciler(
+            min_size=MIN_SIZE, tolerance=Tolerance(), amend_policy=CancelExcess()
+        )
 
     def get_orders(self, orderbook: OrderBook, target_prices):
         """
@@ -31,68 +41,74 @@ class BandsStrategy(BaseStrategy):
         for token in Token:
             self.logger.debug(f"{token.value} target price: {target_prices[token]}")
 
+        order_set = OrderSet(orderbook.orders)
+        orders_by_buy_token = {
+            token: self._orders_by_corresponding_buy_token(order_set, token)
+            for token in Token
+        }
+
         # cancel orders
         for token in Token:
-            orders = self._orders_by_corresponding_buy_token(orderbook.orders, token)
+            orders = orders_by_buy_token[token]
             orders_to_cancel += self.bands.cancellable_orders(
-                orders, target_prices[token]
+                orders.to_list(), target_prices[token]
             )
 
         # remaining open orders
-        open_orders = list(set(orders) - set(orders_to_cancel))
-        balance_locked_by_open_buys = sum(
-            order.size * order.price for order in open_orders if order.side == Side.BUY
+        cancelled = set(orders_to_cancel)
+        open_orders = orders.filter([order not in cancelled for order in orders])
+        balance_locked_by_open_buys = open_orders.select(side=Side.BUY).total_cost()
+        self.logger.debug(
+            f"Collateral locked by buys: {from_units(balance_locked_by_open_buys)}"
         )
-        self.logger.debug(f"Collateral locked by buys: {balance_locked_by_open_buys}")
 
         free_collateral_balance = (
-            orderbook.balances[Collateral] - balance_locked_by_open_buys
+            to_units(orderbook.balances[Collateral]) - balance_locked_by_open_buys
+        )
+        self.logger.debug(
+            f"Free collateral balance: {from_units(free_collateral_balance)}"
         )
-        self.logger.debug(f"Free collateral balance: {free_collateral_balance}")
 
         # place orders
         for token in Token:
-            orders = self._orders_by_corresponding_buy_token(orderbook.orders, token)
+            orders = orders_by_buy_token[token]
 
-            balance_locked_by_open_sells = sum(
-                order.size for order in orders if order.side == Side.SELL
-            )
+            balance_locked_by_open_sells = orders.select(side=Side.SELL).total_size()
             self.logger.debug(
-                f"{token.complement().value} locked by sells: {balance_locked_by_open_sells}"
+                f"{token.complement().value} locked by sells: {from_units(balance_locked_by_open_sells)}"
             )
 
             free_token_balance = (
-                orderbook.balances[token.complement()] - balance_locked_by_open_sells
+                to_units(orderbook.balances[token.complement()])
+                - balance_locked_by_open_sells
             )
             self.logger.debug(
-                f"Free {token.complement().value} balance: {free_token_balance}"
+                f"Free {token.complement().value} balance: {from_units(free_token_balance)}"
             )
 
             new_orders = self.bands.new_orders(
-                orders,
-                free_collateral_balance,
-                free_token_balance,
+                orders.to_list(),
+                from_units(free_collateral_balance),
+                from_units(free_token_balance),
                 target_prices[token],
                 token,
             )
-            free_collateral_balance -= sum(
-                order.size * order.price
-                for order in new_orders
-                if order.side == Side.BUY
+            free_collateral_balance -= (
+                OrderSet(new_orders).select(side=Side.BUY).total_cost()
             )
             orders_to_place += new_orders
 
-        return (orders_to_cancel, orders_to_place)
-
-    def _orders_by_corresponding_buy_token(self, orders: list[Order], buy_token: Token):
-        return list(
-            filter(
-                lambda order: self._filter_by_corresponding_buy_token(order, buy_token),
-                orders,
-            )
-        )
-
-    def _filter_by_corresponding_buy_token(self, order: Order, buy_token: Token):
-        return (order.side == Side.BUY and order.token == buy_token) or (
-            order.side == Side.SELL and order.token != buy_token
-        )
+        # net the band decisions out against the open orders, so that a cancel and
+        # a place on the same price level become at most a single cancel or top up
+        target_orders = [
+            order for order in orderbook.orders if order not in cancelled
+        ] + orders_to_place
+        return self.reconciler.reconcile(target_orders, orderbook.orders)
+
+    @staticmethod
+    def _orders_by_corresponding_buy_token(
+        order_set: OrderSet, buy_token: Token
+    ) -> OrderSet:
+        buys = order_set.mask(side=Side.BUY, token=buy_token)
+        sells = order_set.mask(side=Side.SELL, token=buy_token.complement())
+        return order_set.filter([buy or sell for (buy, sell) in zip(buys, sells)])
@@ -0,0 +1,131 @@
+import logging
+from typing import Tuple
+
+from poly_market_maker.constants import MIN_SIZE, MAX_DECIMALS
+from poly_market_maker.order import Order, OrderSet
+from poly_market_maker.fixed_point import to_units, round_down_units
+
+
+class Tolerance:
+    """Accepts an open price level if its size is within `size` of the target size"""
+
+    def __init__(self, size: float = 0.0):
+        assert isinstance(size, float)
+
+        self.size_units = to_units(size)
+
+    def accepts(self, open_size_units: int, target_size_units: int) -> bool:
+        return abs(open_size_units - target_size_units) <= self.size_units
+
+
+class AmendPolicy:
+    """Decides which orders to cancel on a price level holding more than its target size"""
+
+    def orders_to_cancel(
+        self, open_orders: list[Order], target_size_units: int
+    ) -> list[Order]:
+        raise NotImplementedError()
+
+
+class CancelReplace(AmendPolicy):
+    """Cancels every order on the price level, the target size is then placed again"""
+
+    def orders_to_cancel(
+        self, open_orders: list[Order], target_size_units: int
+    ) -> list[Order]:
+        return list(open_orders)
+
+
+class CancelExcess(AmendPolicy):
+    """Keeps the largest orders which fit in the target size and cancels the rest"""
+
+    def orders_to_cancel(
+        self, open_orders: list[Order], target_size_units: int
+    ) -> list[Order]:
+        kept_size_units = 0
+        orders_to_cancel = []
+        for order in sorted(open_orders, key=lambda order: -order.size_units):
+            if kept_size_units + order.size_units <= target_size_units:
+                kept_size_units += order.size_units
+            else:
+                orders_to_cancel.append(order)
+        return orders_to_cancel
+
+
+class Reconciler:
+    """Computes the cancels and places which bring the open orders to a target ladder.
+
+    Both sides are grouped by (token, side, price) with `OrderSet`. Price levels
+    without a target are cancelled, levels within tolerance are left alone, levels
+    above target are amended according to the amend policy and levels below target
+    are topped up with a single new order.
+
+    Attributes:
+        min_size: Minimum size of a newly placed order.
+        tolerance: Tolerance used to accept a price level as it is.
+        amend_policy: Policy used on price levels above target size.
+    """
+
+    def __init__(
+        self,
+        min_size: float = MIN_SIZE,
+        tolerance: Tolerance = None,
+        amend_policy: AmendPolicy = None,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        assert isinstance(min_size, float)
+
+        self.min_size_units = to_units(min_size)
+        self.tolerance = tolerance if tolerance is not None else Tolerance()
+        self.amend_policy = (
+            amend_policy if amend_policy is not None else CancelReplace()
+        )
+
+    def reconcile(
+        self, target_orders: list[Order], open_orders: list[Order]
+    ) -> Tuple[list[Order], list[Order]]:
+        """Return the orders to cancel and the orders to place"""
+        target_sizes = OrderSet(target_orders).size_by_key()
+        open_levels = OrderSet(open_orders).group_by_key()
+
+        orders_to_cancel = [
+            order
+            for (key, level) in open_levels.items()
+            if key not in target_sizes
+            for order in level
+        ]
+
+        orders_to_place = []
+        for key, target_size_units in target_sizes.items():
+            level = open_levels.get(key, [])
+            open_size_units = sum(order.size_units for order in level)
+
+            if self.tolerance.accepts(open_size_units, target_size_units):
+                continue
+
+            if open_size_units > target_size_units:
+                cancels = self.amend_policy.orders_to_cancel(level, target_size_units)
+                orders_to_cancel += cancels
+                open_size_units -= sum(order.size_units for order in cancels)
+
+            new_size_units = round_down_units(
+                target_size_units - open_size_units, MAX_DECIMALS
+            )
+            if new_size_units >= self.min_size_units:
+                (token, side, price_ticks) = key
+                orders_to_place.append(
+                    Order.from_ticks(
+                        size_units=new_size_units,
+                        price_ticks=price_ticks,
+                        side=side,
+                        token=token,
+                    )
+                )
+
+        self.logger.debug(
+            f"Reconciled {len(open_orders)} open orders against {len(target_sizes)} price levels: "
+            f"{len(orders_to_cancel)} to cancel, {len(orders_to_place)} to place"
+        )
+
+        return (orders_to_cancel, orders_to_place)
@@ -1,16 +1,28 @@
 from enum import Enum
+import itertools
 import json
 import logging
+import os
+import threading
+import time
 
 from poly_market_maker.orderbook import OrderBookManager
+from poly_market_maker.execution import split_orders_to_place
+from poly_market_maker.metrics import sync_cycles_counter, sync_cycle_duration
 from poly_market_maker.price_feed import PriceFeed
+from poly_market_maker.kill_switch import KillSwitch
 from poly_market_maker.token import Token, Collateral
-from poly_market_maker.constants import MAX_DECIMALS
+from poly_market_maker.constants import PRICE_SCALE
+from poly_market_maker.fixed_point import to_ticks, from_ticks
+from poly_market_maker.tracing import cycle, span, trace
 
 from poly_market_maker.strategies.base_strategy import BaseStrategy
 from poly_market_maker.strategies.amm_strategy import AMMStrategy
+from poly_market_maker.strategies.bands import Bands
 from poly_market_maker.strategies.bands_strategy import BandsStrategy
 
+MAX_FRESH_CYCLES = 1
+
 
 class Strategy(Enum):
     AMM = "amm"
@@ -26,51 +38,287 @@ class Strategy(Enum):
 
 
 class StrategyManager:
+    """Runs the strategy synchronization cycles.
+
+    Attributes:
+        cycle_budget: Time (in seconds) a cycle has to place its orders, the remaining
+            placements are abandoned past it. `None` means no deadline.
+        stale_price_threshold: Price move after which the decisions of a cycle are stale
+            and its remaining placements are abandoned, at least a tick. The price is fetched
+            again before every batch of the placements waiting on the cancels, the check before
+            the execution reads the last price observed by the price feed.
+        batch_size: Number of placements waiting on the cancels between two staleness checks.
+        kill_switch: Optional kill switch pulling all quotes while the price feed is stale.
+        watch_config: Reload the strategy config when the config file changes.
+
+    The strategy config is reloaded between cycles, on a change of the config file (with
+    `watch_config`) or on `request_reload`. The next cycle reconciles the open orders against
+    the new config, so only the orders it changes are cancelled and placed.
+    """
+
     def __init__(
         self,
         strategy: str,
         config_path: str,
         price_feed: PriceFeed,
         order_book_manager: OrderBookManager,
+        cycle_budget: float = None,
+        stale_price_threshold: float = 0.02,
+        batch_size: int = 10,
+        kill_switch: KillSwitch = None,
+        watch_config: bool = False,
     ) -> BaseStrategy:
         self.logger = logging.getLogger(self.__class__.__name__)
 
-        with open(config_path) as fh:
-            config = json.load(fh)
+        assert cycle_budget is None or isinstance(cycle_budget, (int, float))
+        assert isinstance(stale_price_threshold, float)
+        assert isinstance(batch_size, int) and batch_size > 0
+
+        self.strategy_name = Strategy(strategy)
+        self.config_path = config_path
+        self.watch_config = watch_config
+        self._config_mtime = self._get_config_mtime()
+        self._reload_requested = threading.Event()
+        self._cycle_ids = itertools.count(1)
 
         self.price_feed = price_feed
         self.order_book_manager = order_book_manager
+        self.cycle_budget = cycle_budget
+        self.stale_price_threshold_ticks = to_ticks(stale_price_threshold)
+        if self.stale_price_threshold_ticks < 1:
+            raise Exception(
+                f"Stale price threshold {stale_price_threshold} is below a tick"
+            )
+        self.batch_size = batch_size
+        self.kill_switch = kill_switch
+
+        self.strategy = self._build_strategy(self._read_config())
 
-        match Strategy(strategy):
+    def _read_config(self) -> dict:
+        with open(self.config_path) as fh:
+            return json.load(fh)
+
+    def _get_config_mtime(self):
+        try:
+            return os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _build_strategy(self, config: dict) -> BaseStrategy:
+        match self.strategy_name:
             case Strategy.AMM:
-                self.strategy = AMMStrategy(config)
+                return AMMStrategy(config)
             case Strategy.BANDS:
-                self.strategy = BandsStrategy(config)
+                return BandsStrategy(config)
             case _:
                 raise Exception("Invalid strategy")
 
+    def request_reload(self):
+        """Reload the strategy config before the next cycle, safe to call from a signal handler"""
+        self._reload_requested.set()
+
+    def reload_config(self) -> bool:
+        """
+        Read and validate the strategy config, and swap the new strategy in.
+        The current strategy is kept if the new config is invalid. Returns `True` on success.
+        """
+        try:
+            config = self._read_config()
+            if self.strategy_name == Strategy.BANDS:
+                # the bands strategy falls back to no bands on an invalid config
+                Bands(config.get("bands"))
+            strategy = self._build_strategy(config)
+        except Exception as e:
+            self.logger.error(
+                f"Invalid strategy config {self.config_path}, keeping the current one: {e}"
+            )
+            return False
+
+        self.strategy = strategy
+        self.logger.info(f"Reloaded the strategy config from {self.config_path}")
+        return True
+
+    def _maybe_reload_config(self):
+        """Reload the strategy config if requested, or if the config file changed"""
+        reload = self._reload_requested.is_set()
+        self._reload_requested.clear()
+
+        if self.watch_config:
+            mtime = self._get_config_mtime()
+            if mtime != self._config_mtime:
+                self._config_mtime = mtime
+                reload = True
+
+        if reload:
+            self.reload_config()
+
     def synchronize(self):
         self.logger.debug("Synchronizing strategy...")
 
+        # an aborted cycle is followed by a fresh one straight away
+        for _ in range(1 + MAX_FRESH_CYCLES):
+            if self._synchronize_cycle():
+                break
+            self.logger.info("Starting a fresh cycle...")
+
+        self.logger.debug("Synchronized strategy!")
+
+    def _synchronize_cycle(self) -> bool:
+        """
+        Run a single synchronization cycle. Returns `False` if the cycle was aborted.
+
+        The cycle gets a new id, carried by its logs and by the order book callbacks it triggers,
+        and the duration of the cycle and of its phases is measured.
+        """
+        # between cycles, the strategy is never swapped during one
+        self._maybe_reload_config()
+
+        with cycle(next(self._cycle_ids)) as cycle_id:
+            self.logger.debug(f"Starting cycle {cycle_id}...")
+            start_time = time.monotonic()
+            trace("cycle_start")
+            try:
+                return self._run_cycle()
+            finally:
+                trace("cycle_end")
+                sync_cycle_duration.observe(time.monotonic() - start_time)
+
+    def _run_cycle(self) -> bool:
+        deadline = (
+            time.monotonic() + self.cycle_budget
+            if self.cycle_budget is not None
+            else None
+        )
+
+        with span("price"):
+            token_prices = self.get_token_prices()
+        self.logger.debug(f"{token_prices}")
+
+        if self.kill_switch is not None and not self.kill_switch.check():
+            return True
+        if token_prices is None:
+            self.logger.error("Price is not available, skipping the cycle")
+            return True
+
         try:
-            orderbook = self.get_order_book()
+            with span("order_book"):
+                orderbook = self.get_order_book()
         except Exception as e:
             self.logger.error(f"{e}")
-            return
+            return True
 
-        token_prices = self.get_token_prices()
-        self.logger.debug(f"{token_prices}")
-        (orders_to_cancel, orders_to_place) = self.strategy.get_orders(
-            orderbook, token_prices
+        with span("strategy"):
+            (orders_to_cancel, orders_to_place) = self.strategy.get_orders(
+                orderbook, token_prices
+            )
+        trace(
+            "orders_computed",
+            cancels=len(orders_to_cancel),
+            places=len(orders_to_place),
         )
 
         self.logger.debug(f"order to cancel: {len(orders_to_cancel)}")
         self.logger.debug(f"order to place: {len(orders_to_place)}")
 
-        self.cancel_orders(orders_to_cancel)
-        self.place_orders(orders_to_place)
+        if len(orders_to_cancel) == 0 and len(orders_to_place) == 0:
+            sync_cycles_counter.labels(status="completed", reason="").inc()
+            return True
 
-        self.logger.debug("Synchronized strategy!")
+        if self._abort_reason(token_prices, deadline) is not None:
+            return False
+
+        completed = self.execute(
+            orderbook, orders_to_cancel, orders_to_place, token_prices, deadline
+        )
+        if completed:
+            sync_cycles_counter.labels(status="completed", reason="").inc()
+        return completed
+
+    def _abort_reason(self, token_prices: dict, deadline: float, fetch: bool = False):
+        """
+        Return why the decisions taken at `token_prices` must be abandoned, or `None`.
+        With `fetch`, the current price is fetched, else the last observed one is used.
+        """
+        reason = None
+        if deadline is not None and time.monotonic() > deadline:
+            self.logger.warning(
+                f"Cycle exceeded its {self.cycle_budget}s budget, abandoning it"
+            )
+            reason = "deadline"
+        else:
+            current_price = (
+                self.price_feed.get_price(Token.A)
+                if fetch
+                else self.price_feed.latest_price(Token.A)
+            )
+            if current_price is None:
+                self.logger.warning("Price is not available, abandoning the cycle")
+                reason = "price_feed"
+            elif (
+                abs(to_ticks(current_price) - to_ticks(token_prices[Token.A]))
+                >= self.stale_price_threshold_ticks
+            ):
+                self.logger.warning(
+                    f"Price moved from {token_prices[Token.A]} to {current_price}, abandoning the cycle"
+                )
+                reason = "price"
+
+        if reason is not None:
+            sync_cycles_counter.labels(status="aborted", reason=reason).inc()
+        return reason
+
+    def execute(
+        self,
+        orderbook,
+        orders_to_cancel,
+        orders_to_place,
+        token_prices=None,
+        deadline=None,
+    ) -> bool:
+        """
+        Cancel and place orders, placing the orders which don't need the balances
+        freed by the cancels at the same time as the cancels, in a single round.
+
+        When `token_prices` are given, the decisions are checked for staleness against a
+        freshly fetched price before every batch of the placements which waited on the
+        cancels, and the remaining placements are abandoned if they are. Returns `False`
+        if placements were abandoned.
+
+        The `cancel` phase is the round of the cancels, with the independent placements
+        submitted alongside, the `place` phase covers the placements which waited on them.
+        """
+        if len(orders_to_cancel) == 0:
+            with span("place"):
+                self.place_orders(orders_to_place)
+            return True
+
+        (independent_orders, dependent_orders) = split_orders_to_place(
+            orderbook, orders_to_cancel, orders_to_place
+        )
+        self.logger.info(
+            f"About to cancel {len(orders_to_cancel)} existing orders and place {len(orders_to_place)} new orders "
+            f"({len(dependent_orders)} after the cancels)!"
+        )
+        with span("cancel"):
+            self.order_book_manager.cancel_and_place_orders(
+                orders_to_cancel, independent_orders
+            )
+
+        with span("place"):
+            for start in range(0, len(dependent_orders), self.batch_size):
+                # the cancels took a round trip, the price the cycle started from may be gone
+                if (
+                    token_prices is not None
+                    and self._abort_reason(token_prices, deadline, fetch=True)
+                    is not None
+                ):
+                    self.logger.info(
+                        f"Abandoning {len(dependent_orders) - start} remaining placements"
+                    )
+                    return False
+                self.place_orders(dependent_orders[start : start + self.batch_size])
+
+        return True
 
     def get_order_book(self):
         orderbook = self.order_book_manager.get_order_book()
@@ -86,19 +334,13 @@ class StrategyManager:
         return orderbook
 
     def get_token_prices(self):
-        price_a = round(
-            self.price_feed.get_price(Token.A),
-            MAX_DECIMALS,
-        )
-        price_b = round(1 - price_a, MAX_DECIMALS)
-        return {Token.A: price_a, Token.B: price_b}
+        price = self.price_feed.get_price(Token.A)
+        if price is None:
+            return None
 
-    def cancel_orders(self, orders_to_cancel):
-        if len(orders_to_cancel) > 0:
-            self.logger.info(
-                f"About to cancel {len(orders_to_cancel)} existing orders!"
-            )
-            self.order_book_manager.cancel_orders(orders_to_cancel)
+        price_a = to_ticks(price)
+        price_b = PRICE_SCALE - price_a
+        return {Token.A: from_ticks(price_a), Token.B: from_ticks(price_b)}
 
     def place_orders(self, orders_to_place):
         if len(orders_to_place) > 0:
@@ -0,0 +1,106 @@
+"""
+Summarise the tick-to-trade latencies of a trace file written with `--trace-file`.
+
+Usage:
+    python -m poly_market_maker.trace_summary traces.jsonl [traces.jsonl ...]
+"""
+
+import argparse
+import json
+import math
+import sys
+
+PERCENTILES = [50, 90, 99]
+
+# latency: (start event, end event, which end event of the cycle)
+LATENCIES = {
+    "cycle": ("cycle_start", "cycle_end", "first"),
+    "strategy": ("price", "orders_computed", "first"),
+    "submit": ("orders_computed", "orders_submitted", "first"),
+    "ack": ("orders_submitted", "order_acked", "first"),
+    "tick_to_trade": ("price", "order_acked", "first"),
+    "tick_to_last_trade": ("price", "order_acked", "last"),
+}
+
+
+def read_events(paths: list[str]) -> list[dict]:
+    events = []
+    for path in paths:
+        with open(path) as fh:
+            for line in fh:
+                if line.strip():
+                    events.append(json.loads(line))
+    return events
+
+
+def cycle_latencies(events: list[dict]) -> dict[str, list[float]]:
+    """
+    Compute the latencies (in seconds) of every cycle. The start of a latency is the
+    first start event of the cycle, its end is the first or last end event after it.
+    """
+    cycles = {}
+    for event in events:
+        if event.get("cycle_id") is None:
+            continue
+        key = (event.get("pid"), event["cycle_id"])
+        cycles.setdefault(key, {}).setdefault(event["event"], []).append(event["time"])
+
+    latencies = {name: [] for name in LATENCIES}
+    for cycle_events in cycles.values():
+        for name, (start_event, end_event, which) in LATENCIES.items():
+            if start_event not in cycle_events or end_event not in cycle_events:
+                continue
+            start = min(cycle_events[start_event])
+            ends = [end for end in cycle_events[end_event] if end >= start]
+            if len(ends) == 0:
+                continue
+            end = min(ends) if which == "first" else max(ends)
+            latencies[name].append(end - start)
+    return latencies
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile"""
+    values = sorted(values)
+    rank = max(math.ceil(p / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def summarize(events: list[dict]) -> dict[str, dict]:
+    summary = {}
+    for name, values in cycle_latencies(events).items():
+        if len(values) == 0:
+            continue
+        summary[name] = {
+            "count": len(values),
+            **{f"p{p}": percentile(values, p) for p in PERCENTILES},
+            "max": max(values),
+        }
+    return summary
+
+
+def format_summary(summary: dict[str, dict]) -> str:
+    columns = ["count", *[f"p{p}" for p in PERCENTILES], "max"]
+    lines = [f"{'latency (ms)':<20}" + "".join(f"{c:>10}" for c in columns)]
+    for name, stats in summary.items():
+        line = f"{name:<20}{stats['count']:>10}"
+        line += "".join(f"{stats[c] * 1000:>10.1f}" for c in columns[1:])
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="trace_summary", description=__doc__)
+    parser.add_argument("paths", nargs="+", help="Trace files (JSON lines)")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args(args)
+
+    summary = summarize(read_events(args.paths))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(format_summary(summary))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from poly_market_maker.metrics import sync_phase_duration
+
+# number of trace events kept in memory between two exports
+TRACE_BUFFER_SIZE = 100000
+
+# id of the synchronization cycle the current code runs for, `None` outside of a cycle
+current_cycle_id = contextvars.ContextVar("cycle_id", default=None)
+
+
+@contextmanager
+def cycle(cycle_id: int):
+    """Run the enclosed code, and the functions bound with `bind_cycle` in it, for `cycle_id`"""
+    token = current_cycle_id.set(cycle_id)
+    try:
+        yield cycle_id
+    finally:
+        current_cycle_id.reset(token)
+
+
+@contextmanager
+def span(phase: str):
+    """Measure the duration of a phase of the synchronization cycles"""
+    start_time = time.monotonic()
+    try:
+        yield
+    finally:
+        sync_phase_duration.labels(phase=phase).observe(time.monotonic() - start_time)
+
+
+def bind_cycle(function):
+    """Bind `function` to the current cycle, so that it runs for it from any thread"""
+    cycle_id = current_cycle_id.get()
+
+    def run(*args, **kwargs):
+        with cycle(cycle_id):
+            return function(*args, **kwargs)
+
+    return run
+
+
+def install_log_record_factory():
+    """Add the id of the current cycle (or `-`) to the log records, as `cycle_id`"""
+    factory = logging.getLogRecordFactory()
+    if getattr(factory, "with_cycle_id", False):
+        return
+
+    def record_factory(*args, **kwargs):
+        record = factory(*args, **kwargs)
+        cycle_id = current_cycle_id.get()
+        record.cycle_id = cycle_id if cycle_id is not None else "-"
+        return record
+
+    record_factory.with_cycle_id = True
+    logging.setLogRecordFactory(record_factory)
+
+
+class TraceBuffer:
+    """Ring buffer of trace events, the oldest ones are dropped once it is full.
+
+    An event records its name, the monotonic time it happened at, and the current cycle id.
+    Recording is a single append, safe from any thread.
+    """
+
+    def __init__(self, capacity: int = TRACE_BUFFER_SIZE):
+        assert isinstance(capacity, int) and capacity > 0
+
+        self._events = deque(maxlen=capacity)
+
+    def record(self, event: str, **attributes):
+        self._events.append(
+            {
+                "cycle_id": current_cycle_id.get(),
+                "event": event,
+                "time": time.monotonic(),
+                **attributes,
+            }
+        )
+
+    def drain(self) -> list[dict]:
+        """Remove and return the recorded events, oldest first"""
+        events = []
+        while True:
+            try:
+                events.append(self._events.popleft())
+            except IndexError:
+                return events
+
+    def __len__(self):
+        return len(self._events)
+
+
+trace_buffer = TraceBuffer()
+
+
+def trace(event: str, **attributes):
+    """Record a trace event in the shared buffer"""
+    trace_buffer.record(event, **attributes)
+
+
+class TraceExporter:
+    """Periodically appends the trace events to a JSON lines file, one event per line.
+
+    Attributes:
+        path: Path of the JSON lines file.
+        interval: Interval (in seconds) between two exports.
+    """
+
+    def __init__(
+        self, path: str, interval: float = 5.0, buffer: TraceBuffer = trace_buffer
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        assert isinstance(path, str)
+        assert isinstance(interval, (int, float)) and interval > 0
+
+        self.path = path
+        self.interval = interval
+        self.buffer = buffer
+
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._thread_export, daemon=True).start()
+
+    def stop(self):
+        """Stop the background exports, and export the remaining events"""
+        self._stopped.set()
+        self.export()
+
+    def export(self) -> int:
+        """Append the buffered events to the file, returns the number of events exported"""
+        with self._lock:
+            events = self.buffer.drain()
+            if len(events) == 0:
+                return 0
+
+            # the cycle ids and monotonic times are only comparable within a process
+            pid = os.getpid()
+            with open(self.path, "a") as fh:
+                for event in events:
+                    fh.write(json.dumps({"pid": pid, **event}, default=str) + "\n")
+        return len(events)
+
+    def _thread_export(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.export()
+            except Exception as e:
+                self.logger.error(f"Failed to export the traces: {e}")
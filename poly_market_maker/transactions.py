@@ -0,0 +1,238 @@
+import logging
+import threading
+import time
+
+from eth_account import Account
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+from poly_market_maker.gas import GasStation
+from poly_market_maker.metrics import chain_requests_counter
+
+# minimum fee increase accepted by the nodes to replace a pending transaction is 10%
+DEFAULT_FEE_BUMP = 1.125
+
+
+class NonceManager:
+    """Hands out consecutive nonces locally, instead of asking the node before every transaction
+
+    Attributes:
+        w3: Web3 instance used to (re)synchronize the nonce with the node.
+        address: The sender address.
+    """
+
+    def __init__(self, w3: Web3, address: str):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.w3 = w3
+        self.address = address
+
+        self._lock = threading.Lock()
+        self._next_nonce = None
+
+    def next_nonce(self) -> int:
+        with self._lock:
+            if self._next_nonce is None:
+                self._next_nonce = self.w3.eth.get_transaction_count(
+                    self.address, "pending"
+                )
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+
+    def sync(self):
+        """Drop the local nonce, the next one is fetched from the node"""
+        with self._lock:
+            self._next_nonce = None
+
+
+class PendingTransaction:
+    """A transaction sent by the pipeline, and its replacements
+
+    Attributes:
+        tx: The last signed version of the transaction.
+        tx_hashes: Hashes of every broadcast version, the last one first.
+        sent_at: Monotonic time of the last broadcast.
+        receipt: The receipt, once mined.
+    """
+
+    def __init__(self, tx: dict, tx_hash: str):
+        self.tx = tx
+        self.tx_hashes = [tx_hash]
+        self.sent_at = time.monotonic()
+        self.replacements = 0
+        self.receipt = None
+        self.mined = threading.Event()
+
+    @property
+    def nonce(self) -> int:
+        return self.tx["nonce"]
+
+    @property
+    def tx_hash(self) -> str:
+        return self.tx_hashes[0]
+
+
+class TransactionPipeline:
+    """
+    Signs transactions locally and broadcasts them right away with nonces from a NonceManager,
+    so that several transactions can be pending at once. Receipts are tracked in the background,
+    and transactions pending for too long are replaced with bumped fees.
+
+    Attributes:
+        w3: Web3 instance used to broadcast the transactions.
+        private_key: Key signing the transactions.
+        gas_station: Source of the fees.
+        stuck_after: Time (in seconds) after which a pending transaction is replaced.
+        fee_bump: Fee multiplier of a replacement.
+        max_replacements: Max number of replacements of a transaction.
+        poll_interval: Interval (in seconds) between two receipt checks.
+    """
+
+    def __init__(
+        self,
+        w3: Web3,
+        private_key: str,
+        gas_station: GasStation,
+        nonce_manager: NonceManager = None,
+        stuck_after: float = 60.0,
+        fee_bump: float = DEFAULT_FEE_BUMP,
+        max_replacements: int = 5,
+        poll_interval: float = 2.0,
+    ):
+        assert fee_bump > 1.1
+
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.w3 = w3
+        self.private_key = private_key
+        self.address = Account.from_key(private_key).address
+        self.gas_station = gas_station
+        self.nonce_manager = (
+            nonce_manager
+            if nonce_manager is not None
+            else NonceManager(w3, self.address)
+        )
+        self.stuck_after = stuck_after
+        self.fee_bump = fee_bump
+        self.max_replacements = max_replacements
+        self.poll_interval = poll_interval
+
+        self.chain_id = None
+        self.pending = []
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+
+    def start(self):
+        """Track the receipts of the pending transactions in a background thread"""
+        threading.Thread(target=self._thread_track_receipts, daemon=True).start()
+
+    def send(self, tx: dict) -> PendingTransaction:
+        """
+        Sign and broadcast a transaction without waiting for the previous ones to be mined
+
+        Args:
+            tx: The transaction, with at least `to` and `data`. The sender, chain id, gas limit,
+                fees and nonce are filled in when missing.
+        """
+        if self.chain_id is None:
+            self.chain_id = self.w3.eth.chain_id
+
+        tx = {"from": self.address, "value": 0, "chainId": self.chain_id, **tx}
+        if "gas" not in tx:
+            tx["gas"] = self.w3.eth.estimate_gas(tx)
+        if "gasPrice" not in tx and "maxFeePerGas" not in tx:
+            tx.update(self.gas_station.get_fees())
+
+        # broadcast in nonce order
+        with self._send_lock:
+            tx["nonce"] = self.nonce_manager.next_nonce()
+            try:
+                tx_hash = self._broadcast(tx)
+            except Exception as e:
+                # the nonce wasn't used, start over from the node's
+                self.nonce_manager.sync()
+                raise e
+
+        pending = PendingTransaction(tx, tx_hash)
+        with self._lock:
+            self.pending.append(pending)
+        self.logger.info(f"Sent transaction {tx_hash} with nonce {tx['nonce']}")
+        return pending
+
+    def wait(self, pending: PendingTransaction, timeout: float = None) -> dict:
+        """Wait for the receipt of a transaction, None on timeout"""
+        pending.mined.wait(timeout)
+        return pending.receipt
+
+    def check(self):
+        """Fetch the receipts of the pending transactions, and replace the stuck ones"""
+        with self._lock:
+            pending_transactions = list(self.pending)
+
+        for pending in pending_transactions:
+            receipt = self._get_receipt(pending)
+            if receipt is not None:
+                pending.receipt = receipt
+                pending.mined.set()
+                with self._lock:
+                    self.pending.remove(pending)
+                self.logger.info(
+                    f"Transaction {receipt['transactionHash']} mined with status {receipt['status']}"
+                )
+            elif (
+                time.monotonic() - pending.sent_at > self.stuck_after
+                and pending.replacements < self.max_replacements
+            ):
+                self._replace(pending)
+
+    def _get_receipt(self, pending: PendingTransaction):
+        for tx_hash in pending.tx_hashes:
+            try:
+                return self.w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                continue
+            except Exception as e:
+                self.logger.error(f"Error get_transaction_receipt: {e}")
+        return None
+
+    def _replace(self, pending: PendingTransaction):
+        """Re-send the transaction with the same nonce and bumped fees"""
+        tx = dict(pending.tx)
+        fees = self.gas_station.get_fees()
+        for key in ["gasPrice", "maxFeePerGas", "maxPriorityFeePerGas"]:
+            if key in tx:
+                tx[key] = max(int(tx[key] * self.fee_bump), fees.get(key, 0))
+
+        try:
+            tx_hash = self._broadcast(tx, method="replace_transaction")
+        except Exception:
+            return
+
+        pending.tx = tx
+        pending.tx_hashes.insert(0, tx_hash)
+        pending.sent_at = time.monotonic()
+        pending.replacements += 1
+        self.logger.warning(
+            f"Replaced stuck transaction with nonce {tx['nonce']}: {tx_hash}"
+        )
+
+    def _broadcast(self, tx: dict, method: str = "send_raw_transaction") -> str:
+        signed = Account.sign_transaction(
+            {key: value for (key, value) in tx.items() if key != "from"},
+            self.private_key,
+        )
+        try:
+            tx_hash = self.w3.eth.send_raw_transaction(signed.rawTransaction)
+            chain_requests_counter.labels(method=method, status="ok").inc()
+        except Exception as e:
+            self.logger.error(f"Error {method}: {e}")
+            chain_requests_counter.labels(method=method, status="error").inc()
+            raise e
+        return "0x" + bytes(tx_hash).hex()
+
+    def _thread_track_receipts(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.check()
+            except Exception as e:
+                self.logger.error(f"Failed to check the pending transactions: {e}")
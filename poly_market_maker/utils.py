@@ -1,7 +1,6 @@
 import logging
 import math
 import os
-import random
 import yaml
 from logging import config
 from web3 import Web3
@@ -14,6 +13,8 @@ from web3.middleware import (
 )
 from web3.gas_strategies.time_based import fast_gas_price_strategy
 
+from poly_market_maker.tracing import install_log_record_factory
+
 
 def setup_logging(
     log_path="logging.yaml",
@@ -26,6 +27,9 @@ def setup_logging(
     :param env_key:
     :return:
     """
+    # the log records carry the id of the synchronization cycle, see tracing
+    install_log_record_factory()
+
     log_value = os.getenv(env_key, None)
     if log_value:
         log_path = log_value
@@ -35,7 +39,7 @@ def setup_logging(
         logging.getLogger(__name__).info("Logging configured with config file!")
     else:
         logging.basicConfig(
-            format="%(asctime)-15s %(levelname)-4s %(threadName)s %(message)s",
+            format="%(asctime)-15s %(levelname)-4s %(threadName)s [%(cycle_id)s] %(message)s",
             level=log_level,
         )
         logging.getLogger(__name__).info("Logging configured with default attributes!")
@@ -78,10 +82,3 @@ def math_round_up(f: float, sig_digits: int) -> float:
         return f
     return math.ceil((f * (10**sig_digits))) / (10**sig_digits)
 
-
-def add_randomness(price: float, lower: float, upper: float) -> float:
-    return math_round_down(price + random.uniform(lower, upper), 2)
-
-
-def randomize_default_price(price: float) -> float:
-    return add_randomness(price, -0.1, 0.1)
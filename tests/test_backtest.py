@@ -0,0 +1,287 @@
+import csv
+import json
+import os
+import tempfile
+from array import array
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import TestCase
+from unittest.mock import patch
+
+from poly_market_maker.backtest import (
+    Backtest,
+    CrossingFillModel,
+    Series,
+    SimulatedOrderBookManager,
+    TradeFillModel,
+    main,
+    max_drawdown,
+)
+from poly_market_maker.fixed_point import to_units
+from poly_market_maker.order import Order, Side
+from poly_market_maker.token import Token, Collateral
+
+config_path = "./config/amm.json"
+
+
+def series(prices: list[float], step: float = 1.0) -> Series:
+    return Series(
+        array("d", [i * step for i in range(len(prices))]), array("d", prices)
+    )
+
+
+class TestSimulatedOrderBookManager(TestCase):
+    def setUp(self):
+        self.manager = SimulatedOrderBookManager(
+            {Collateral: 100.0, Token.A: 50.0, Token.B: 0.0}
+        )
+
+    def test_place_and_cancel(self):
+        buy = Order(size=100.0, price=0.6, side=Side.BUY, token=Token.A)
+        sell = Order(size=50.0, price=0.7, side=Side.SELL, token=Token.A)
+        self.manager.place_orders([buy, sell])
+        self.assertEqual(self.manager.placed, 2)
+        self.assertEqual(self.manager.locked[Collateral], to_units(60.0))
+        self.assertEqual(self.manager.locked[Token.A], to_units(50.0))
+
+        # 60 of the 100 collateral and all the A tokens are locked
+        self.manager.place_orders(
+            [
+                Order(size=100.0, price=0.5, side=Side.BUY, token=Token.B),
+                Order(size=1.0, price=0.7, side=Side.SELL, token=Token.A),
+                Order(size=10.0, price=0.4, side=Side.BUY, token=Token.B),
+            ]
+        )
+        self.assertEqual(self.manager.placed, 3)
+        self.assertEqual(self.manager.rejected, 2)
+
+        orderbook = self.manager.get_order_book()
+        self.assertEqual(len(orderbook.orders), 3)
+        self.assertEqual(orderbook.balances[Collateral], 100.0)
+
+        self.manager.cancel_orders(orderbook.orders[:1])
+        self.assertEqual(self.manager.cancelled, 1)
+        self.assertEqual(self.manager.locked[Collateral], to_units(4.0))
+
+    def test_fill(self):
+        self.manager.place_orders(
+            [
+                Order(size=100.0, price=0.6, side=Side.BUY, token=Token.A),
+                Order(size=50.0, price=0.7, side=Side.SELL, token=Token.A),
+            ]
+        )
+        (buy, sell) = self.manager.get_order_book().orders
+
+        self.manager.fill(buy, to_units(40.0))
+        self.assertEqual(self.manager.orders[buy.id].size, 60.0)
+        self.assertEqual(self.manager.balances[Collateral], to_units(76.0))
+        self.assertEqual(self.manager.balances[Token.A], to_units(90.0))
+        self.assertEqual(self.manager.locked[Collateral], to_units(36.0))
+
+        self.manager.fill(sell, sell.size_units)
+        self.assertNotIn(sell.id, self.manager.orders)
+        self.assertEqual(self.manager.balances[Collateral], to_units(111.0))
+        self.assertEqual(self.manager.balances[Token.A], to_units(40.0))
+        self.assertEqual(self.manager.locked[Token.A], 0)
+        self.assertEqual(self.manager.fills, 2)
+        self.assertEqual(self.manager.volume, to_units(90.0))
+
+
+class TestFillModels(TestCase):
+    def setUp(self):
+        # bids on A at 0.48 and 0.47, asks at 0.52 and 0.53
+        self.orders = [
+            Order(size=10.0, price=0.48, side=Side.BUY, token=Token.A, id="a"),
+            Order(size=10.0, price=0.47, side=Side.BUY, token=Token.B, id="b"),
+            Order(size=10.0, price=0.52, side=Side.SELL, token=Token.A, id="c"),
+            Order(size=10.0, price=0.53, side=Side.SELL, token=Token.B, id="d"),
+        ]
+
+    def test_crossing(self):
+        def filled(model, mids):
+            fills = model.fills(self.orders, array("d", mids), array("d"), array("d"))
+            return sorted(order.id for (order, _) in fills)
+
+        self.assertEqual(filled(CrossingFillModel(), [0.5, 0.49, 0.51]), [])
+        self.assertEqual(filled(CrossingFillModel(), [0.5, 0.48, 0.52]), [])
+        self.assertEqual(filled(CrossingFillModel(touch=True), [0.48]), ["a"])
+        self.assertEqual(filled(CrossingFillModel(), [0.475, 0.5]), ["a"])
+        self.assertEqual(
+            filled(CrossingFillModel(), [0.46, 0.54]), ["a", "b", "c", "d"]
+        )
+
+    def test_trades(self):
+        def fills(model, prices, sizes):
+            return {
+                order.id: size
+                for (order, size) in model.fills(
+                    self.orders, array("d"), array("d", prices), array("d", sizes)
+                )
+            }
+
+        self.assertEqual(fills(TradeFillModel(), [0.5, 0.49], [100.0, 100.0]), {})
+        # the best bid fills first
+        self.assertEqual(
+            fills(TradeFillModel(), [0.47], [15.0]),
+            {"a": to_units(10.0), "d": to_units(5.0)},
+        )
+        self.assertEqual(
+            fills(TradeFillModel(participation=0.5), [0.52, 0.53], [10.0, 30.0]),
+            {"c": to_units(10.0), "b": to_units(10.0)},
+        )
+
+
+class TestBacktest(TestCase):
+    def test_flat_price(self):
+        backtest = Backtest(
+            "amm",
+            config_path,
+            {Collateral: 1000.0, Token.A: 0.0, Token.B: 0.0},
+            sync_interval=30,
+        )
+        result = backtest.run(series([0.5] * 300))
+
+        self.assertEqual(result["cycles"], 11)
+        # the second cycle has nothing to do, the next ones have the same inputs
+        self.assertEqual(result["cycles_run"], 2)
+        self.assertGreater(result["orders_placed"], 0)
+        self.assertEqual(result["orders_cancelled"], 0)
+        self.assertEqual(result["fills"], 0)
+        self.assertEqual(result["pnl"], 0)
+        self.assertEqual(len(result["series"]["pnl"]), 11)
+        self.assertEqual(
+            set(result["series"]["open_orders"]), {result["orders_placed"]}
+        )
+
+    def test_price_drop(self):
+        backtest = Backtest(
+            "amm",
+            config_path,
+            {Collateral: 1000.0, Token.A: 0.0, Token.B: 0.0},
+            sync_interval=30,
+        )
+        result = backtest.run(series([0.5] * 60 + [0.45] * 60))
+
+        self.assertGreater(result["fills"], 0)
+        series_ = result["series"]
+        self.assertGreater(series_["token_a"][-1], 0)
+        self.assertEqual(series_["token_b"][-1], 0)
+        self.assertLess(series_["collateral"][-1], 1000.0)
+        self.assertGreater(series_["inventory"][-1], 0)
+        # bought A above the new price
+        self.assertLess(result["pnl"], 0)
+        self.assertEqual(result["max_drawdown"], -min(series_["pnl"]))
+
+    def test_gaps(self):
+        backtest = Backtest(
+            "amm",
+            config_path,
+            {Collateral: 1000.0, Token.A: 0.0, Token.B: 0.0},
+            sync_interval=30,
+        )
+        prices = Series(array("d", [0, 10, 10**6]), array("d", [0.5, 0.5, 0.6]))
+        result = backtest.run(prices)
+
+        self.assertLess(result["cycles"], 10)
+        self.assertEqual(result["series"]["mid"][-1], 0.6)
+        self.assertGreater(result["fills"], 0)
+
+    def test_gaps_with_trades(self):
+        def run(prices):
+            backtest = Backtest(
+                "amm",
+                config_path,
+                {Collateral: 1000.0, Token.A: 0.0, Token.B: 0.0},
+                sync_interval=30,
+                fill_model=TradeFillModel(),
+            )
+            trades = Series(
+                array("d", range(1000, 4000, 100)),
+                array("d", [0.45] * 30),
+                array("d", [10.0] * 30),
+            )
+            return backtest.run(prices, trades)
+
+        sparse = run(Series(array("d", [0, 5000]), array("d", [0.5, 0.5])))
+        dense = run(series([0.5] * 5001))
+
+        # the trades in the gaps between the midpoints fill the resting bids
+        self.assertGreater(dense["fills"], 0)
+        self.assertEqual(sparse["fills"], dense["fills"])
+        self.assertEqual(
+            sparse["series"]["token_a"][-1], dense["series"]["token_a"][-1]
+        )
+        self.assertLess(sparse["cycles"], dense["cycles"])
+
+    def test_failed_cycle(self):
+        backtest = Backtest(
+            "amm",
+            config_path,
+            {Collateral: 1000.0, Token.A: 0.0, Token.B: 0.0},
+            sync_interval=30,
+        )
+        synchronize = backtest.strategy_manager.synchronize
+        calls = []
+
+        def failing_synchronize():
+            calls.append(None)
+            if len(calls) == 1:
+                raise ZeroDivisionError("float division by zero")
+            synchronize()
+
+        with patch.object(
+            backtest.strategy_manager, "synchronize", side_effect=failing_synchronize
+        ):
+            result = backtest.run(series([0.5] * 60 + [0.45] * 60))
+
+        self.assertEqual(result["cycles"], 5)
+        self.assertEqual(result["cycles_failed"], 1)
+        # the replay went on after the failed cycle
+        self.assertGreater(result["cycles_run"], 1)
+        self.assertGreater(result["orders_placed"], 0)
+
+
+class TestMain(TestCase):
+    def test_max_drawdown(self):
+        self.assertEqual(max_drawdown(array("d", [0, 5, 2, 8, 1, 3])), 7)
+        self.assertEqual(max_drawdown(array("d", [0, -4, 1])), 4)
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            prices_path = os.path.join(directory, "prices.csv")
+            trades_path = os.path.join(directory, "trades.csv")
+            output_path = os.path.join(directory, "series.csv")
+            with open(prices_path, "w") as fh:
+                fh.write("timestamp,price\n")
+                for t in range(120):
+                    fh.write(f"{t},{0.5 if t < 60 else 0.45}\n")
+            with open(trades_path, "w") as fh:
+                fh.write("timestamp,price,size\n50,0.45,1000\n")
+
+            self.assertEqual(len(Series.read_csv(trades_path, with_sizes=True)), 1)
+
+            stdout = StringIO()
+            with redirect_stdout(stdout):
+                main(
+                    [
+                        "--strategy",
+                        "amm",
+                        "--strategy-config",
+                        config_path,
+                        "--prices",
+                        prices_path,
+                        "--trades",
+                        trades_path,
+                        "--output",
+                        output_path,
+                    ]
+                )
+            result = json.loads(stdout.getvalue())
+            self.assertEqual(result["ticks"], 120)
+            self.assertEqual(result["trades"], 1)
+            self.assertGreater(result["fills"], 0)
+
+            with open(output_path) as fh:
+                rows = list(csv.DictReader(fh))
+            self.assertEqual(len(rows), result["cycles"])
+            self.assertEqual(float(rows[-1]["mid"]), 0.45)
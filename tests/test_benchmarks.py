@@ -0,0 +1,29 @@
+from unittest import TestCase
+
+from benchmarks.strategies import benchmarks, compare, run
+
+
+class TestBenchmarks(TestCase):
+    def test_benchmarks_run(self):
+        # every benchmark builds and runs once
+        for name, (params, function) in benchmarks().items():
+            function()
+
+    def test_run(self):
+        results = run("amm_expected_orders[depth=0.05]", repeat=2, min_time=0.001)
+
+        self.assertEqual(list(results), ["amm_expected_orders[depth=0.05]"])
+        result = results["amm_expected_orders[depth=0.05]"]
+        self.assertEqual(result["params"], {"depth": 0.05})
+        self.assertLessEqual(result["min"], result["median"])
+
+    def test_compare(self):
+        baseline = {"a": {"min": 1.0}, "b": {"min": 1.0}, "c": {"min": 1.0}}
+        results = {"a": {"min": 1.1}, "b": {"min": 1.5}, "d": {"min": 9.0}}
+
+        comparison = compare(results, baseline, tolerance=0.25)
+
+        self.assertEqual(
+            [(name, regressed) for (name, *_, regressed) in comparison],
+            [("a", False), ("b", True)],
+        )
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import threading
+import time
+from unittest import TestCase
+
+import websockets
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+from poly_market_maker.chain_watcher import (
+    ChainWatcher,
+    TRANSFER_TOPIC,
+    TRANSFER_SINGLE_TOPIC,
+)
+from poly_market_maker.orderbook import OrderBookManager
+
+holder = "0x7D1DC38E60930664F8cBF495dA6556ca091d2F92"
+other = "0x000000000000000000000000000000000000dEaD"
+collateral = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
+conditional = "0x4D97DCd97eC945f40cF65F87097ACe5EA0476045"
+
+
+def topic(address: str) -> str:
+    return "0x" + address[2:].lower().rjust(64, "0")
+
+
+class LocalNode(BaseProvider):
+    """Stand-in for a node answering eth_blockNumber and eth_getLogs"""
+
+    def __init__(self):
+        self.block_number = 100
+        self.logs = []
+        self.requests = []
+
+    def mine(self, address: str = None, topics: list = None):
+        self.block_number += 1
+        if address is not None:
+            self.logs.append(
+                {
+                    "address": address,
+                    "topics": topics,
+                    "data": "0x",
+                    "blockNumber": hex(self.block_number),
+                    "logIndex": hex(len(self.logs)),
+                }
+            )
+
+    def make_request(self, method, params):
+        self.requests.append(method)
+        match method:
+            case "eth_chainId":
+                result = "0x89"
+            case "eth_blockNumber":
+                result = hex(self.block_number)
+            case "eth_getLogs":
+                result = [log for log in self.logs if self._matches(log, params[0])]
+        return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+    @staticmethod
+    def _matches(log: dict, log_filter: dict) -> bool:
+        block = int(log["blockNumber"], 16)
+        if (
+            not int(log_filter["fromBlock"], 16)
+            <= block
+            <= int(log_filter["toBlock"], 16)
+        ):
+            return False
+        if log["address"] not in log_filter["address"]:
+            return False
+        for expected, actual in zip(log_filter["topics"], log["topics"]):
+            if expected is None:
+                continue
+            expected = expected if isinstance(expected, list) else [expected]
+            if actual not in expected:
+                return False
+        return len(log_filter["topics"]) <= len(log["topics"])
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+class TestChainWatcher(TestCase):
+    def setUp(self):
+        self.node = LocalNode()
+        self.transfers = []
+        self.watcher = ChainWatcher(
+            Web3(self.node),
+            holder,
+            [collateral],
+            [conditional],
+            self.transfers.append,
+            poll_interval=0.05,
+        )
+        self.watcher.last_block = self.node.block_number
+
+    def test_scan(self):
+        # incoming collateral, outgoing conditional tokens, and an unrelated transfer
+        self.node.mine(collateral, [TRANSFER_TOPIC, topic(other), topic(holder)])
+        self.node.mine(
+            conditional,
+            [TRANSFER_SINGLE_TOPIC, topic(other), topic(holder), topic(other)],
+        )
+        self.node.mine(collateral, [TRANSFER_TOPIC, topic(other), topic(other)])
+        self.node.mine()
+
+        logs = self.watcher.scan()
+
+        self.assertEqual(len(logs), 2)
+        self.assertEqual(len(self.transfers), 1)
+        self.assertEqual(self.watcher.last_block, 104)
+
+        # nothing new
+        self.node.mine(collateral, [TRANSFER_TOPIC, topic(other), topic(other)])
+        self.assertEqual(self.watcher.scan(), [])
+        self.assertEqual(len(self.transfers), 1)
+
+    def test_poll(self):
+        self.watcher.start()
+        self.node.mine(collateral, [TRANSFER_TOPIC, topic(holder), topic(other)])
+
+        deadline = time.monotonic() + 2
+        while len(self.transfers) == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.watcher.stop()
+
+        self.assertEqual(len(self.transfers), 1)
+
+    def test_websocket(self):
+        loop = asyncio.new_event_loop()
+        heads = asyncio.Queue()
+
+        async def handler(ws, *args):
+            request = json.loads(await ws.recv())
+            self.assertEqual(request["params"], ["newHeads"])
+            await ws.send(json.dumps({"jsonrpc": "2.0", "id": 1, "result": "0x1"}))
+            while (number := await heads.get()) is not None:
+                await ws.send(
+                    json.dumps(
+                        {
+                            "jsonrpc": "2.0",
+                            "method": "eth_subscription",
+                            "params": {"result": {"number": hex(number)}},
+                        }
+                    )
+                )
+
+        async def serve():
+            return await websockets.serve(handler, "127.0.0.1", 0)
+
+        server = loop.run_until_complete(serve())
+        port = list(server.sockets)[0].getsockname()[1]
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+
+        self.watcher.ws_url = f"ws://127.0.0.1:{port}"
+        # only the subscription should trigger scans
+        self.watcher.poll_interval = 60
+        self.watcher.start()
+
+        self.node.mine(collateral, [TRANSFER_TOPIC, topic(holder), topic(other)])
+        time.sleep(0.2)
+        asyncio.run_coroutine_threadsafe(
+            heads.put(self.node.block_number), loop
+        ).result()
+
+        deadline = time.monotonic() + 2
+        while len(self.transfers) == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.watcher.stop()
+
+        async def shutdown():
+            await heads.put(None)
+            server.close()
+            await server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+
+        self.assertEqual(len(self.transfers), 1)
+
+
+class TestBalancesOnDemand(TestCase):
+    def test_invalidate_balances(self):
+        fetches = []
+
+        order_book_manager = OrderBookManager(60)
+        order_book_manager.get_orders_with(lambda: [])
+        order_book_manager.get_balances_with(lambda: fetches.append(1) or {})
+        order_book_manager.refresh_balances_on_demand()
+        order_book_manager.start()
+        order_book_manager.get_order_book()
+        self.assertEqual(len(fetches), 1)
+
+        # the transfer triggers a refresh right away, long before the refresh frequency
+        order_book_manager.invalidate_balances()
+        deadline = time.monotonic() + 2
+        while len(fetches) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(fetches), 2)
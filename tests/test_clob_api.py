@@ -0,0 +1,33 @@
+import logging
+import os
+import stat
+import tempfile
+from unittest import TestCase
+
+from py_clob_client.clob_types import ApiCreds
+
+from poly_market_maker.clob_api import ClobApi
+
+
+class TestClobApi(TestCase):
+    def test_api_creds_cache(self):
+        clob_api = ClobApi.__new__(ClobApi)
+        clob_api.logger = logging.getLogger("ClobApi")
+        creds = ApiCreds(api_key="key", api_secret="secret", api_passphrase="pass")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache", "api_creds.json")
+            self.assertIsNone(clob_api._load_api_creds(path, "host|137|0x1"))
+
+            clob_api._save_api_creds(path, "host|137|0x1", creds)
+            clob_api._save_api_creds(path, "host|80001|0x1", creds)
+
+            loaded = clob_api._load_api_creds(path, "host|137|0x1")
+            self.assertEqual(loaded.api_key, "key")
+            self.assertEqual(loaded.api_secret, "secret")
+            self.assertEqual(loaded.api_passphrase, "pass")
+            self.assertIsNotNone(clob_api._load_api_creds(path, "host|80001|0x1"))
+            self.assertIsNone(clob_api._load_api_creds(path, "other|137|0x1"))
+
+            # the secret is only readable by the owner
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
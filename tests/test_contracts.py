@@ -0,0 +1,163 @@
+from unittest import TestCase
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+from poly_market_maker.contracts import (
+    Contracts,
+    MULTICALL3_ADDRESS,
+    decode_aggregate3,
+    erc1155_balance_of_batch,
+    erc20_allowance,
+    multicall3_aggregate3,
+)
+from poly_market_maker.market import Market
+from poly_market_maker.token import Token
+
+
+def word(value: int) -> bytes:
+    return value.to_bytes(32, byteorder="big")
+
+
+def encode_results(values: list) -> str:
+    """ABI encoding of the (bool success, bytes returnData)[] returned by aggregate3"""
+    head = b"".join(word(32 * len(values) + 128 * i) for i in range(len(values)))
+    tail = b"".join(word(1) + word(64) + word(32) + word(value) for value in values)
+    return "0x" + (word(32) + word(len(values)) + head + tail).hex()
+
+
+def balance_of_batch(data: str) -> str:
+    """Answers balanceOfBatch(accounts, ids) with a balance equal to each id"""
+    data = bytes.fromhex(data[2:])[4:]
+    words = [int.from_bytes(data[i : i + 32], "big") for i in range(0, len(data), 32)]
+    offset = words[1] // 32
+    ids = words[offset + 1 : offset + 1 + words[offset]]
+    return "0x" + (word(32) + word(len(ids)) + b"".join(word(i) for i in ids)).hex()
+
+
+class MockProvider(BaseProvider):
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []
+
+    def make_request(self, method, params):
+        self.requests.append((method, params))
+        if method == "eth_chainId":
+            return {"jsonrpc": "2.0", "id": 1, "result": "0x89"}
+        return {"jsonrpc": "2.0", "id": 1, "result": self.respond(params[0]["data"])}
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+def eth_calls(provider: MockProvider) -> list:
+    return [params for (method, params) in provider.requests if method == "eth_call"]
+
+
+class TestContracts(TestCase):
+    def test_balances_of(self):
+        holder = "0x7D1DC38E60930664F8cBF495dA6556ca091d2F92"
+        collateral = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
+        conditional = "0x4D97DCd97eC945f40cF65F87097ACe5EA0476045"
+
+        provider = MockProvider(
+            lambda _: encode_results([100 * 10**6, 25 * 10**6, 0, 2 * 10**18])
+        )
+        contracts = Contracts(Web3(provider), None)
+
+        (balances, gas_balance) = contracts.balances_of(
+            holder, [(collateral, None), (conditional, 1), (conditional, 2)]
+        )
+
+        self.assertEqual(balances, [100.0, 25.0, 0.0])
+        self.assertEqual(gas_balance, 2)
+
+        # a single call to the multicall contract
+        calls = [
+            params for (method, params) in provider.requests if method == "eth_call"
+        ]
+        self.assertEqual(len(calls), 1)
+        params = calls[0]
+        self.assertEqual(params[0]["to"], MULTICALL3_ADDRESS)
+        self.assertIn(holder[2:].lower(), params[0]["data"])
+
+    def test_balance_of_erc1155_batch(self):
+        holder = "0x7D1DC38E60930664F8cBF495dA6556ca091d2F92"
+        conditional = "0x4D97DCd97eC945f40cF65F87097ACe5EA0476045"
+
+        provider = MockProvider(balance_of_batch)
+        contracts = Contracts(Web3(provider), None)
+
+        token_ids = list(range(1, 12))
+        balances = contracts.balance_of_erc1155_batch(
+            conditional, holder, token_ids, chunk_size=5
+        )
+
+        self.assertEqual(balances, token_ids)
+        self.assertEqual(len(eth_calls(provider)), 3)
+
+    def test_position_balances(self):
+        holder = "0x7D1DC38E60930664F8cBF495dA6556ca091d2F92"
+        conditional = "0x4D97DCd97eC945f40cF65F87097ACe5EA0476045"
+        collateral = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
+        markets = [Market("0x" + f"{i:064x}", collateral) for i in range(1, 4)]
+
+        provider = MockProvider(balance_of_batch)
+        contracts = Contracts(Web3(provider), None)
+
+        balances = contracts.position_balances(conditional, holder, markets)
+
+        self.assertEqual(len(eth_calls(provider)), 1)
+        for market in markets:
+            for token in Token:
+                self.assertEqual(
+                    balances[market.condition_id][token],
+                    market.token_id(token) / 10**6,
+                )
+
+    def test_contract_cache(self):
+        holder = "0x7D1DC38E60930664F8cBF495dA6556ca091d2F92"
+        collateral = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
+        conditional = "0x4D97DCd97eC945f40cF65F87097ACe5EA0476045"
+
+        contracts = Contracts(Web3(MockProvider(balance_of_batch)), None)
+
+        self.assertIs(
+            contracts.contract(conditional, erc1155_balance_of_batch),
+            contracts.contract(conditional, erc1155_balance_of_batch),
+        )
+        self.assertIsNot(
+            contracts.contract(conditional, erc1155_balance_of_batch),
+            contracts.contract(collateral, erc1155_balance_of_batch),
+        )
+
+        contracts.build_handles(collateral, conditional)
+        handles = len(contracts._contracts)
+        contracts.contract(collateral, erc20_allowance)
+        self.assertEqual(len(contracts._contracts), handles)
+
+        tokens = [(collateral, None), (conditional, 1)]
+        data = contracts.balance_calls(holder, tokens)
+        self.assertIs(contracts.balance_calls(holder, tokens), data)
+
+        # the same call data as the ABI encoding of web3
+        holder_word = holder[2:].lower().rjust(64, "0")
+        calls = [
+            (collateral, False, bytes.fromhex("70a08231" + holder_word)),
+            (
+                conditional,
+                False,
+                bytes.fromhex("00fdd58e" + holder_word + word(1).hex()),
+            ),
+            (MULTICALL3_ADDRESS, False, bytes.fromhex("4d2301cc" + holder_word)),
+        ]
+        multicall = contracts.w3.eth.contract(
+            MULTICALL3_ADDRESS, abi=multicall3_aggregate3
+        )
+        encoded = multicall.encodeABI(fn_name="aggregate3", args=[calls])
+        self.assertEqual(data, encoded)
+
+    def test_decode_aggregate3(self):
+        results = decode_aggregate3(bytes.fromhex(encode_results([7, 0, 2**200])[2:]))
+        self.assertEqual(
+            results, [(True, word(7)), (True, word(0)), (True, word(2**200))]
+        )
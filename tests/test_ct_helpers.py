@@ -1,7 +1,10 @@
+import os
+import tempfile
 from unittest import TestCase
+from unittest.mock import patch
 from web3 import Web3
 
-from poly_market_maker.ct_helpers import CTHelpers
+from poly_market_maker.ct_helpers import CTHelpers, TokenIdCache
 
 
 class TestCTHelpers(TestCase):
@@ -72,3 +75,65 @@ class TestCTHelpers(TestCase):
         self.assertEqual(
             CTHelpers.get_token_id(condition_id, collateral_address, 1), token_id_1
         )
+
+    def test_get_token_ids(self):
+        collateral_address = "0x7D1DC38E60930664F8cBF495dA6556ca091d2F92"
+        keys = [
+            ("0x" + f"{i:064x}", collateral_address, token_index)
+            for i in range(1, 6)
+            for token_index in [0, 1]
+        ]
+        expected = [CTHelpers.get_token_id(*key) for key in keys]
+
+        self.assertEqual(CTHelpers.get_token_ids(keys), expected)
+        self.assertEqual(
+            CTHelpers.get_token_ids(keys, processes=2, pool_threshold=1), expected
+        )
+
+    def test_token_id_cache(self):
+        collateral_address = "0x7D1DC38E60930664F8cBF495dA6556ca091d2F92"
+        condition_id = (
+            "0xda558eddf6eb57760bd5371fb313167f871d823a16e9d66fccb292baf2a117c0"
+        )
+        token_id_0 = 108051088633899060239124498527429950692254744883563327407154880807410490438693
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache", "token_ids.json")
+            CTHelpers.get_token_ids(
+                [(condition_id, collateral_address, 0)], cache=TokenIdCache(path)
+            )
+
+            # a new process reads the ids from disk, without deriving them
+            cache = TokenIdCache(path)
+            with patch.object(
+                CTHelpers, "get_token_id", side_effect=Exception("derived")
+            ):
+                self.assertEqual(
+                    CTHelpers.get_token_ids(
+                        [
+                            (
+                                condition_id.upper().replace("0X", "0x"),
+                                collateral_address,
+                                0,
+                            )
+                        ],
+                        cache=cache,
+                    ),
+                    [token_id_0],
+                )
+
+    def test_unwritable_token_id_cache(self):
+        collateral_address = "0x7D1DC38E60930664F8cBF495dA6556ca091d2F92"
+        condition_id = (
+            "0xda558eddf6eb57760bd5371fb313167f871d823a16e9d66fccb292baf2a117c0"
+        )
+
+        with tempfile.NamedTemporaryFile() as f:
+            # the parent of the cache is a file, the ids are still returned
+            cache = TokenIdCache(os.path.join(f.name, "token_ids.json"))
+            self.assertEqual(
+                CTHelpers.get_token_ids(
+                    [(condition_id, collateral_address, 0)], cache=cache
+                ),
+                [CTHelpers.get_token_id(condition_id, collateral_address, 0)],
+            )
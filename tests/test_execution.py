@@ -0,0 +1,108 @@
+import threading
+from unittest import TestCase
+
+from poly_market_maker.execution import split_orders_to_place
+from poly_market_maker.order import Order, Side
+from poly_market_maker.orderbook import OrderBook, OrderBookManager
+from poly_market_maker.token import Token, Collateral
+
+
+def order(size, price, side=Side.BUY, token=Token.A, id=None):
+    return Order(size=size, price=price, side=side, token=token, id=id)
+
+
+class TestSplitOrdersToPlace(TestCase):
+    def orderbook(self, orders, collateral=20.0, token_a=0.0, token_b=0.0):
+        return OrderBook(
+            orders=orders,
+            balances={Collateral: collateral, Token.A: token_a, Token.B: token_b},
+            orders_being_placed=False,
+            orders_being_cancelled=False,
+        )
+
+    def test_free_collateral(self):
+        # 20 collateral, 5 locked by the open buy
+        open_buy = order(10, 0.5, id="1")
+        orderbook = self.orderbook([open_buy])
+        new_orders = [order(20, 0.4), order(20, 0.3)]
+
+        (independent, dependent) = split_orders_to_place(orderbook, [], new_orders)
+        # 20 @ 0.4 uses 8 of the 15 free, 20 @ 0.3 needs 6 more
+        self.assertEqual(independent, new_orders)
+        self.assertEqual(dependent, [])
+
+        (independent, dependent) = split_orders_to_place(
+            orderbook, [], new_orders + [order(20, 0.2)]
+        )
+        self.assertEqual(len(independent), 2)
+        self.assertEqual(len(dependent), 1)
+
+    def test_needs_freed_collateral(self):
+        open_buy = order(30, 0.5, id="1")
+        orderbook = self.orderbook([open_buy])
+        new_order = order(20, 0.4)
+
+        (independent, dependent) = split_orders_to_place(
+            orderbook, [open_buy], [new_order]
+        )
+        self.assertEqual(independent, [])
+        self.assertEqual(dependent, [new_order])
+
+    def test_needs_freed_tokens(self):
+        open_sell = order(20, 0.6, Side.SELL, id="1")
+        orderbook = self.orderbook([open_sell], token_a=30.0)
+
+        # 10 tokens are free, the rest is locked until the open sell is cancelled
+        new_orders = [order(10, 0.61, Side.SELL), order(15, 0.62, Side.SELL)]
+        (independent, dependent) = split_orders_to_place(
+            orderbook, [open_sell], new_orders
+        )
+        self.assertEqual(independent, [new_orders[0]])
+        self.assertEqual(dependent, [new_orders[1]])
+
+    def test_crossing_cancelled_order(self):
+        open_sell = order(20, 0.5, Side.SELL, id="1")
+        open_buy_b = order(20, 0.4, Side.BUY, Token.B, id="2")
+        orderbook = self.orderbook([open_sell, open_buy_b], collateral=100.0)
+
+        crossing = order(20, 0.5)
+        crossing_complement = order(20, 0.6, token=Token.A)
+        (independent, dependent) = split_orders_to_place(
+            orderbook, [open_sell, open_buy_b], [crossing, crossing_complement]
+        )
+        self.assertEqual(independent, [])
+        self.assertEqual(dependent, [crossing, crossing_complement])
+
+        not_crossing = order(20, 0.45)
+        (independent, dependent) = split_orders_to_place(
+            orderbook, [open_sell, open_buy_b], [not_crossing]
+        )
+        self.assertEqual(independent, [not_crossing])
+
+
+class TestCancelAndPlaceOrders(TestCase):
+    def test_orders_are_placed_alongside_the_cancels(self):
+        events = []
+        cancel_started = threading.Event()
+        release_cancel = threading.Event()
+
+        def cancel_order(order):
+            cancel_started.set()
+            release_cancel.wait(5)
+            events.append(("cancel", order.id))
+            return True
+
+        def place_order(order):
+            events.append(("place", order.price))
+            # the order goes out while the cancel is in flight
+            release_cancel.set()
+            return order.with_id(str(order.price))
+
+        manager = OrderBookManager(refresh_frequency=1, max_workers=5)
+        manager.cancel_orders_with(cancel_order)
+        manager.place_orders_with(place_order)
+
+        manager.cancel_and_place_orders([order(10, 0.5, id="1")], [order(10, 0.4)])
+
+        self.assertTrue(cancel_started.is_set())
+        self.assertEqual(events, [("place", 0.4), ("cancel", "1")])
@@ -0,0 +1,106 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from benchmarks.fake_clob import FakeClob, FakeServer
+from benchmarks.load import PRIVATE_KEY
+from poly_market_maker.clob_api import ClobApi
+
+CONDITION_ID = "0x" + "ab" * 32
+TOKEN_A = "1111"
+TOKEN_B = "2222"
+
+
+class TestFakeClob(TestCase):
+    def setUp(self):
+        self.fake_clob = FakeClob()
+        self.fake_clob.add_market(CONDITION_ID, (TOKEN_A, TOKEN_B), mid=0.4)
+        self.server = FakeServer(self.fake_clob)
+        self.server.start()
+        self.clob_api = ClobApi(self.server.url, 137, PRIVATE_KEY)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_get_price(self):
+        self.assertEqual(self.clob_api.get_price(TOKEN_A), 0.4)
+        self.assertEqual(self.clob_api.get_price(TOKEN_B), 0.6)
+
+        self.fake_clob.set_mid(CONDITION_ID, 0.45)
+        self.assertEqual(self.clob_api.get_price(TOKEN_A), 0.45)
+        self.assertIsNone(self.clob_api.get_price("3333"))
+
+    def test_orders(self):
+        buy_id = self.clob_api.place_order(0.39, 10.0, "BUY", TOKEN_A)
+        sell_id = self.clob_api.place_order(0.62, 20.0, "SELL", TOKEN_B)
+        self.assertIsNotNone(buy_id)
+        self.assertIsNotNone(sell_id)
+
+        orders = {
+            order["id"]: order for order in self.clob_api.get_orders(CONDITION_ID)
+        }
+        self.assertEqual(set(orders), {buy_id, sell_id})
+        self.assertEqual(orders[buy_id]["price"], 0.39)
+        self.assertEqual(orders[buy_id]["size"], 10.0)
+        self.assertEqual(orders[sell_id]["side"], "SELL")
+        self.assertEqual(orders[sell_id]["size"], 20.0)
+
+        self.assertTrue(self.clob_api.cancel_order(buy_id))
+        self.assertFalse(self.clob_api.cancel_order(buy_id))
+        self.assertEqual(len(self.clob_api.get_orders(CONDITION_ID)), 1)
+
+        self.assertTrue(self.clob_api.cancel_all_orders())
+        self.assertEqual(self.clob_api.get_orders(CONDITION_ID), [])
+        self.assertEqual(self.fake_clob.stats["placed"], 2)
+        self.assertEqual(self.fake_clob.stats["cancelled"], 2)
+
+    def test_errors(self):
+        self.fake_clob.error_rate = 1.0
+
+        self.assertIsNone(self.clob_api.get_price(TOKEN_A))
+        self.assertIsNone(self.clob_api.place_order(0.39, 10.0, "BUY", TOKEN_A))
+        self.assertEqual(self.fake_clob.open_orders(), [])
+        self.assertGreaterEqual(self.fake_clob.stats["errors"], 2)
+
+    def test_rate_limit(self):
+        self.fake_clob.rate_limit = 2
+        self.fake_clob._tokens = 2
+
+        prices = [self.clob_api.get_price(TOKEN_A) for _ in range(4)]
+        self.assertEqual(prices[:2], [0.4, 0.4])
+        self.assertEqual(prices[2:], [None, None])
+        self.assertEqual(self.fake_clob.stats["rate_limited"], 2)
+
+    def test_cached_api_creds(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "api_creds.json")
+            ClobApi(self.server.url, 137, PRIVATE_KEY, creds_path=path)
+            with open(path) as f:
+                (creds_key,) = json.load(f)
+            derived = self.fake_clob.stats["GET /auth/derive-api-key"]
+
+            # valid cached creds are only probed
+            ClobApi(self.server.url, 137, PRIVATE_KEY, creds_path=path)
+            self.assertEqual(self.fake_clob.stats["GET /auth/derive-api-key"], derived)
+            self.assertEqual(self.fake_clob.stats["GET /auth/api-keys"], 1)
+
+            # rejected cached creds are derived again and replaced
+            with open(path, "w") as f:
+                json.dump(
+                    {
+                        creds_key: {
+                            "api_key": "revoked",
+                            "api_secret": "c2VjcmV0",
+                            "api_passphrase": "pass",
+                        }
+                    },
+                    f,
+                )
+            clob_api = ClobApi(self.server.url, 137, PRIVATE_KEY, creds_path=path)
+            self.assertEqual(
+                self.fake_clob.stats["GET /auth/derive-api-key"], derived + 1
+            )
+            with open(path) as f:
+                self.assertNotEqual(json.load(f)[creds_key]["api_key"], "revoked")
+            self.assertEqual(clob_api.get_price(TOKEN_A), 0.4)
@@ -0,0 +1,48 @@
+from unittest import TestCase
+
+from poly_market_maker.fixed_point import (
+    to_ticks,
+    from_ticks,
+    to_units,
+    from_units,
+    round_down_units,
+    cost_units,
+)
+from poly_market_maker.order import Order, Side
+from poly_market_maker.token import Token
+
+
+class TestFixedPoint(TestCase):
+    def test_ticks(self):
+        self.assertEqual(to_ticks(0.47), 47)
+        self.assertEqual(to_ticks(0.1 + 0.2), 30)
+        self.assertEqual(from_ticks(47), 0.47)
+        self.assertEqual(from_ticks(100 - 53), 0.47)
+
+    def test_units(self):
+        self.assertEqual(to_units(15.0), 15_000_000)
+        self.assertEqual(from_units(15_000_000), 15.0)
+        self.assertEqual(from_units(to_units(12.345678)), 12.345678)
+
+    def test_round_down_units(self):
+        self.assertEqual(round_down_units(to_units(12.349), 2), to_units(12.34))
+        self.assertEqual(round_down_units(to_units(12.34), 2), to_units(12.34))
+
+    def test_cost_units(self):
+        # 15 @ 0.47 = 7.05
+        self.assertEqual(cost_units(to_units(15.0), 47), to_units(7.05))
+        # rounded up to the next micro-unit
+        self.assertEqual(cost_units(1, 47), 1)
+
+    def test_order(self):
+        order = Order(size=15, price=0.47, side=Side.BUY, token=Token.A)
+        self.assertEqual(order.size_units, 15_000_000)
+        self.assertEqual(order.price_ticks, 47)
+        self.assertEqual(order.size, 15.0)
+        self.assertEqual(order.price, 0.47)
+
+        order = Order.from_ticks(
+            size_units=15_000_000, price_ticks=53, side=Side.SELL, token=Token.B
+        )
+        self.assertEqual(order.size, 15.0)
+        self.assertEqual(order.price, 0.53)
@@ -0,0 +1,128 @@
+import threading
+import time
+from unittest import TestCase
+
+from poly_market_maker.gas import GasStation, GasStrategy
+
+
+class MockEth:
+    def __init__(self):
+        self.calls = 0
+        self.released = threading.Event()
+        self.released.set()
+
+    def fee_history(self, block_count, newest_block, reward_percentiles):
+        self.calls += 1
+        self.released.wait()
+        return {
+            "baseFeePerGas": [30, 40, 50],
+            "reward": [[1], [3], [2]],
+        }
+
+    def generate_gas_price(self):
+        self.calls += 1
+        return 31 * 10**9 + 1
+
+
+class MockWeb3:
+    def __init__(self):
+        self.eth = MockEth()
+
+
+class TestGasStation(TestCase):
+    def test_fixed(self):
+        gas_station = GasStation(strat=GasStrategy.FIXED, fixed=10)
+
+        self.assertEqual(gas_station.get_fees(), {"gasPrice": 10})
+        self.assertEqual(gas_station.get_gas_price(), 10)
+
+    def test_web3(self):
+        w3 = MockWeb3()
+        gas_station = GasStation(strat=GasStrategy.WEB3, w3=w3)
+        gas_station.refresh()
+
+        self.assertEqual(gas_station.get_gas_price(), 32 * 10**9)
+
+    def test_eip1559(self):
+        w3 = MockWeb3()
+        gas_station = GasStation(strat=GasStrategy.EIP1559, w3=w3)
+        gas_station.refresh()
+
+        self.assertEqual(
+            gas_station.get_fees(),
+            {"maxFeePerGas": 102, "maxPriorityFeePerGas": 2},
+        )
+        self.assertEqual(gas_station.get_gas_price(), 102)
+
+    def test_get_fees_does_not_wait(self):
+        w3 = MockWeb3()
+        w3.eth.released.clear()
+        gas_station = GasStation(strat=GasStrategy.EIP1559, w3=w3, fixed=7)
+
+        # the lookup hangs, the fixed price is used meanwhile
+        start = time.monotonic()
+        self.assertEqual(gas_station.get_fees(), {"gasPrice": 7})
+        self.assertEqual(gas_station.get_fees(), {"gasPrice": 7})
+        self.assertLess(time.monotonic() - start, 0.1)
+
+        # a single lookup is in flight
+        time.sleep(0.05)
+        self.assertEqual(w3.eth.calls, 1)
+
+        w3.eth.released.set()
+        deadline = time.monotonic() + 2
+        while gas_station.get_fees() == {"gasPrice": 7}:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+        self.assertEqual(gas_station.get_gas_price(), 102)
+
+    def test_ttl(self):
+        w3 = MockWeb3()
+        gas_station = GasStation(strat=GasStrategy.EIP1559, w3=w3, ttl=0.05)
+        gas_station.refresh()
+        self.assertEqual(w3.eth.calls, 1)
+
+        gas_station.get_fees()
+        time.sleep(0.1)
+        self.assertEqual(w3.eth.calls, 1)
+
+        # expired, served from the cache while refreshing in the background
+        self.assertEqual(gas_station.get_gas_price(), 102)
+        deadline = time.monotonic() + 2
+        while w3.eth.calls < 2:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_max_age(self):
+        w3 = MockWeb3()
+        gas_station = GasStation(
+            strat=GasStrategy.EIP1559, w3=w3, fixed=7, ttl=0.01, max_age=0.05
+        )
+        gas_station.refresh()
+        self.assertEqual(gas_station.get_gas_price(), 102)
+
+        # the refreshes keep failing, the fees get too old to be used
+        w3.eth.fee_history = lambda *args: 1 / 0
+        time.sleep(0.1)
+        self.assertEqual(gas_station.get_fees(), {"gasPrice": 7})
+
+    def test_started_station_refreshes_in_its_thread(self):
+        w3 = MockWeb3()
+        gas_station = GasStation(
+            strat=GasStrategy.EIP1559, w3=w3, refresh_interval=60, ttl=0.01
+        )
+        gas_station.start()
+        self.assertEqual(w3.eth.calls, 1)
+        time.sleep(0.05)
+
+        threads = threading.active_count()
+        for _ in range(20):
+            gas_station.get_fees()
+        self.assertEqual(threading.active_count(), threads)
+
+        # the background thread was woken up instead of waiting for the interval
+        deadline = time.monotonic() + 2
+        while w3.eth.calls < 2:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
@@ -0,0 +1,106 @@
+import threading
+import time
+from unittest import TestCase
+
+from poly_market_maker.heartbeat import Heartbeat
+from poly_market_maker.metrics import time_to_flat
+
+
+class LocalExchange:
+    """Stand-in exchange with a cancel-on-disconnect renewed by the heartbeat"""
+
+    def __init__(self):
+        self.orders = ["order-1", "order-2"]
+        self.renewals = 0
+        self.cancel_all_calls = 0
+        self.cancel_all_results = [True]
+
+    def heartbeat(self):
+        self.renewals += 1
+
+    def cancel_all_orders_now(self) -> bool:
+        result = self.cancel_all_results[
+            min(self.cancel_all_calls, len(self.cancel_all_results) - 1)
+        ]
+        self.cancel_all_calls += 1
+        if result:
+            self.orders = []
+        return result
+
+
+def flat_count():
+    histogram = time_to_flat.labels(trigger="heartbeat")
+    return sum(bucket.get() for bucket in histogram._buckets)
+
+
+class TestHeartbeat(TestCase):
+    def test_renews_while_alive(self):
+        exchange = LocalExchange()
+        heartbeat = Heartbeat(exchange, timeout=60, renew=exchange.heartbeat)
+
+        self.assertTrue(heartbeat.check())
+        self.assertTrue(heartbeat.check())
+        self.assertEqual(exchange.renewals, 2)
+        self.assertEqual(exchange.cancel_all_calls, 0)
+
+    def test_stuck_sync_loop_cancels_once(self):
+        exchange = LocalExchange()
+        heartbeat = Heartbeat(exchange, timeout=0.05, renew=exchange.heartbeat)
+        flats_before = flat_count()
+
+        time.sleep(0.1)
+        self.assertFalse(heartbeat.check())
+        self.assertFalse(heartbeat.check())
+        self.assertEqual(exchange.cancel_all_calls, 1)
+        self.assertEqual(exchange.orders, [])
+        self.assertEqual(flat_count(), flats_before + 1)
+        # the cancel-on-disconnect isn't renewed anymore
+        self.assertEqual(exchange.renewals, 0)
+
+        # the sync loop makes progress again
+        heartbeat.beat()
+        self.assertFalse(heartbeat.tripped)
+        self.assertTrue(heartbeat.check())
+        self.assertEqual(exchange.renewals, 1)
+
+    def test_failed_cancel_all_is_retried(self):
+        exchange = LocalExchange()
+        exchange.cancel_all_results = [False, True]
+        heartbeat = Heartbeat(exchange, timeout=0.01)
+
+        time.sleep(0.05)
+        self.assertFalse(heartbeat.check())
+        self.assertFalse(heartbeat.flat)
+        self.assertFalse(heartbeat.check())
+        self.assertTrue(heartbeat.flat)
+        self.assertEqual(exchange.cancel_all_calls, 2)
+
+    def test_independent_of_a_hung_sync_loop(self):
+        exchange = LocalExchange()
+        heartbeat = Heartbeat(
+            exchange, timeout=0.2, interval=0.02, renew=exchange.heartbeat
+        )
+        heartbeat.start()
+        self.addCleanup(heartbeat.stop)
+
+        # the sync loop hangs in a blocking call
+        released = threading.Event()
+
+        def synchronize():
+            released.wait()
+            heartbeat.beat()
+
+        sync_thread = threading.Thread(target=synchronize, daemon=True)
+        sync_thread.start()
+
+        # the orders are pulled while the sync loop is still hanging
+        deadline = time.monotonic() + 2
+        while not heartbeat.flat:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        self.assertTrue(sync_thread.is_alive())
+        self.assertEqual(exchange.orders, [])
+
+        released.set()
+        sync_thread.join()
+        self.assertFalse(heartbeat.tripped)
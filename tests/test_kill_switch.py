@@ -0,0 +1,70 @@
+from unittest import TestCase
+
+from poly_market_maker.kill_switch import KillSwitch
+from poly_market_maker.metrics import time_to_flat
+from poly_market_maker.price_feed import PriceFeed
+
+
+class OrderBookManager:
+    def __init__(self, results: list[bool]):
+        self.results = results
+        self.cancel_all_calls = 0
+
+    def cancel_all_orders_now(self):
+        result = self.results[min(self.cancel_all_calls, len(self.results) - 1)]
+        self.cancel_all_calls += 1
+        return result
+
+
+def flat_count():
+    histogram = time_to_flat.labels(trigger="stale_price")
+    return sum(bucket.get() for bucket in histogram._buckets)
+
+
+class TestKillSwitch(TestCase):
+    def test_fresh_feed(self):
+        price_feed = PriceFeed()
+        price_feed._record_update()
+        order_book_manager = OrderBookManager([True])
+        kill_switch = KillSwitch(price_feed, order_book_manager, 60)
+
+        self.assertTrue(kill_switch.check())
+        self.assertEqual(order_book_manager.cancel_all_calls, 0)
+
+    def test_stale_feed_cancels_once(self):
+        price_feed = PriceFeed()
+        price_feed._record_update()
+        price_feed._record_error()
+        order_book_manager = OrderBookManager([True])
+        kill_switch = KillSwitch(price_feed, order_book_manager, 60)
+        flats_before = flat_count()
+
+        self.assertFalse(kill_switch.check())
+        self.assertFalse(kill_switch.check())
+        self.assertEqual(order_book_manager.cancel_all_calls, 1)
+        self.assertTrue(kill_switch.flat)
+        self.assertEqual(flat_count(), flats_before + 1)
+
+        # the feed recovers
+        price_feed._record_update()
+        self.assertTrue(kill_switch.check())
+        self.assertFalse(kill_switch.tripped)
+
+    def test_failed_cancel_all_is_retried(self):
+        price_feed = PriceFeed()
+        order_book_manager = OrderBookManager([False, True])
+        kill_switch = KillSwitch(price_feed, order_book_manager, 60)
+
+        self.assertFalse(kill_switch.check())
+        self.assertFalse(kill_switch.flat)
+        self.assertFalse(kill_switch.check())
+        self.assertTrue(kill_switch.flat)
+        self.assertEqual(order_book_manager.cancel_all_calls, 2)
+
+    def test_old_feed(self):
+        price_feed = PriceFeed()
+        price_feed._record_update()
+        price_feed.last_update_time -= 61
+
+        self.assertTrue(price_feed.is_stale(60))
+        self.assertFalse(price_feed.is_stale(120))
@@ -1,8 +1,11 @@
+import asyncio
+import time
 import pytest
 from unittest import TestCase
 from unittest.mock import MagicMock
 
 from poly_market_maker.lifecycle import Lifecycle
+from poly_market_maker.metrics import timer_skipped_ticks
 
 
 class TestLifecycle(TestCase):
@@ -36,4 +39,84 @@ class TestLifecycle(TestCase):
         self.assertTrue(lc.terminated_internally)
         self.assertEqual(self.counter, 2)
 
-    pass
+    def test_skip_running_timer(self):
+        lc = Lifecycle()
+        calls = []
+
+        def slow_callback():
+            calls.append(time.monotonic())
+            time.sleep(0.35)
+            if len(calls) >= 2:
+                lc.terminate()
+
+        with pytest.raises(SystemExit):
+            with lc:
+                lc.every(0.1, slow_callback)
+
+        # the ticks during a running invocation are skipped, not queued
+        self.assertEqual(len(calls), 2)
+        self.assertGreaterEqual(calls[1] - calls[0], 0.35)
+
+    def test_async_callbacks(self):
+        lc = Lifecycle()
+        startup = MagicMock()
+        shutdown = MagicMock()
+
+        async def async_startup():
+            startup()
+
+        async def callback():
+            await asyncio.sleep(0)
+            lc.terminate()
+
+        async def async_shutdown():
+            shutdown()
+
+        with pytest.raises(SystemExit):
+            with lc:
+                lc.wait_for(lambda: True, 1)
+                lc.on_startup(async_startup)
+                lc.every(0.1, callback)
+                lc.on_shutdown(async_shutdown)
+
+        self.assertEqual(startup.call_count, 1)
+        self.assertEqual(shutdown.call_count, 1)
+
+    def test_drift_free_ticks(self):
+        lc = Lifecycle()
+        ticks = []
+
+        def tick():
+            ticks.append(time.monotonic())
+            time.sleep(0.03)
+            if len(ticks) >= 6:
+                lc.terminate()
+
+        with pytest.raises(SystemExit):
+            with lc:
+                lc.every(0.1, tick)
+
+        # the callback duration doesn't push the following ticks back
+        self.assertEqual(len(ticks), 6)
+        self.assertAlmostEqual(ticks[5] - ticks[0], 0.5, delta=0.05)
+
+    def test_skipped_ticks_and_adaptive_interval(self):
+        lc = Lifecycle()
+        calls = []
+
+        def slow_tick():
+            calls.append(time.monotonic())
+            time.sleep(0.25)
+            if len(calls) >= 5:
+                lc.terminate()
+
+        skipped = timer_skipped_ticks.labels(timer="slow_tick")
+        skipped_before = skipped._value.get()
+
+        with self.assertLogs("Lifecycle", level="WARNING") as logs:
+            with pytest.raises(SystemExit):
+                with lc:
+                    lc.every(0.1, slow_tick, adaptive=True)
+
+        self.assertGreater(skipped._value.get() - skipped_before, 0)
+        self.assertTrue(any("stretching its interval" in line for line in logs.output))
@@ -25,3 +25,11 @@ class TestMarket(TestCase):
         self.assertEqual(self.market.token(token_id_1), Token.B)
 
         self.assertRaises(ValueError, self.market.token, 0)
+
+    def test_from_condition_ids(self):
+        markets = Market.from_condition_ids([condition_id], usdc_address)
+
+        self.assertEqual(len(markets), 1)
+        self.assertEqual(markets[0].condition_id, condition_id)
+        self.assertEqual(markets[0].token_id(Token.A), token_id_0)
+        self.assertEqual(markets[0].token_id(Token.B), token_id_1)
@@ -0,0 +1,79 @@
+from unittest import TestCase
+
+from poly_market_maker.order import Order, OrderSet, Side
+from poly_market_maker.token import Token
+
+
+class TestOrder(TestCase):
+    def test_immutable(self):
+        order = Order(size=15, price=0.47, side=Side.BUY, token=Token.A)
+
+        with self.assertRaises(AttributeError):
+            order.price_ticks = 48
+        with self.assertRaises(AttributeError):
+            order.extra = 1
+
+    def test_eq_and_hash(self):
+        order_1 = Order(size=15, price=0.47, side=Side.BUY, token=Token.A, id="1")
+        order_2 = Order.from_ticks(
+            size_units=15_000_000, price_ticks=47, side=Side.BUY, token=Token.A, id="1"
+        )
+        order_3 = order_2.with_id("2")
+
+        self.assertEqual(order_1, order_2)
+        self.assertEqual(hash(order_1), hash(order_2))
+        self.assertNotEqual(order_1, order_3)
+        self.assertEqual(len({order_1, order_2, order_3}), 2)
+
+    def test_key(self):
+        order = Order(size=15, price=0.47, side=Side.SELL, token=Token.B)
+        self.assertEqual(order.key, (Token.B, Side.SELL, 47))
+
+
+class TestOrderSet(TestCase):
+    orders = [
+        Order(size=10, price=0.47, side=Side.BUY, token=Token.A, id="1"),
+        Order(size=20, price=0.47, side=Side.BUY, token=Token.A, id="2"),
+        Order(size=30, price=0.53, side=Side.SELL, token=Token.A, id="3"),
+        Order(size=40, price=0.45, side=Side.BUY, token=Token.B, id="4"),
+    ]
+
+    def test_init(self):
+        order_set = OrderSet(self.orders)
+
+        self.assertEqual(len(order_set), 4)
+        self.assertEqual(order_set.to_list(), self.orders)
+        self.assertEqual(list(order_set.price_ticks), [47, 47, 53, 45])
+        self.assertEqual(order_set.ids, ["1", "2", "3", "4"])
+
+    def test_select(self):
+        order_set = OrderSet(self.orders)
+
+        buys = order_set.select(side=Side.BUY)
+        self.assertEqual(buys.ids, ["1", "2", "4"])
+
+        token_a = order_set.select(token=Token.A)
+        self.assertEqual(token_a.ids, ["1", "2", "3"])
+
+        buys_b = order_set.select(side=Side.BUY, token=Token.B)
+        self.assertEqual(buys_b.to_list(), [self.orders[3]])
+
+        self.assertEqual(len(order_set.select()), 4)
+
+    def test_totals(self):
+        buys_a = OrderSet(self.orders).select(side=Side.BUY, token=Token.A)
+
+        self.assertEqual(buys_a.total_size(), 30_000_000)
+        # 30 @ 0.47
+        self.assertEqual(buys_a.total_cost(), 14_100_000)
+
+    def test_group_by_key(self):
+        order_set = OrderSet(self.orders)
+
+        groups = order_set.group_by_key()
+        self.assertEqual(groups[(Token.A, Side.BUY, 47)], self.orders[:2])
+        self.assertEqual(len(groups), 3)
+
+        sizes = order_set.size_by_key()
+        self.assertEqual(sizes[(Token.A, Side.BUY, 47)], 30_000_000)
+        self.assertEqual(sizes[(Token.B, Side.BUY, 45)], 40_000_000)
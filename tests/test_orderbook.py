@@ -0,0 +1,100 @@
+import time
+from unittest import TestCase
+
+from poly_market_maker.metrics import time_to_flat
+from poly_market_maker.order import Order, Side
+from poly_market_maker.orderbook import OrderBookManager
+from poly_market_maker.token import Token
+
+
+def flat_count():
+    histogram = time_to_flat.labels(trigger="shutdown")
+    return sum(bucket.get() for bucket in histogram._buckets)
+
+
+class TestOrderBookManager(TestCase):
+    def test_is_ready(self):
+        order_book_manager = OrderBookManager(60)
+        order_book_manager.get_orders_with(lambda: [])
+        order_book_manager.get_balances_with(lambda: 1 / 0)
+
+        self.assertFalse(order_book_manager.is_ready())
+
+        order_book_manager.start()
+        deadline = time.monotonic() + 2
+        while order_book_manager._refresh_count == 0:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        # the balances failed to be fetched
+        self.assertFalse(order_book_manager.is_ready())
+
+        order_book_manager.get_balances_with(lambda: {})
+        order_book_manager.invalidate_balances()
+        deadline = time.monotonic() + 2
+        while not order_book_manager.is_ready():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_cancel_all_orders(self):
+        open_orders = [
+            Order(size=10, price=0.5, side=Side.BUY, token=Token.A, id="1"),
+            Order(size=10, price=0.6, side=Side.SELL, token=Token.A, id="2"),
+        ]
+        cancel_all_calls = []
+
+        def cancel_all(orders):
+            cancel_all_calls.append(orders)
+            # an order placed concurrently survives the first cancel all
+            if len(cancel_all_calls) > 1:
+                open_orders.clear()
+            else:
+                open_orders.pop()
+            return True
+
+        order_book_manager = OrderBookManager(60)
+        order_book_manager.get_orders_with(lambda: list(open_orders))
+        order_book_manager.get_balances_with(lambda: {})
+        order_book_manager.cancel_all_orders_with(cancel_all)
+
+        count_before = flat_count()
+
+        start = time.monotonic()
+        self.assertTrue(order_book_manager.cancel_all_orders(timeout=5))
+
+        # confirmed with direct order queries, without waiting for refreshes
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(len(cancel_all_calls), 2)
+        self.assertEqual(flat_count(), count_before + 1)
+
+        # no placement once shutting down
+        placed = []
+        order_book_manager.place_orders_with(lambda order: placed.append(order))
+        order_book_manager.place_orders(
+            [Order(size=10, price=0.5, side=Side.BUY, token=Token.A)]
+        )
+        self.assertEqual(placed, [])
+
+    def test_cancel_all_orders_timeout(self):
+        order = Order(size=10, price=0.5, side=Side.BUY, token=Token.A, id="1")
+
+        order_book_manager = OrderBookManager(60)
+        order_book_manager.get_orders_with(lambda: [order])
+        order_book_manager.cancel_all_orders_with(lambda orders: False)
+
+        start = time.monotonic()
+        self.assertFalse(order_book_manager.cancel_all_orders(timeout=0.3))
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_cancel_all_orders_now_without_balances(self):
+        order = Order(size=10, price=0.5, side=Side.BUY, token=Token.A, id="1")
+        cancel_all_calls = []
+
+        order_book_manager = OrderBookManager(60)
+        order_book_manager.cancel_all_orders_with(
+            lambda orders: cancel_all_calls.append(orders) or True
+        )
+        # the orders were fetched, the balances never were
+        order_book_manager._state = {"orders": [order]}
+
+        self.assertTrue(order_book_manager.cancel_all_orders_now())
+        self.assertEqual(cancel_all_calls, [[order]])
@@ -1,6 +1,12 @@
+import time
 from unittest import TestCase
 
-from poly_market_maker.price_feed import PriceFeedClob
+from poly_market_maker.price_feed import (
+    PriceAggregation,
+    PriceFeedAggregate,
+    PriceFeedClob,
+    PriceFeedSource,
+)
 from poly_market_maker.token import Token
 from poly_market_maker.market import Market
 from poly_market_maker.clob_api import ClobApi
@@ -20,3 +26,123 @@ class TestPriceFeed(TestCase):
         price_feed = PriceFeedClob(market, MockClobApi())
 
         self.assertEqual(price_feed.get_price(Token.A), 0.4)
+
+    def test_latest_price(self):
+        market = Market("0x045A", "0x0456")
+        clob_api = MockClobApi()
+        price_feed = PriceFeedClob(market, clob_api)
+
+        self.assertIsNone(price_feed.latest_price(Token.A))
+        price_feed.get_price(Token.A)
+
+        clob_api.get_price = lambda token_id: 0.9
+        self.assertEqual(price_feed.latest_price(Token.A), 0.4)
+        # a failed fetch keeps the last observation
+        clob_api.get_price = lambda token_id: None
+        price_feed.get_price(Token.A)
+        self.assertEqual(price_feed.latest_price(Token.A), 0.4)
+
+    def test_price_feed_error(self):
+        market = Market("0x045A", "0x0456")
+        clob_api = MockClobApi()
+        price_feed = PriceFeedClob(market, clob_api)
+
+        self.assertTrue(price_feed.is_stale(60))
+        price_feed.get_price(Token.A)
+        self.assertFalse(price_feed.is_stale(60))
+
+        clob_api.get_price = lambda token_id: None
+        self.assertIsNone(price_feed.get_price(Token.A))
+        self.assertTrue(price_feed.is_stale(60))
+
+
+class MockAggregateClobApi(ClobApi):
+    def __init__(self, prices: dict, book: dict = None, last_trade: float = None):
+        self.prices = prices
+        self.book = book
+        self.last_trade = last_trade
+        self.delay = 0
+
+    def get_price(self, token_id: int):
+        time.sleep(self.delay)
+        return self.prices.get(token_id)
+
+    def get_order_book(self, token_id: int):
+        return self.book
+
+    def get_last_trade_price(self, token_id: int):
+        return self.last_trade
+
+
+class TestPriceFeedAggregate(TestCase):
+    def setUp(self):
+        self.market = Market("0x045A", "0x0456")
+        self.token_a = self.market.token_id(Token.A)
+        self.token_b = self.market.token_id(Token.B)
+
+    def test_median(self):
+        clob_api = MockAggregateClobApi(
+            {self.token_a: 0.4, self.token_b: 0.5},
+            book={"bids": [(0.3, 10), (0.41, 10)], "asks": [(0.45, 30), (0.5, 1)]},
+            last_trade=0.9,
+        )
+        price_feed = PriceFeedAggregate(
+            self.market,
+            clob_api,
+            [
+                PriceFeedSource.CLOB,
+                PriceFeedSource.CLOB_COMPLEMENT,
+                PriceFeedSource.BOOK,
+            ],
+        )
+
+        # microprice: (0.41 * 30 + 0.45 * 10) / 40 = 0.42
+        self.assertAlmostEqual(price_feed.get_price(Token.A), 0.42)
+        self.assertAlmostEqual(price_feed.get_price(Token.B), 0.58)
+        self.assertFalse(price_feed.is_stale(60))
+
+    def test_weighted(self):
+        clob_api = MockAggregateClobApi({self.token_a: 0.4}, last_trade=0.7)
+        price_feed = PriceFeedAggregate(
+            self.market,
+            clob_api,
+            [PriceFeedSource.CLOB, PriceFeedSource.LAST_TRADE],
+            aggregation=PriceAggregation.WEIGHTED,
+            weights={PriceFeedSource.CLOB: 2.0},
+        )
+
+        self.assertAlmostEqual(price_feed.get_price(Token.A), 0.5)
+
+        clob_api.last_trade = 0.1
+        self.assertAlmostEqual(price_feed.latest_price(Token.A), 0.5)
+        self.assertAlmostEqual(price_feed.latest_price(Token.B), 0.5)
+
+    def test_slow_source_does_not_block(self):
+        clob_api = MockAggregateClobApi({self.token_a: 0.4}, last_trade=0.6)
+        clob_api.delay = 1.0
+        price_feed = PriceFeedAggregate(
+            self.market,
+            clob_api,
+            [PriceFeedSource.CLOB, PriceFeedSource.LAST_TRADE],
+            timeout=0.1,
+        )
+
+        start = time.monotonic()
+        self.assertAlmostEqual(price_feed.get_price(Token.A), 0.6)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_cache_fallback(self):
+        clob_api = MockAggregateClobApi({self.token_a: 0.4})
+        price_feed = PriceFeedAggregate(
+            self.market, clob_api, [PriceFeedSource.CLOB], ttl=0.2
+        )
+
+        self.assertAlmostEqual(price_feed.get_price(Token.A), 0.4)
+
+        # the source fails, its last good price is served until the ttl expires
+        clob_api.prices = {}
+        self.assertAlmostEqual(price_feed.get_price(Token.A), 0.4)
+
+        time.sleep(0.25)
+        self.assertIsNone(price_feed.get_price(Token.A))
+        self.assertTrue(price_feed.is_stale(60))
@@ -0,0 +1,88 @@
+from unittest import TestCase
+
+from poly_market_maker.order import Order, Side
+from poly_market_maker.token import Token
+from poly_market_maker.strategies.reconciliation import (
+    Reconciler,
+    Tolerance,
+    CancelReplace,
+    CancelExcess,
+)
+
+
+def order(size, price, side=Side.BUY, token=Token.A, id=None):
+    return Order(size=size, price=price, side=side, token=token, id=id)
+
+
+class TestReconciler(TestCase):
+    def test_empty_book(self):
+        reconciler = Reconciler()
+        target = [order(20, 0.47), order(30, 0.53, Side.SELL)]
+
+        (cancels, places) = reconciler.reconcile(target, [])
+
+        self.assertEqual(cancels, [])
+        self.assertEqual([o.key for o in places], [o.key for o in target])
+        self.assertEqual([o.size for o in places], [20.0, 30.0])
+
+    def test_matching_book(self):
+        reconciler = Reconciler()
+        target = [order(20, 0.47)]
+        open_orders = [order(20, 0.47, id="1")]
+
+        self.assertEqual(reconciler.reconcile(target, open_orders), ([], []))
+
+    def test_cancel_untargeted_levels(self):
+        reconciler = Reconciler()
+        target = [order(20, 0.47)]
+        open_orders = [order(20, 0.47, id="1"), order(20, 0.46, id="2")]
+
+        (cancels, places) = reconciler.reconcile(target, open_orders)
+
+        self.assertEqual(cancels, [open_orders[1]])
+        self.assertEqual(places, [])
+
+    def test_top_up(self):
+        reconciler = Reconciler()
+        target = [order(50, 0.47), order(30, 0.46)]
+        open_orders = [order(20, 0.47, id="1"), order(20, 0.46, id="2")]
+
+        (cancels, places) = reconciler.reconcile(target, open_orders)
+
+        self.assertEqual(cancels, [])
+        # the 0.46 level is short by less than the minimum size
+        self.assertEqual(len(places), 1)
+        self.assertEqual(places[0].price, 0.47)
+        self.assertEqual(places[0].size, 30.0)
+
+    def test_cancel_replace(self):
+        reconciler = Reconciler(amend_policy=CancelReplace())
+        target = [order(20, 0.47)]
+        open_orders = [order(20, 0.47, id="1"), order(10, 0.47, id="2")]
+
+        (cancels, places) = reconciler.reconcile(target, open_orders)
+
+        self.assertEqual(cancels, open_orders)
+        self.assertEqual(len(places), 1)
+        self.assertEqual(places[0].size, 20.0)
+
+    def test_cancel_excess(self):
+        reconciler = Reconciler(amend_policy=CancelExcess())
+        target = [order(20, 0.47)]
+        open_orders = [order(10, 0.47, id="1"), order(20, 0.47, id="2")]
+
+        (cancels, places) = reconciler.reconcile(target, open_orders)
+
+        self.assertEqual(cancels, [open_orders[0]])
+        self.assertEqual(places, [])
+
+    def test_tolerance(self):
+        reconciler = Reconciler(tolerance=Tolerance(5.0))
+        target = [order(20, 0.47), order(20, 0.46)]
+        open_orders = [order(24, 0.47, id="1"), order(26, 0.46, id="2")]
+
+        (cancels, places) = reconciler.reconcile(target, open_orders)
+
+        self.assertEqual(cancels, [open_orders[1]])
+        self.assertEqual(len(places), 1)
+        self.assertEqual(places[0].price, 0.46)
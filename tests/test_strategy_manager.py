@@ -0,0 +1,275 @@
+import json
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+from poly_market_maker.clob_api import ClobApi
+from poly_market_maker.market import Market
+from poly_market_maker.metrics import sync_cycles_counter
+from poly_market_maker.order import Side
+from poly_market_maker.orderbook import OrderBook
+from poly_market_maker.price_feed import PriceFeedClob
+from poly_market_maker.strategy import StrategyManager
+from poly_market_maker.token import Token, Collateral
+
+config_path = "./config/amm.json"
+
+
+class PriceFeed:
+    """Serves `prices` on fetches, and `observations` then the last fetched price on peeks"""
+
+    def __init__(self, prices: list[float], observations: list[float] = None):
+        self.prices = prices
+        self.observations = list(observations or [])
+        self.calls = 0
+        self.last_price = None
+
+    def get_price(self, token: Token) -> float:
+        self.last_price = self.prices[min(self.calls, len(self.prices) - 1)]
+        self.calls += 1
+        return self.last_price
+
+    def latest_price(self, token: Token) -> float:
+        if len(self.observations) > 0:
+            return self.observations.pop(0)
+        return self.last_price
+
+
+class OrderBookManager:
+    def __init__(self):
+        self.placed = []
+        self.cancelled = []
+
+    def get_order_book(self):
+        return OrderBook(
+            orders=[],
+            balances={Token.A: 1000.0, Token.B: 1000.0, Collateral: 1000.0},
+            orders_being_placed=False,
+            orders_being_cancelled=False,
+        )
+
+    def place_orders(self, orders):
+        self.placed.append(orders)
+
+    def cancel_orders(self, orders):
+        self.cancelled += orders
+
+    def cancel_and_place_orders(self, orders_to_cancel, orders_to_place):
+        self.cancel_orders(orders_to_cancel)
+        self.place_orders(orders_to_place)
+
+
+def cycles(status, reason=""):
+    return sync_cycles_counter.labels(status=status, reason=reason)._value.get()
+
+
+def quoted_order_book_manager(collateral: float) -> OrderBookManager:
+    """Order book manager with the orders quoted around 0.5, and only `collateral`"""
+    balances = {Token.A: 0.0, Token.B: 0.0, Collateral: collateral}
+    order_book_manager = OrderBookManager()
+    order_book_manager.get_order_book = lambda: OrderBook(
+        orders=[],
+        balances=balances,
+        orders_being_placed=False,
+        orders_being_cancelled=False,
+    )
+    StrategyManager(
+        "amm", config_path, PriceFeed([0.5]), order_book_manager
+    )._synchronize_cycle()
+
+    orders = [
+        order.with_id(f"order-{i}")
+        for (i, order) in enumerate(sum(order_book_manager.placed, []))
+    ]
+    order_book_manager.placed = []
+    order_book_manager.get_order_book = lambda: OrderBook(
+        orders=orders,
+        balances=balances,
+        orders_being_placed=False,
+        orders_being_cancelled=False,
+    )
+    return order_book_manager
+
+
+class TestStrategyManager(TestCase):
+    def test_completed_cycle(self):
+        order_book_manager = OrderBookManager()
+        price_feed = PriceFeed([0.5])
+        strategy_manager = StrategyManager(
+            "amm", config_path, price_feed, order_book_manager, batch_size=5
+        )
+        completed_before = cycles("completed")
+
+        strategy_manager.synchronize()
+
+        # without cancels, all the orders are placed in a single round
+        self.assertEqual(len(order_book_manager.placed), 1)
+        self.assertGreater(len(order_book_manager.placed[0]), 5)
+        self.assertEqual(cycles("completed"), completed_before + 1)
+        # the staleness check doesn't fetch the price again
+        self.assertEqual(price_feed.calls, 1)
+
+    def test_independent_orders_are_placed_with_the_cancels(self):
+        # the collateral locked by the open orders leaves room for 5 new buys
+        order_book_manager = quoted_order_book_manager(250.0)
+        strategy_manager = StrategyManager(
+            "amm", config_path, PriceFeed([0.55]), order_book_manager, batch_size=5
+        )
+
+        self.assertTrue(strategy_manager._synchronize_cycle())
+
+        self.assertEqual(len(order_book_manager.cancelled), 15)
+        self.assertEqual([len(batch) for batch in order_book_manager.placed], [5, 5, 5])
+
+    def test_stale_price_threshold_below_a_tick(self):
+        with self.assertRaises(Exception):
+            StrategyManager(
+                "amm",
+                config_path,
+                PriceFeed([0.5]),
+                OrderBookManager(),
+                stale_price_threshold=0.004,
+            )
+
+    def test_stale_price_aborts_before_execution(self):
+        order_book_manager = OrderBookManager()
+        # decision at 0.5, the check sees 0.6, the fresh cycle sees 0.6 throughout
+        strategy_manager = StrategyManager(
+            "amm", config_path, PriceFeed([0.5, 0.6], [0.6]), order_book_manager
+        )
+        aborted_before = cycles("aborted", "price")
+        completed_before = cycles("completed")
+
+        strategy_manager.synchronize()
+
+        self.assertEqual(cycles("aborted", "price"), aborted_before + 1)
+        self.assertEqual(cycles("completed"), completed_before + 1)
+        placed = [order for batch in order_book_manager.placed for order in batch]
+        # only the fresh cycle placed orders, quoting around 0.6
+        best_buy_a = max(
+            order.price
+            for order in placed
+            if order.token == Token.A and order.side == Side.BUY
+        )
+        self.assertEqual(best_buy_a, 0.59)
+
+    def test_stale_price_abandons_remaining_batches(self):
+        order_book_manager = quoted_order_book_manager(250.0)
+        # decision at 0.55, the fetch before the second batch waiting on the cancels sees 0.65
+        strategy_manager = StrategyManager(
+            "amm",
+            config_path,
+            PriceFeed([0.55, 0.55, 0.65]),
+            order_book_manager,
+            batch_size=5,
+        )
+        aborted_before = cycles("aborted", "price")
+
+        self.assertFalse(strategy_manager._synchronize_cycle())
+
+        self.assertEqual([len(batch) for batch in order_book_manager.placed], [5, 5])
+        self.assertEqual(cycles("aborted", "price"), aborted_before + 1)
+
+    def test_clob_price_moves_during_execution(self):
+        class MidpointClobApi(ClobApi):
+            def __init__(self, mids):
+                self.mids = mids
+                self.calls = 0
+
+            def get_price(self, token_id):
+                self.calls += 1
+                return self.mids.pop(0) if len(self.mids) > 1 else self.mids[0]
+
+        clob_api = MidpointClobApi([0.55, 0.80])
+        price_feed = PriceFeedClob(
+            Market("0x" + "ab" * 32, "0x" + "cd" * 20, [1, 2]), clob_api
+        )
+        order_book_manager = quoted_order_book_manager(250.0)
+        strategy_manager = StrategyManager(
+            "amm", config_path, price_feed, order_book_manager, batch_size=5
+        )
+        aborted_before = cycles("aborted", "price")
+
+        self.assertFalse(strategy_manager._synchronize_cycle())
+
+        # only the placements submitted with the cancels went out
+        self.assertEqual([len(batch) for batch in order_book_manager.placed], [5])
+        self.assertEqual(cycles("aborted", "price"), aborted_before + 1)
+        self.assertEqual(clob_api.calls, 2)
+
+    def test_deadline(self):
+        order_book_manager = OrderBookManager()
+        strategy_manager = StrategyManager(
+            "amm", config_path, PriceFeed([0.5]), order_book_manager, cycle_budget=-1
+        )
+        aborted_before = cycles("aborted", "deadline")
+
+        self.assertFalse(strategy_manager._synchronize_cycle())
+        self.assertEqual(order_book_manager.placed, [])
+        self.assertEqual(cycles("aborted", "deadline"), aborted_before + 1)
+
+
+class TestConfigReload(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.directory.name, "amm.json")
+        with open(config_path) as fh:
+            self.config = json.load(fh)
+        self.write_config(self.config)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_config(self, config: dict):
+        with open(self.config_path, "w") as fh:
+            json.dump(config, fh)
+        # make sure the mtime changes on filesystems with a coarse resolution
+        os.utime(self.config_path, ns=(0, time.time_ns() + len(json.dumps(config))))
+
+    def test_reload_reconciles_the_difference(self):
+        order_book_manager = OrderBookManager()
+        strategy_manager = StrategyManager(
+            "amm",
+            self.config_path,
+            PriceFeed([0.5]),
+            order_book_manager,
+            watch_config=True,
+        )
+        strategy_manager._synchronize_cycle()
+        placed = [order for batch in order_book_manager.placed for order in batch]
+        order_book_manager.get_order_book = lambda: OrderBook(
+            orders=placed,
+            balances={Token.A: 1000.0, Token.B: 1000.0, Collateral: 1000.0},
+            orders_being_placed=False,
+            orders_being_cancelled=False,
+        )
+        strategy = strategy_manager.strategy
+
+        # a wider spread only touches the orders closest to the price
+        self.write_config({**self.config, "spread": 0.02})
+        order_book_manager.placed = []
+        strategy_manager._synchronize_cycle()
+
+        self.assertIsNot(strategy_manager.strategy, strategy)
+        replaced = [order for batch in order_book_manager.placed for order in batch]
+        self.assertGreater(len(order_book_manager.cancelled), 0)
+        self.assertLess(
+            len(order_book_manager.cancelled) + len(replaced), len(placed) / 2
+        )
+
+    def test_invalid_config_is_ignored(self):
+        strategy_manager = StrategyManager(
+            "amm", self.config_path, PriceFeed([0.5]), OrderBookManager()
+        )
+        strategy = strategy_manager.strategy
+
+        # depth below the spread
+        self.write_config({**self.config, "depth": 0.001})
+        self.assertFalse(strategy_manager.reload_config())
+        self.assertIs(strategy_manager.strategy, strategy)
+
+        self.write_config({**self.config, "spread": 0.02})
+        strategy_manager.request_reload()
+        strategy_manager._synchronize_cycle()
+        self.assertIsNot(strategy_manager.strategy, strategy)
@@ -0,0 +1,70 @@
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import TestCase
+
+from poly_market_maker.trace_summary import main, percentile, summarize
+
+
+def cycle_events(cycle_id: int, start: float, acks: list[float], pid: int = 1):
+    return [
+        {"pid": pid, "cycle_id": cycle_id, "event": "price", "time": start},
+        {
+            "pid": pid,
+            "cycle_id": cycle_id,
+            "event": "orders_computed",
+            "time": start + 0.01,
+        },
+        {
+            "pid": pid,
+            "cycle_id": cycle_id,
+            "event": "orders_submitted",
+            "time": start + 0.02,
+        },
+    ] + [
+        {"pid": pid, "cycle_id": cycle_id, "event": "order_acked", "time": start + ack}
+        for ack in acks
+    ]
+
+
+class TestTraceSummary(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3.0], 90), 3.0)
+
+    def test_summarize(self):
+        events = (
+            cycle_events(1, 10.0, [0.1, 0.3])
+            + cycle_events(2, 20.0, [0.2])
+            # same cycle id in another process
+            + cycle_events(1, 5.0, [0.4], pid=2)
+            # a cycle which placed nothing
+            + [{"pid": 1, "cycle_id": 3, "event": "price", "time": 30.0}]
+            # outside of a cycle
+            + [{"pid": 1, "cycle_id": None, "event": "price", "time": 40.0}]
+        )
+
+        summary = summarize(events)
+
+        self.assertEqual(summary["tick_to_trade"]["count"], 3)
+        self.assertAlmostEqual(summary["tick_to_trade"]["p50"], 0.2)
+        self.assertAlmostEqual(summary["tick_to_trade"]["max"], 0.4)
+        self.assertAlmostEqual(summary["tick_to_last_trade"]["max"], 0.4)
+        self.assertAlmostEqual(summary["strategy"]["p99"], 0.01)
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "traces.jsonl")
+            with open(path, "w") as fh:
+                for event in cycle_events(1, 10.0, [0.1]):
+                    fh.write(json.dumps(event) + "\n")
+
+            output = StringIO()
+            with redirect_stdout(output):
+                main([path, "--json"])
+
+        self.assertEqual(json.loads(output.getvalue())["tick_to_trade"]["count"], 1)
@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from unittest import TestCase
+
+from poly_market_maker.metrics import sync_cycle_duration, sync_phase_duration
+from poly_market_maker.order import Order
+from poly_market_maker.orderbook import OrderBookManager
+from poly_market_maker.strategy import StrategyManager
+from poly_market_maker.token import Token, Collateral
+from poly_market_maker.tracing import (
+    TraceBuffer,
+    TraceExporter,
+    bind_cycle,
+    current_cycle_id,
+    cycle,
+    install_log_record_factory,
+    trace,
+    trace_buffer,
+)
+
+from tests.test_strategy_manager import PriceFeed, config_path
+
+
+def phase_count(phase: str) -> float:
+    histogram = sync_phase_duration.labels(phase=phase)
+    return sum(bucket.get() for bucket in histogram._buckets)
+
+
+def cycle_count() -> float:
+    return sum(bucket.get() for bucket in sync_cycle_duration._buckets)
+
+
+class TestTracing(TestCase):
+    def test_bind_cycle(self):
+        results = []
+        with cycle(7):
+            function = bind_cycle(lambda: results.append(current_cycle_id.get()))
+        self.assertIsNone(current_cycle_id.get())
+
+        thread = threading.Thread(target=function)
+        thread.start()
+        thread.join()
+        self.assertEqual(results, [7])
+
+    def test_log_records(self):
+        install_log_record_factory()
+        logger = logging.getLogger("test_tracing")
+
+        with self.assertLogs(logger) as logs:
+            logger.info("outside")
+            with cycle(3):
+                logger.info("inside")
+
+        self.assertEqual([record.cycle_id for record in logs.records], ["-", 3])
+
+    def test_cycle_id_propagated_to_order_book_callbacks(self):
+        order_book_manager = OrderBookManager(1)
+        order_book_manager._state = {
+            "orders": [],
+            "balances": {Token.A: 1000.0, Token.B: 1000.0, Collateral: 1000.0},
+        }
+
+        cycle_ids = set()
+
+        def place_order(order: Order):
+            cycle_ids.add(current_cycle_id.get())
+            return None
+
+        order_book_manager.place_orders_with(place_order)
+        strategy_manager = StrategyManager(
+            "amm", config_path, PriceFeed([0.5]), order_book_manager
+        )
+        phases_before = {
+            phase: phase_count(phase)
+            for phase in ["price", "order_book", "strategy", "place"]
+        }
+        cycles_before = cycle_count()
+
+        strategy_manager._synchronize_cycle()
+        strategy_manager._synchronize_cycle()
+
+        # nothing was placed, so both cycles placed their orders
+        self.assertEqual(cycle_ids, {1, 2})
+        self.assertEqual(cycle_count(), cycles_before + 2)
+        for phase, count in phases_before.items():
+            self.assertEqual(phase_count(phase), count + 2, phase)
+
+
+class TestTraceBuffer(TestCase):
+    def test_ring_buffer(self):
+        buffer = TraceBuffer(capacity=3)
+        for i in range(5):
+            with cycle(i):
+                buffer.record("price", price=i)
+
+        self.assertEqual(len(buffer), 3)
+        events = buffer.drain()
+        self.assertEqual([event["price"] for event in events], [2, 3, 4])
+        self.assertEqual([event["cycle_id"] for event in events], [2, 3, 4])
+        self.assertEqual(len(buffer), 0)
+
+    def test_exporter(self):
+        buffer = TraceBuffer()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "traces.jsonl")
+            exporter = TraceExporter(path, buffer=buffer)
+
+            buffer.record("price", price=0.5)
+            self.assertEqual(exporter.export(), 1)
+            self.assertEqual(exporter.export(), 0)
+            buffer.record("order_acked", order_id="0x1")
+            exporter.stop()
+
+            with open(path) as fh:
+                events = [json.loads(line) for line in fh]
+
+        self.assertEqual([event["event"] for event in events], ["price", "order_acked"])
+        self.assertEqual(events[1]["order_id"], "0x1")
+        self.assertEqual(events[0]["pid"], os.getpid())
+
+    def test_cycle_events(self):
+        order_book_manager = OrderBookManager(1)
+        order_book_manager._state = {
+            "orders": [],
+            "balances": {Token.A: 1000.0, Token.B: 1000.0, Collateral: 1000.0},
+        }
+
+        def place_order(order: Order):
+            trace("order_acked")
+            return None
+
+        order_book_manager.place_orders_with(place_order)
+        strategy_manager = StrategyManager(
+            "amm", config_path, PriceFeed([0.5]), order_book_manager
+        )
+        trace_buffer.drain()
+
+        # the fake price feed doesn't trace, record the price of the first cycle by hand
+        with cycle(1):
+            trace("price", price=0.5)
+        strategy_manager._synchronize_cycle()
+
+        events = [event for event in trace_buffer.drain() if event["cycle_id"] == 1]
+        names = [event["event"] for event in events]
+        self.assertEqual(names[1], "cycle_start")
+        self.assertIn("cycle_end", names)
+        events = [e for e in events if e["event"] not in ("cycle_start", "cycle_end")]
+        names = [event["event"] for event in events]
+        self.assertEqual(names[:3], ["price", "orders_computed", "orders_submitted"])
+        self.assertIn("order_acked", names)
+        times = [event["time"] for event in events]
+        self.assertEqual(times[:3], sorted(times[:3]))
@@ -0,0 +1,113 @@
+import threading
+from unittest import TestCase
+
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+from poly_market_maker.gas import GasStation, GasStrategy
+from poly_market_maker.transactions import NonceManager, TransactionPipeline
+
+private_key = "0x4c0883a69102937d6231471b5dbb6204fe5129617082792ae468d01a3f362318"
+token = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
+
+
+class MockEth:
+    """Stand-in node: accepts every raw transaction, and mines on demand"""
+
+    def __init__(self):
+        self.chain_id = 137
+        self.transaction_count = 7
+        self.sent = []
+        self.mined = set()
+        self.lock = threading.Lock()
+
+    def get_transaction_count(self, address, block_identifier):
+        return self.transaction_count
+
+    def estimate_gas(self, tx):
+        return 50000
+
+    def send_raw_transaction(self, raw_tx):
+        with self.lock:
+            self.sent.append(raw_tx)
+        return Web3.keccak(raw_tx)
+
+    def get_transaction_receipt(self, tx_hash):
+        if tx_hash not in self.mined:
+            raise TransactionNotFound(tx_hash)
+        return {"transactionHash": tx_hash, "status": 1}
+
+
+class MockWeb3:
+    def __init__(self):
+        self.eth = MockEth()
+
+
+class TestTransactionPipeline(TestCase):
+    def setUp(self):
+        self.w3 = MockWeb3()
+        self.pipeline = TransactionPipeline(
+            self.w3,
+            private_key,
+            GasStation(strat=GasStrategy.FIXED, fixed=100),
+            stuck_after=0,
+        )
+
+    def test_nonce_manager(self):
+        nonce_manager = NonceManager(self.w3, token)
+        self.assertEqual(nonce_manager.next_nonce(), 7)
+        self.assertEqual(nonce_manager.next_nonce(), 8)
+
+        self.w3.eth.transaction_count = 20
+        nonce_manager.sync()
+        self.assertEqual(nonce_manager.next_nonce(), 20)
+
+    def test_burst(self):
+        threads = [
+            threading.Thread(
+                target=lambda: self.pipeline.send({"to": token, "data": "0x"})
+            )
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # every transaction is broadcast without waiting for the previous ones
+        self.assertEqual(len(self.w3.eth.sent), 10)
+        self.assertEqual(
+            sorted(pending.nonce for pending in self.pipeline.pending),
+            list(range(7, 17)),
+        )
+
+    def test_broadcast_error(self):
+        self.w3.eth.send_raw_transaction = lambda raw_tx: 1 / 0
+        with self.assertRaises(ZeroDivisionError):
+            self.pipeline.send({"to": token, "data": "0x"})
+
+        # the nonce is resynchronized with the node
+        self.assertIsNone(self.pipeline.nonce_manager._next_nonce)
+
+    def test_receipts_and_replacement(self):
+        first = self.pipeline.send({"to": token, "data": "0x"})
+        second = self.pipeline.send({"to": token, "data": "0x"})
+
+        self.w3.eth.mined.add(first.tx_hash)
+        self.pipeline.check()
+
+        self.assertEqual(self.pipeline.wait(first, 0)["status"], 1)
+        self.assertIsNone(self.pipeline.wait(second, 0))
+
+        # the second one is stuck, and replaced with the same nonce and a higher fee
+        self.assertEqual(second.replacements, 1)
+        self.assertEqual(len(second.tx_hashes), 2)
+        self.assertEqual(second.nonce, 8)
+        self.assertEqual(second.tx["gasPrice"], 112)
+        self.assertEqual(self.pipeline.pending, [second])
+
+        # the original transaction is mined after all
+        self.w3.eth.mined.add(second.tx_hashes[1])
+        self.pipeline.check()
+        self.assertIsNotNone(self.pipeline.wait(second, 0))
+        self.assertEqual(self.pipeline.pending, [])